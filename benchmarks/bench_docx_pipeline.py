@@ -0,0 +1,90 @@
+"""
+Benchmark: filled DOCX through temp files vs in memory
+Compares the old pipeline step (fill into TEMP_DIR, read the file back for the
+response) with filling into a BytesIO, then the conversion hand-off: writing the
+filled document where LibreOffice reads it, on the disk temp dir vs tmpfs.
+
+Usage: python benchmarks/bench_docx_pipeline.py [--repeat 20] [--engine stream] [--disk-dir ./temp] [--tmpfs-dir /dev/shm]
+"""
+
+import argparse
+import glob
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx_text import fill_docx_bytes, fill_docx_file  # noqa: E402
+from template_registry import compile_template  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATES_DIR = os.path.join(ROOT, 'templates')
+
+
+def via_file(path, values, engine, directory):
+    """Old response path: fill into a temp file, read it back, delete it"""
+    output_path = os.path.join(directory, f'processed_{uuid.uuid4().hex}.docx')
+    fill_docx_file(path, output_path, values, engine)
+    with open(output_path, 'rb') as f:
+        content = f.read()
+    os.remove(output_path)
+    return content
+
+
+def via_memory(path, values, engine, directory):
+    return fill_docx_bytes(path, values, engine)[0]
+
+
+def hand_off(content, directory):
+    """Write the document where the converter picks it up, read it as the converter would, clean up"""
+    docx_path = os.path.join(directory, f'processed_{uuid.uuid4().hex}.docx')
+    with open(docx_path, 'wb') as f:
+        f.write(content)
+    with open(docx_path, 'rb') as f:
+        f.read()
+    os.remove(docx_path)
+
+
+def median_ms(func, repeat, *args):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--engine', default='stream', choices=('docx', 'stream'))
+    parser.add_argument('--disk-dir', default=os.path.join(ROOT, 'temp'))
+    parser.add_argument('--tmpfs-dir', default='/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir())
+    parser.add_argument('--template', help='only this template file name')
+    args = parser.parse_args()
+
+    os.makedirs(args.disk_dir, exist_ok=True)
+    paths = sorted(glob.glob(os.path.join(TEMPLATES_DIR, '*.docx')))
+    if args.template:
+        paths = [p for p in paths if os.path.basename(p) == args.template]
+
+    print(f"fill engine: {args.engine}; disk: {args.disk_dir}; tmpfs: {args.tmpfs_dir}\n")
+    print(f"{'template':<38}{'KiB':>7}{'file ms':>10}{'memory ms':>11}{'speedup':>9}"
+          f"{'disk hand-off':>15}{'tmpfs hand-off':>16}")
+    for path in paths:
+        values = {name: f'VALUE {i}' for i, name in enumerate(compile_template(path).placeholders)}
+        content = via_memory(path, values, args.engine, None)
+        file_ms = median_ms(via_file, args.repeat, path, values, args.engine, args.disk_dir)
+        memory_ms = median_ms(via_memory, args.repeat, path, values, args.engine, None)
+        disk_ms = median_ms(hand_off, args.repeat, content, args.disk_dir)
+        tmpfs_ms = median_ms(hand_off, args.repeat, content, args.tmpfs_dir)
+        print(f"{os.path.basename(path):<38}{len(content) / 1024:>7.0f}{file_ms:>10.2f}{memory_ms:>11.2f}"
+              f"{file_ms / memory_ms:>8.2f}x{disk_ms:>13.3f}ms{tmpfs_ms:>14.3f}ms")
+
+
+if __name__ == '__main__':
+    main()
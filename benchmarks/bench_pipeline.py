@@ -0,0 +1,186 @@
+"""
+Benchmark: the document pipeline, stage by stage and end to end
+Times placeholder scanning, data mapping, filling, PDF conversion and a full
+POST /process-document (in-process over ASGI) for every template in templates/,
+with Supabase replaced by the local stand-in at a configurable round-trip latency.
+Reports p50/p95/p99 and throughput per stage and template, and writes them as
+JSON so two commits can be compared with --compare.
+
+Usage: python benchmarks/bench_pipeline.py [--repeat 20] [--latency-ms 5] [--concurrency 4]
+       [--output benchmarks/results/pipeline.json] [--compare old.json]
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import harness  # noqa: E402
+from placeholders import find_placeholders  # noqa: E402
+from template_registry import compile_template  # noqa: E402
+
+STAGES = ('placeholders', 'mapping', 'fill', 'convert', 'request', 'request_concurrent')
+
+
+def time_calls(func, repeat, warmup):
+    """Per-call durations in seconds, after `warmup` untimed calls"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def converted(main, content):
+    pdf_path = main.convert_docx_content_to_pdf(content)
+    if pdf_path is None:
+        raise RuntimeError('PDF conversion failed')
+    os.remove(pdf_path)
+
+
+async def post_document(client, template, imo, engine):
+    response = await client.post('/process-document', json={
+        'template_name': template, 'vessel_imo': imo, 'fill_engine': engine})
+    if response.status_code != 200:
+        raise RuntimeError(f'{template}: HTTP {response.status_code} {response.text[:200]}')
+    return response
+
+
+async def time_requests(client, template, imos, repeat, warmup, concurrency, engine):
+    """(latencies, wall seconds) for `repeat` requests, at most `concurrency` in flight"""
+    for i in range(warmup):
+        await post_document(client, template, imos[i % len(imos)], engine)
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            await post_document(client, template, imos[i % len(imos)], engine)
+            samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(repeat)))
+    return samples, time.perf_counter() - start
+
+
+def bench_stages(main, path, imo, engine, repeat, warmup):
+    model = compile_template(path)
+    vessel = main.get_vessel_data(imo)
+    plan = main.resolution_plans.get(model)
+    placeholders = list(model.placeholders)
+    mapping = main.build_data_mapping(vessel, placeholders, imo, plan.resolutions)
+    content = main.fill_placeholders(path, mapping, engine)
+    return {
+        'placeholders': harness.summarize(time_calls(lambda: find_placeholders(model.text), repeat, warmup)),
+        'mapping': harness.summarize(time_calls(
+            lambda: main.build_data_mapping(vessel, placeholders, imo, plan.resolutions), repeat, warmup)),
+        'fill': harness.summarize(time_calls(lambda: main.fill_placeholders(path, mapping, engine), repeat, warmup)),
+        'convert': harness.summarize(time_calls(lambda: converted(main, content), repeat, warmup)),
+    }
+
+
+async def bench_requests(main, templates, imos, args):
+    import httpx
+
+    results = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=300) as client:
+        for template in templates:
+            sequential = await time_requests(client, template, imos, args.repeat, args.warmup, 1, args.engine)
+            concurrent = await time_requests(client, template, imos, args.repeat, 0, args.concurrency, args.engine)
+            results[template] = {
+                'request': harness.summarize(sequential[0], sequential[1]),
+                'request_concurrent': harness.summarize(*concurrent),
+            }
+    return results
+
+
+def print_table(results):
+    print(f"{'stage':<20}{'template':<38}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>10}")
+    for stage in STAGES:
+        for template, summary in sorted(results.get(stage, {}).items()):
+            print(f"{stage:<20}{template:<38}{summary['p50_ms']:>10.2f}{summary['p95_ms']:>10.2f}"
+                  f"{summary['p99_ms']:>10.2f}{summary['throughput_per_s']:>10.1f}")
+
+
+def print_comparison(baseline, results):
+    """p50/p95 change against an earlier results file; positive is slower"""
+    old_results = baseline['results']
+    print(f"\ncompared with {baseline['environment'].get('revision', '?')} ({baseline.get('created', '?')})")
+    print(f"{'stage':<20}{'template':<38}{'p50 old':>10}{'p50 new':>10}{'change':>9}{'p95 change':>12}")
+    for stage in STAGES:
+        for template, summary in sorted(results.get(stage, {}).items()):
+            old = old_results.get(stage, {}).get(template)
+            if not old or not old['p50_ms'] or not old['p95_ms']:
+                continue
+            p50_change = (summary['p50_ms'] / old['p50_ms'] - 1) * 100
+            p95_change = (summary['p95_ms'] / old['p95_ms'] - 1) * 100
+            print(f"{stage:<20}{template:<38}{old['p50_ms']:>10.2f}{summary['p50_ms']:>10.2f}"
+                  f"{p50_change:>+8.1f}%{p95_change:>+11.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='Supabase round-trip latency')
+    parser.add_argument('--vessels', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=4, help='requests in flight for request_concurrent')
+    parser.add_argument('--engine', default='stream', choices=('docx', 'stream'))
+    parser.add_argument('--template', action='append', help='only this template file name (repeatable)')
+    parser.add_argument('--soffice', help='real LibreOffice executable instead of benchmarks/fake_soffice.py')
+    parser.add_argument('--libreoffice-workers', type=int, default=2)
+    parser.add_argument('--output', help='results file (default benchmarks/results/pipeline-<revision>.json)')
+    parser.add_argument('--compare', help='earlier results file to diff against')
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(harness.ROOT, 'templates', '*.docx')))
+    if args.template:
+        paths = [p for p in paths if os.path.basename(p) in args.template]
+    templates = [os.path.basename(p) for p in paths]
+    imos = harness.vessel_imos(args.vessels)
+
+    main_module = harness.load_app(args.latency_ms / 1000, args.vessels,
+                                   [args.soffice] if args.soffice else None, args.libreoffice_workers)
+    results = {stage: {} for stage in STAGES}
+    try:
+        for path, template in zip(paths, templates):
+            for stage, summary in bench_stages(main_module, path, imos[0], args.engine,
+                                               args.repeat, args.warmup).items():
+                results[stage][template] = summary
+        for template, stages in asyncio.run(bench_requests(main_module, templates, imos, args)).items():
+            for stage, summary in stages.items():
+                results[stage][template] = summary
+    finally:
+        harness.close_app(main_module)
+
+    environment = harness.environment()
+    payload = {
+        'benchmark': 'pipeline',
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'environment': environment,
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'results': results,
+    }
+    output = args.output or os.path.join(harness.RESULTS_DIR, f"pipeline-{environment['revision']}.json")
+    harness.write_results(output, payload)
+
+    print_table(results)
+    print(f"\nresults written to {output}")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            print_comparison(json.load(f), results)
+
+
+if __name__ == '__main__':
+    main()
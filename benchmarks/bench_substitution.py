@@ -0,0 +1,114 @@
+"""
+Benchmark: placeholder substitution on the bundled templates
+Compares the old paragraphs x keys x formats replacement loop with the
+single-pass, run-aware docx_text.fill_document, then the two fill engines end to
+end (open, fill, save): python-docx vs the streaming OOXML rewrite
+
+Usage: python benchmarks/bench_substitution.py [--repeat 5] [--template "ICPO TEMPLATE.docx"]
+"""
+
+import argparse
+import glob
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document  # noqa: E402
+
+from docx_text import fill_document, iter_paragraphs, iter_story_parts  # noqa: E402
+from ooxml_stream import fill_docx_stream  # noqa: E402
+from template_registry import compile_template  # noqa: E402
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'templates')
+
+
+def legacy_fill(doc, data):
+    """The previous replace_placeholders_in_docx loop, without its prints"""
+    replacements = 0
+    paragraphs = list(doc.paragraphs)
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                paragraphs.extend(cell.paragraphs)
+    for paragraph in paragraphs:
+        for placeholder, value in data.items():
+            formats = [
+                f"{{{{{placeholder}}}}}", f"{{{placeholder}}}", f"[{placeholder}]", f"[[{placeholder}]]",
+                f"%{placeholder}%", f"<{placeholder}>", f"__{placeholder}__", f"##{placeholder}##",
+            ]
+            for fmt in formats:
+                if fmt in paragraph.text:
+                    paragraph.text = paragraph.text.replace(fmt, str(value))
+                    replacements += 1
+    return replacements
+
+
+def count_runs(doc):
+    return sum(len(p.nodes) for _, root in iter_story_parts(doc) for p in iter_paragraphs(root))
+
+
+def time_fill(fill, path, data, repeat):
+    timings = []
+    for _ in range(repeat):
+        doc = Document(path)
+        start = time.perf_counter()
+        replacements = fill(doc, data)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), replacements, count_runs(doc)
+
+
+def docx_engine(path, data):
+    doc = Document(path)
+    fill_document(doc, data)
+    doc.save(io.BytesIO())
+
+
+def stream_engine(path, data):
+    fill_docx_stream(path, io.BytesIO(), data)
+
+
+def time_engine(engine, path, data, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        engine(path, data)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--template', help='only this template file name')
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(TEMPLATES_DIR, '*.docx')))
+    if args.template:
+        paths = [p for p in paths if os.path.basename(p) == args.template]
+
+    models = [compile_template(path) for path in paths]
+
+    print(f"{'template':<38}{'fields':>7}{'old ms':>10}{'new ms':>10}{'speedup':>9}{'runs old/new/orig':>22}")
+    for path, model in zip(paths, models):
+        data = {name: f'VALUE {i}' for i, name in enumerate(model.placeholders)}
+        original_runs = count_runs(Document(path))
+        old_time, _, old_runs = time_fill(legacy_fill, path, data, args.repeat)
+        new_time, _, new_runs = time_fill(fill_document, path, data, args.repeat)
+        print(f"{os.path.basename(path):<38}{len(data):>7}{old_time * 1000:>10.1f}{new_time * 1000:>10.1f}"
+              f"{old_time / new_time:>8.1f}x{f'{old_runs}/{new_runs}/{original_runs}':>22}")
+
+    print(f"\n{'end to end':<38}{'fields':>7}{'docx ms':>10}{'stream ms':>11}{'speedup':>9}")
+    for path, model in zip(paths, models):
+        data = {name: f'VALUE {i}' for i, name in enumerate(model.placeholders)}
+        docx_time = time_engine(docx_engine, path, data, args.repeat)
+        stream_time = time_engine(stream_engine, path, data, args.repeat)
+        print(f"{os.path.basename(path):<38}{len(data):>7}{docx_time * 1000:>10.1f}{stream_time * 1000:>11.1f}"
+              f"{docx_time / stream_time:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark: per-call cost of synthetic placeholder values
+Times synthetic_data.generate over the placeholders build_data_mapping asks for,
+with the routing caches cleared before every call (cold) and kept (warm)
+
+Usage: python benchmarks/bench_synthetic_data.py [--calls 20000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synthetic_data  # noqa: E402
+
+PLACEHOLDERS = (
+    'buyer_name', 'buyer_company', 'buyer_address', 'buyer_email', 'buyer_phone',
+    'buyer_bank_name', 'buyer_bank_address', 'buyer_bank_swift',
+    'seller_name', 'seller_company', 'seller_address', 'seller_email', 'seller_phone',
+    'seller_bank_name', 'seller_bank_address', 'seller_bank_swift',
+    'principal_buyer_name', 'authorized_person_name', 'commodity', 'loading_port',
+    'discharge_port', 'incoterms', 'payment_terms', 'quality_spec', 'total_value',
+    'quantity', 'contract_date', 'reference_number', 'vessel_name', 'remarks',
+)
+
+
+def clear_caches():
+    synthetic_data.route.cache_clear()
+    synthetic_data.entity_seed.cache_clear()
+
+
+def time_calls(calls, imos, cold):
+    start = time.perf_counter()
+    for i in range(calls):
+        if cold:
+            clear_caches()
+        synthetic_data.generate(PLACEHOLDERS[i % len(PLACEHOLDERS)], imos[i % len(imos)])
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=20000)
+    parser.add_argument('--vessels', type=int, default=50, help='distinct IMOs the calls cycle through')
+    args = parser.parse_args()
+
+    imos = [str(9000000 + i) for i in range(args.vessels)]
+    clear_caches()
+    cold = time_calls(args.calls, imos, cold=True)
+    clear_caches()
+    time_calls(len(PLACEHOLDERS) * len(imos), imos, cold=False)
+    warm = time_calls(args.calls, imos, cold=False)
+
+    print(f"{'placeholders':<24}{len(PLACEHOLDERS):>10}")
+    print(f"{'cold us/call':<24}{cold * 1e6:>10.2f}")
+    print(f"{'warm us/call':<24}{warm * 1e6:>10.2f}")
+    print(f"{'route cache':<24}{str(synthetic_data.route.cache_info().currsize):>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark: vessel context loading against a local Supabase stand-in
+Compares the old one-query-per-relation loader with vessel_context.load_vessel_context
+(with and without the reference cache) and reports round trips and wall time per vessel
+
+Usage: python benchmarks/bench_vessel_loader.py [--latency-ms 20] [--vessels 20]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import vessel_context  # noqa: E402
+from reference_cache import ReferenceCache  # noqa: E402
+from benchmarks.fake_supabase import FakeSupabase, sample_tables  # noqa: E402
+
+
+def sequential_loader(client, imo):
+    """The previous get_vessel_data: vessel, then one query per related row"""
+    response = client.table('vessels').select('*').eq('imo', imo).execute()
+    if not response.data:
+        return None
+    vessel_data = dict(response.data[0])
+    for prefix, fk_column, table in vessel_context.VESSEL_RELATIONS:
+        if vessel_data.get(fk_column):
+            related = client.table(table).select('*').eq('id', vessel_data[fk_column]).execute()
+            if related.data:
+                for key, value in related.data[0].items():
+                    vessel_data[f'{prefix}_{key}'] = value
+    return vessel_data
+
+
+def run(name, loader, client, imos):
+    client.reset_counters()
+    vessel_context.reset_embedding_probe()
+    start = time.perf_counter()
+    results = [loader(client, imo) for imo in imos]
+    elapsed = time.perf_counter() - start
+    per_vessel_ms = elapsed / len(imos) * 1000
+    print(f"{name:<28} round trips/vessel: {client.round_trips / len(imos):5.2f}   "
+          f"time/vessel: {per_vessel_ms:7.2f} ms")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='simulated latency per round trip')
+    parser.add_argument('--vessels', type=int, default=20, help='number of vessels to load')
+    args = parser.parse_args()
+
+    tables = sample_tables(args.vessels)
+    imos = [v['imo'] for v in tables['vessels']]
+    latency = args.latency_ms / 1000
+
+    print(f"Loading {len(imos)} vessels, {args.latency_ms:.0f} ms simulated latency per round trip\n")
+    baseline = run('sequential (old)', sequential_loader, FakeSupabase(tables, latency), imos)
+    embedded = run('embedded relations', vessel_context.load_vessel_context,
+                   FakeSupabase(tables, latency), imos)
+    fanout = run('parallel fallback (no FKs)', vessel_context.load_vessel_context,
+                 FakeSupabase(tables, latency, embedding=False), imos)
+
+    cache = ReferenceCache()
+    cached_client = FakeSupabase(tables, latency)
+
+    def cached_loader(client, imo):
+        return vessel_context.load_vessel_context(client, imo, cache=cache)
+
+    run('embedded + cache (cold)', cached_loader, cached_client, imos)
+    cached = run('embedded + cache (warm)', cached_loader, cached_client, imos)
+
+    assert baseline == embedded == fanout == cached, "loaders returned different vessel data"
+    print("\nAll loaders returned identical vessel data")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Stand-in for `soffice --headless --convert-to pdf --outdir DIR FILE...`
+Used by tests and benchmarks where LibreOffice isn't installed. Writes a small
+PDF per input after a simulated delay.
+
+FAKE_SOFFICE_STARTUP   seconds slept once per invocation (default 0)
+FAKE_SOFFICE_PER_FILE  seconds slept per converted file (default 0)
+Input names containing "hang" sleep forever, "crash" exit 1 before converting
+anything, "broken" are skipped (no output) while the other inputs still convert.
+
+Usage: python benchmarks/fake_soffice.py --headless --convert-to pdf --outdir out in.docx
+"""
+
+import os
+import sys
+import time
+
+
+def main(argv):
+    outdir = '.'
+    inputs = []
+    args = iter(argv)
+    for arg in args:
+        if arg == '--outdir':
+            outdir = next(args)
+        elif arg == '--convert-to':
+            next(args)
+        elif not arg.startswith('-'):
+            inputs.append(arg)
+
+    time.sleep(float(os.getenv('FAKE_SOFFICE_STARTUP', '0')))
+    if any('crash' in os.path.basename(path) for path in inputs):
+        print('fake soffice crashed', file=sys.stderr)
+        return 1
+
+    for path in inputs:
+        name = os.path.basename(path)
+        if 'hang' in name:
+            while True:
+                time.sleep(60)
+        time.sleep(float(os.getenv('FAKE_SOFFICE_PER_FILE', '0')))
+        if 'broken' in name:
+            print(f'Error: source file could not be loaded: {name}', file=sys.stderr)
+            continue
+        with open(path, 'rb') as src:
+            size = len(src.read())
+        with open(os.path.join(outdir, os.path.splitext(name)[0] + '.pdf'), 'wb') as pdf:
+            pdf.write(b'%PDF-1.4\n% fake conversion of ' + name.encode() + b' (' + str(size).encode() + b' bytes)\n%%EOF\n')
+        print(f'convert {path} -> {outdir} using filter : writer_pdf_Export')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,143 @@
+"""
+Local Supabase stand-in for benchmarks and tests
+Mimics the subset of the supabase-py query builder used by the API
+(table().select().eq()/in_()/limit().execute()) and counts round trips
+"""
+
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+# alias:table!fk_column(*) as used by vessel_context.EMBEDDED_SELECT
+_EMBED_RE = re.compile(r'(\w+):(\w+)!(\w+)\(\*\)')
+
+
+class FakeAPIError(Exception):
+    """Shaped like postgrest.exceptions.APIError (has a .code)"""
+
+    def __init__(self, message: str, code: str):
+        super().__init__(message)
+        self.code = code
+
+
+class FakeResponse:
+    def __init__(self, data: List[Dict]):
+        self.data = data
+
+
+class FakeQuery:
+    def __init__(self, client: 'FakeSupabase', table: str):
+        self._client = client
+        self._table = table
+        self._columns = '*'
+        self._filters = []
+        self._limit: Optional[int] = None
+
+    def select(self, columns: str = '*'):
+        self._columns = columns
+        return self
+
+    def eq(self, column: str, value):
+        self._filters.append(lambda row: str(row.get(column)) == str(value))
+        return self
+
+    def in_(self, column: str, values):
+        wanted = {str(v) for v in values}
+        self._filters.append(lambda row: str(row.get(column)) in wanted)
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    def execute(self) -> FakeResponse:
+        self._client._record_round_trip(self._table)
+        embeds = _EMBED_RE.findall(self._columns)
+        if embeds and not self._client.embedding:
+            raise FakeAPIError(
+                f"Could not find a relationship between '{self._table}' and '{embeds[0][1]}' in the schema cache",
+                'PGRST200',
+            )
+
+        rows = [row for row in self._client.tables.get(self._table, [])
+                if all(f(row) for f in self._filters)]
+        if self._limit is not None:
+            rows = rows[:self._limit]
+
+        result = []
+        for row in rows:
+            row = dict(row)
+            for alias, table, fk_column in embeds:
+                ref_id = row.get(fk_column)
+                match = None
+                if ref_id is not None:
+                    match = next((dict(r) for r in self._client.tables.get(table, [])
+                                  if str(r.get('id')) == str(ref_id)), None)
+                row[alias] = match
+            result.append(row)
+        return FakeResponse(result)
+
+
+class FakeSupabase:
+    """
+    In-memory Supabase client.
+
+    tables: {table_name: [row, ...]}
+    latency: seconds slept per execute(), to model network round trips
+    embedding: False makes embedded selects fail like a schema without FKs
+    """
+
+    def __init__(self, tables: Dict[str, List[Dict]], latency: float = 0.0, embedding: bool = True):
+        self.tables = tables
+        self.latency = latency
+        self.embedding = embedding
+        self.round_trips = 0
+        self.round_trips_by_table: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def reset_counters(self):
+        with self._lock:
+            self.round_trips = 0
+            self.round_trips_by_table = {}
+
+    def _record_round_trip(self, table: str):
+        with self._lock:
+            self.round_trips += 1
+            self.round_trips_by_table[table] = self.round_trips_by_table.get(table, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+
+def sample_tables(vessel_count: int = 50) -> Dict[str, List[Dict]]:
+    """A small fleet where every vessel references ports, companies and a refinery"""
+    ports = [{'id': i, 'name': f'Port {i}', 'country': 'Netherlands', 'city': f'City {i}'}
+             for i in range(1, 11)]
+    companies = [{'id': i, 'name': f'Company {i}', 'country': 'UAE', 'email': f'ops{i}@example.com'}
+                 for i in range(1, 11)]
+    refineries = [{'id': f'ref-{i}', 'name': f'Refinery {i}', 'country': 'Saudi Arabia', 'capacity': 400000}
+                  for i in range(1, 6)]
+    vessels = []
+    for i in range(vessel_count):
+        vessels.append({
+            'id': i + 1,
+            'imo': str(9100000 + i),
+            'name': f'MT Bench {i}',
+            'vessel_type': 'Crude Oil Tanker',
+            'flag': 'Liberia',
+            'built': 2010 + i % 10,
+            'deadweight': 100000 + i,
+            'gross_tonnage': 60000 + i,
+            'cargo_quantity': 90000 + i,
+            'deal_value': 40000000 + i,
+            'price': 75.5,
+            'loading_port_id': ports[i % len(ports)]['id'],
+            'destination_port_id': ports[(i + 3) % len(ports)]['id'],
+            'owner_id': companies[i % len(companies)]['id'],
+            'operator_id': companies[(i + 1) % len(companies)]['id'],
+            'refinery_id': refineries[i % len(refineries)]['id'],
+        })
+    return {'vessels': vessels, 'ports': ports, 'companies': companies, 'refineries': refineries}
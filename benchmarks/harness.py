@@ -0,0 +1,177 @@
+"""
+Shared setup for the pipeline benchmark and the load-test runner
+Loads the API module in-process against the local Supabase stand-in and a
+LibreOffice pool (benchmarks/fake_soffice.py unless a real soffice is given),
+and provides the latency summaries and JSON result files both tools write.
+"""
+
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Optional, Sequence, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_supabase import FakeSupabase, sample_tables  # noqa: E402
+
+FAKE_SOFFICE = [sys.executable, os.path.join(ROOT, 'benchmarks', 'fake_soffice.py')]
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+# Throwaway plan and output cache directories, removed by close_app
+_work_dirs: List[str] = []
+
+
+def percentile(sorted_samples: Sequence[float], fraction: float) -> float:
+    """Linear-interpolated percentile of already sorted samples"""
+    if not sorted_samples:
+        return 0.0
+    position = (len(sorted_samples) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_samples) - 1)
+    return sorted_samples[lower] + (sorted_samples[upper] - sorted_samples[lower]) * (position - lower)
+
+
+def summarize(samples: List[float], elapsed: Optional[float] = None) -> Dict[str, float]:
+    """Latency summary in milliseconds; throughput per second over `elapsed` (else the samples' sum)"""
+    ordered = sorted(samples)
+    wall = elapsed if elapsed is not None else sum(samples)
+    return {
+        'count': len(ordered),
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        'throughput_per_s': round(len(ordered) / wall, 3) if wall else 0.0,
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def environment() -> Dict[str, object]:
+    return {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def load_app(latency: float = 0.0, vessels: int = 50, soffice: Optional[List[str]] = None,
+             libreoffice_workers: int = 2, output_cache: bool = False, cpu_processes: bool = True):
+    """
+    Import main configured for an in-process run and return the module.
+    The Supabase client is replaced by FakeSupabase (latency seconds per round
+    trip); resolution plans and cached outputs go to a throwaway directory
+    instead of ./cache. See configure() for the conversion and cache settings.
+    """
+    os.chdir(ROOT)
+    work_dir = tempfile.mkdtemp(prefix='bench-')
+    _work_dirs.append(work_dir)
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ['CPU_POOL_PROCESSES'] = '1' if cpu_processes else '0'
+    os.environ['RESOLUTION_PLANS_DIR'] = os.path.join(work_dir, 'plans')
+
+    import main
+
+    main.supabase = FakeSupabase(sample_tables(vessels), latency)
+    configure(main, soffice, libreoffice_workers, output_cache)
+    main.cpu_lane.warm()
+    return main
+
+
+def configure(main, soffice: Optional[List[str]] = None, libreoffice_workers: int = 2,
+              output_cache: bool = False, soffice_env: Optional[Dict[str, str]] = None):
+    """
+    (Re)start the conversion pool over `soffice` (benchmarks/fake_soffice.py by
+    default) with soffice_env set for its processes, and switch the output cache
+    on (empty, in the throwaway directory) or off so every request does the work.
+    """
+    from libreoffice_pool import ConversionPool
+    from output_cache import OutputCache
+
+    if main.conversion_pool is not None:
+        main.conversion_pool.stop()
+    for key in ('FAKE_SOFFICE_STARTUP', 'FAKE_SOFFICE_PER_FILE'):
+        os.environ.pop(key, None)
+    os.environ.update(soffice_env or {})
+    main.conversion_pool = ConversionPool(soffice or FAKE_SOFFICE, workers=libreoffice_workers,
+                                          use_uno=False if soffice is None else None, temp_root=main.SCRATCH_DIR)
+    main.conversion_pool.start()
+    if output_cache:
+        main.output_cache = OutputCache(tempfile.mkdtemp(prefix='outputs-', dir=_work_dirs[-1]), 256 * 1024 * 1024)
+    else:
+        main.output_cache = OutputCache(None, 0)
+
+
+def close_app(main):
+    if main.conversion_pool is not None:
+        main.conversion_pool.stop()
+        main.conversion_pool = None
+    main.cpu_lane.shutdown(wait=False)
+    while _work_dirs:
+        shutil.rmtree(_work_dirs.pop(), ignore_errors=True)
+
+
+def process_tree_rss_mb(pid: int) -> Optional[float]:
+    """Resident memory of pid and all its descendants (Linux /proc; None elsewhere)"""
+    children: Dict[int, List[int]] = {}
+    try:
+        entries = [name for name in os.listdir('/proc') if name.isdigit()]
+    except OSError:
+        return None
+    for name in entries:
+        try:
+            with open(f'/proc/{name}/stat') as f:
+                # The command name may contain spaces; ppid is the second field after it
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(name))
+
+    total, found, pending = 0.0, False, [pid]
+    page_mb = os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f'/proc/{current}/statm') as f:
+                total += int(f.read().split()[1]) * page_mb
+            found = True
+        except (OSError, ValueError, IndexError):
+            pass
+        pending.extend(children.get(current, ()))
+    return total if found else None
+
+
+def dir_usage(path: str) -> Tuple[int, int]:
+    """(files, bytes) under path; (0, 0) when it doesn't exist"""
+    files = size = 0
+    for directory, _, names in os.walk(path):
+        for name in names:
+            try:
+                size += os.path.getsize(os.path.join(directory, name))
+            except OSError:
+                continue
+            files += 1
+    return files, size
+
+
+def vessel_imos(count: int) -> List[str]:
+    return [vessel['imo'] for vessel in sample_tables(count)['vessels']]
+
+
+def write_results(path: str, payload: Dict):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
@@ -0,0 +1,302 @@
+"""
+Load test: how much concurrent /process-document traffic the API sustains
+Runs closed-loop scenarios at increasing concurrency (each virtual user sends
+its next request as soon as the previous one returns) and records throughput,
+latency percentiles, error rate, RSS and temp-dir growth over time. The
+capacity of a scenario is the highest concurrency whose p95 stays within
+--slo-ms with under 1% errors. The report is JSON; --compare diffs two reports.
+
+Scenarios:
+  hot               one template, five vessels, output cache on: the steady state
+  mixed             every template, fifty vessels, output cache on
+  cold              every template, caches emptied before each request
+  slow-libreoffice  every template, no output cache, conversions take ~0.5 s
+
+In-process (default) the app runs over ASGI against the Supabase stand-in and
+benchmarks/fake_soffice.py; scenarios set the output cache and LibreOffice
+speed themselves. With --url the runner drives a live server over HTTP, where
+those settings are the server's own and only the traffic pattern applies;
+pass --server-pid to sample its memory.
+
+Usage: python benchmarks/load_test.py [--scenario hot --scenario cold] [--concurrency 1,2,4,8]
+       [--duration 10] [--slo-ms 2000] [--url http://localhost:8000 --server-pid 1234]
+       [--output benchmarks/results/load.json] [--compare old.json]
+"""
+
+import argparse
+import asyncio
+import glob
+import itertools
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import harness  # noqa: E402
+
+MAX_ERROR_RATE = 0.01
+
+
+class Scenario(NamedTuple):
+    name: str
+    all_templates: bool
+    vessels: int
+    output_cache: bool
+    cold: bool                    # empty the caches before every request
+    soffice_env: Dict[str, str]   # fake_soffice timing, in-process runs only
+
+
+SCENARIOS = {
+    scenario.name: scenario for scenario in (
+        Scenario('hot', False, 5, True, False, {}),
+        Scenario('mixed', True, 50, True, False, {}),
+        Scenario('cold', True, 500, False, True, {}),
+        Scenario('slow-libreoffice', True, 50, False, False,
+                 {'FAKE_SOFFICE_STARTUP': '0.3', 'FAKE_SOFFICE_PER_FILE': '0.2'}),
+    )
+}
+MAX_VESSELS = max(scenario.vessels for scenario in SCENARIOS.values())
+
+
+class Target(NamedTuple):
+    """Where requests go, and what to sample while they run"""
+    client: object            # httpx.AsyncClient
+    templates: List[str]
+    imos: List[str]
+    pid: Optional[int]        # process tree whose RSS is sampled
+    temp_dirs: List[str]
+
+
+async def empty_caches(client):
+    for path in ('/cache/invalidate', '/plans/invalidate', '/outputs/clear'):
+        await client.post(path, json={})
+
+
+async def warm_up(target: Target, scenario: Scenario):
+    """One untimed request per template, so worker start-up isn't charged to the first level"""
+    templates = target.templates if scenario.all_templates else target.templates[:1]
+    for template in templates:
+        await target.client.post('/process-document', json={'template_name': template,
+                                                             'vessel_imo': target.imos[0]})
+
+
+def take_sample(target: Target, started: float) -> Dict:
+    usage = [harness.dir_usage(path) for path in target.temp_dirs]
+    rss = harness.process_tree_rss_mb(target.pid) if target.pid else None
+    return {
+        'elapsed_s': round(time.perf_counter() - started, 2),
+        'rss_mb': round(rss, 1) if rss is not None else None,
+        'temp_files': sum(files for files, _ in usage),
+        'temp_mb': round(sum(size for _, size in usage) / (1024 * 1024), 2),
+    }
+
+
+async def sample_resources(target: Target, started: float, interval: float, samples: List[Dict]):
+    while True:
+        samples.append(take_sample(target, started))
+        await asyncio.sleep(interval)
+
+
+async def run_step(target: Target, scenario: Scenario, concurrency: int, duration: float,
+                   sample_interval: float) -> Dict:
+    """Closed loop at `concurrency` users for `duration` seconds"""
+    templates = target.templates if scenario.all_templates else target.templates[:1]
+    imos = target.imos[:scenario.vessels]
+    sequence = itertools.count()
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    samples: List[Dict] = []
+    started = time.perf_counter()
+    deadline = started + duration
+
+    async def user():
+        while time.perf_counter() < deadline:
+            i = next(sequence)
+            body = {'template_name': templates[i % len(templates)],
+                    'vessel_imo': imos[(i // len(templates)) % len(imos)]}
+            if scenario.cold:
+                await empty_caches(target.client)
+            start = time.perf_counter()
+            try:
+                response = await target.client.post('/process-document', json=body)
+                outcome = None if response.status_code == 200 else f'HTTP {response.status_code}'
+            except Exception as e:
+                outcome = type(e).__name__
+            if outcome is None:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors[outcome] = errors.get(outcome, 0) + 1
+
+    sampler = asyncio.ensure_future(sample_resources(target, started, sample_interval, samples))
+    try:
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+    finally:
+        sampler.cancel()
+    elapsed = time.perf_counter() - started
+    samples.append(take_sample(target, started))
+
+    failed = sum(errors.values())
+    summary = harness.summarize(latencies, elapsed)
+    rss = [sample['rss_mb'] for sample in samples if sample['rss_mb'] is not None]
+    return {
+        'concurrency': concurrency,
+        'duration_s': round(elapsed, 2),
+        'latency': summary,
+        'errors': errors,
+        'error_rate': round(failed / (failed + len(latencies)), 4) if failed or latencies else 0.0,
+        'rss_start_mb': rss[0] if rss else None,
+        'rss_peak_mb': max(rss) if rss else None,
+        'rss_growth_mb': round(rss[-1] - rss[0], 1) if rss else None,
+        'temp_growth_files': samples[-1]['temp_files'] - samples[0]['temp_files'],
+        'temp_growth_mb': round(samples[-1]['temp_mb'] - samples[0]['temp_mb'], 2),
+        'samples': samples,
+    }
+
+
+def capacity(steps: List[Dict], slo_ms: float) -> Dict:
+    """Highest concurrency within the SLO, and the step with the best throughput"""
+    within = [step for step in steps
+              if step['latency']['p95_ms'] <= slo_ms and step['error_rate'] < MAX_ERROR_RATE
+              and step['latency']['count']]
+    best = max(steps, key=lambda step: step['latency']['throughput_per_s'], default=None)
+    return {
+        'max_concurrency_within_slo': max((step['concurrency'] for step in within), default=0),
+        'throughput_within_slo': max((step['latency']['throughput_per_s'] for step in within), default=0.0),
+        'peak_throughput': best['latency']['throughput_per_s'] if best else 0.0,
+        'peak_throughput_concurrency': best['concurrency'] if best else None,
+    }
+
+
+async def run_scenarios(args, scenarios: List[Scenario], levels: List[int]) -> Dict:
+    import httpx
+
+    app = None
+    if args.url:
+        transport = None
+    else:
+        app = harness.load_app(args.latency_ms / 1000, MAX_VESSELS,
+                               [args.soffice] if args.soffice else None, args.libreoffice_workers)
+        transport = httpx.ASGITransport(app=app.app)
+
+    results = {}
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url=args.url or 'http://load-test',
+                                     timeout=args.timeout) as client:
+            if app is not None:
+                paths = glob.glob(os.path.join(harness.ROOT, 'templates', '*.docx'))
+                templates = sorted(os.path.basename(path) for path in paths)
+                target = Target(client, templates, harness.vessel_imos(MAX_VESSELS), os.getpid(),
+                                [os.path.abspath(app.TEMP_DIR), app.SCRATCH_DIR])
+            else:
+                target = await remote_target(client, args)
+            if args.template:
+                target = target._replace(templates=[t for t in target.templates if t in args.template])
+            if not target.templates or not target.imos:
+                raise SystemExit('No templates or vessels to generate documents from')
+
+            for scenario in scenarios:
+                if app is not None:
+                    harness.configure(app, [args.soffice] if args.soffice else None, args.libreoffice_workers,
+                                      scenario.output_cache, None if args.soffice else scenario.soffice_env)
+                await warm_up(target, scenario)
+                steps = []
+                for concurrency in levels:
+                    step = await run_step(target, scenario, concurrency, args.duration, args.sample_interval)
+                    steps.append(step)
+                    latency = step['latency']
+                    print(f"{scenario.name:<18}{concurrency:>6}{latency['throughput_per_s']:>10.1f}"
+                          f"{latency['p50_ms']:>10.0f}{latency['p95_ms']:>10.0f}{latency['p99_ms']:>10.0f}"
+                          f"{step['error_rate'] * 100:>8.1f}%{_optional(step['rss_growth_mb']):>10}"
+                          f"{step['temp_growth_mb']:>10.2f}", flush=True)
+                results[scenario.name] = {
+                    'scenario': scenario._asdict(),
+                    'capacity': capacity(steps, args.slo_ms),
+                    'steps': steps,
+                }
+    finally:
+        if app is not None:
+            harness.close_app(app)
+    return results
+
+
+async def remote_target(client, args) -> Target:
+    templates = (await client.get('/templates')).json().get('templates', [])
+    vessels = (await client.get('/vessels')).json().get('vessels', [])
+    temp_dirs = args.temp_dir or [os.path.join(harness.ROOT, 'temp'), '/dev/shm/document_processor']
+    return Target(client, sorted(t['file_name'] for t in templates), [v['imo'] for v in vessels if v.get('imo')],
+                  args.server_pid, temp_dirs)
+
+
+def _optional(value) -> str:
+    return '-' if value is None else f'{value:.1f}'
+
+
+def print_comparison(baseline: Dict, results: Dict):
+    print(f"\ncompared with {baseline['environment'].get('revision', '?')} ({baseline.get('created', '?')})")
+    print(f"{'scenario':<18}{'capacity old':>13}{'new':>6}{'peak ops/s old':>16}{'new':>8}{'change':>9}")
+    for name, result in results.items():
+        old = baseline['results'].get(name)
+        if not old:
+            continue
+        old_capacity, new_capacity = old['capacity'], result['capacity']
+        old_peak, new_peak = old_capacity['peak_throughput'], new_capacity['peak_throughput']
+        change = f"{(new_peak / old_peak - 1) * 100:+.1f}%" if old_peak else '-'
+        print(f"{name:<18}{old_capacity['max_concurrency_within_slo']:>13}"
+              f"{new_capacity['max_concurrency_within_slo']:>6}{old_peak:>16.1f}{new_peak:>8.1f}{change:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='scenario to run (repeatable; default all)')
+    parser.add_argument('--concurrency', default='1,2,4,8', help='comma-separated concurrency levels')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per concurrency level')
+    parser.add_argument('--slo-ms', type=float, default=2000.0, help='p95 latency a level must stay within')
+    parser.add_argument('--sample-interval', type=float, default=1.0, help='seconds between RSS/temp samples')
+    parser.add_argument('--timeout', type=float, default=300.0, help='per-request timeout')
+    parser.add_argument('--template', action='append', help='only this template file name (repeatable)')
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='in-process Supabase round-trip latency')
+    parser.add_argument('--soffice', help='real LibreOffice executable instead of benchmarks/fake_soffice.py')
+    parser.add_argument('--libreoffice-workers', type=int, default=2)
+    parser.add_argument('--url', help='drive a running server over HTTP instead of the app in-process')
+    parser.add_argument('--server-pid', type=int, help='with --url: process whose RSS (with children) is sampled')
+    parser.add_argument('--temp-dir', action='append', help='with --url: directories whose growth is sampled')
+    parser.add_argument('--output', help='report file (default benchmarks/results/load-<revision>.json)')
+    parser.add_argument('--compare', help='earlier report to diff against')
+    args = parser.parse_args()
+
+    scenarios = [SCENARIOS[name] for name in (args.scenario or SCENARIOS)]
+    levels = [int(level) for level in args.concurrency.split(',') if level.strip()]
+
+    print(f"{'scenario':<18}{'users':>6}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'errors':>9}{'RSS +MB':>10}{'temp +MB':>10}")
+    results = asyncio.run(run_scenarios(args, scenarios, levels))
+
+    environment = harness.environment()
+    payload = {
+        'benchmark': 'load',
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'environment': environment,
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'results': results,
+    }
+    output = args.output or os.path.join(harness.RESULTS_DIR, f"load-{environment['revision']}.json")
+    harness.write_results(output, payload)
+
+    print(f"\n{'scenario':<18}{'capacity (users within SLO)':>28}{'ops/s there':>13}{'peak ops/s':>12}")
+    for name, result in results.items():
+        summary = result['capacity']
+        print(f"{name:<18}{summary['max_concurrency_within_slo']:>28}{summary['throughput_within_slo']:>13.1f}"
+              f"{summary['peak_throughput']:>12.1f}")
+    print(f"\nreport written to {output}")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            print_comparison(json.load(f), results)
+
+
+if __name__ == '__main__':
+    main()
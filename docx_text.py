@@ -0,0 +1,152 @@
+"""
+Paragraph and text-run walking (and filling) for .docx files
+Works on the underlying XML so body, tables, text boxes, headers and footers
+are all covered the same way
+"""
+
+import io
+import re
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from docx import Document
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.oxml.ns import qn
+
+from ooxml_stream import fill_docx_stream
+from placeholders import substitute_runs
+
+W_P = qn('w:p')
+W_T = qn('w:t')
+W_TBL = qn('w:tbl')
+W_TR = qn('w:tr')
+W_TC = qn('w:tc')
+XML_SPACE = '{http://www.w3.org/XML/1998/namespace}space'
+
+DOCUMENT_PART = 'word/document.xml'
+
+# Parts whose text we scan and fill, besides the main document
+_STORY_RELTYPES = (RT.HEADER, RT.FOOTER)
+
+_NUMBERED_PART_RE = re.compile(r'^(.*?)(\d+)\.xml$')
+
+
+class ParagraphText(NamedTuple):
+    """A paragraph and the w:t text nodes that belong directly to it"""
+    index: int          # position among all w:p of the part, document order
+    element: object     # the w:p lxml element
+    nodes: List         # its w:t elements (text inside nested text-box paragraphs excluded)
+
+    @property
+    def texts(self) -> List[str]:
+        return [node.text or '' for node in self.nodes]
+
+    @property
+    def text(self) -> str:
+        return ''.join(self.texts)
+
+
+def iter_story_parts(doc) -> Iterator[Tuple[str, object]]:
+    """Yield (zip member name, root element) for the document body, then headers and footers"""
+    yield DOCUMENT_PART, doc.element.body
+    story_parts = [
+        rel.target_part for rel in doc.part.rels.values()
+        if not rel.is_external and rel.reltype in _STORY_RELTYPES
+    ]
+    for part in sorted(story_parts, key=lambda p: _natural_key(str(p.partname))):
+        yield str(part.partname).lstrip('/'), part.element
+
+
+def _natural_key(name: str):
+    # header2.xml before header10.xml
+    match = _NUMBERED_PART_RE.match(name)
+    if not match:
+        return (name, 0)
+    return (match.group(1), int(match.group(2)))
+
+
+def iter_paragraphs(root) -> List[ParagraphText]:
+    """
+    Every w:p under root in document order, with the text nodes it owns.
+    A w:t belongs to its nearest w:p ancestor, so text-box paragraphs nested
+    inside a run are reported separately from the paragraph that anchors them.
+    """
+    paragraphs: List[ParagraphText] = []
+    by_element: Dict[object, ParagraphText] = {}
+    for element in root.iter(W_P, W_T):
+        if element.tag == W_P:
+            paragraph = ParagraphText(len(paragraphs), element, [])
+            paragraphs.append(paragraph)
+            by_element[element] = paragraph
+            continue
+        parent = element.getparent()
+        while parent is not None and parent.tag != W_P:
+            parent = parent.getparent()
+        if parent is not None and parent in by_element:
+            by_element[parent].nodes.append(element)
+    return paragraphs
+
+
+def table_cell_position(paragraph_element, table_index: Dict[object, int]) -> Optional[Tuple[int, int, int]]:
+    """(table, row, column) of the innermost table cell containing the paragraph, or None"""
+    cell = paragraph_element.getparent()
+    while cell is not None and cell.tag != W_TC:
+        cell = cell.getparent()
+    if cell is None:
+        return None
+    row = cell.getparent()
+    table = row.getparent() if row is not None else None
+    if row is None or table is None or table.tag != W_TBL:
+        return None
+    row_index = [child for child in table if child.tag == W_TR].index(row)
+    cell_index = [child for child in row if child.tag == W_TC].index(cell)
+    return table_index.get(table, -1), row_index, cell_index
+
+
+def set_node_text(node, text: str):
+    """Set a w:t's text, preserving leading/trailing spaces the way Word expects"""
+    node.text = text
+    if text != text.strip():
+        node.set(XML_SPACE, 'preserve')
+
+
+def fill_document(doc, values: Dict[str, str]) -> int:
+    """
+    Replace placeholders in every paragraph of the document, headers and footers
+    in place, one regex pass per paragraph. Only the affected runs' text changes,
+    so run formatting is kept. Returns the number of replacements made.
+    """
+    replacements = 0
+    for _, root in iter_story_parts(doc):
+        for paragraph in iter_paragraphs(root):
+            if not paragraph.nodes:
+                continue
+            texts = paragraph.texts
+            new_texts, count = substitute_runs(texts, values)
+            if not count:
+                continue
+            replacements += count
+            for node, old_text, new_text in zip(paragraph.nodes, texts, new_texts):
+                if new_text != old_text:
+                    set_node_text(node, new_text)
+    return replacements
+
+
+def fill_docx_file(source: str, destination: Union[str, BinaryIO], values: Dict[str, str], engine: str = 'docx') -> int:
+    """
+    Fill the .docx at source and write it to destination with either engine:
+    'docx' (python-docx object tree) or 'stream' (ooxml_stream rewrite).
+    A top-level function so it can run in a worker process.
+    """
+    if engine == 'stream':
+        return fill_docx_stream(source, destination, values)
+    doc = Document(source)
+    replacements = fill_document(doc, values)
+    doc.save(destination)
+    return replacements
+
+
+def fill_docx_bytes(source: str, values: Dict[str, str], engine: str = 'docx') -> Tuple[bytes, int]:
+    """fill_docx_file into memory: (the filled .docx, number of replacements)"""
+    buffer = io.BytesIO()
+    replacements = fill_docx_file(source, buffer, values, engine)
+    return buffer.getvalue(), replacements
@@ -0,0 +1,148 @@
+"""
+Execution lanes for blocking work
+Async endpoints hand blocking calls to a lane so the event loop stays free:
+`io` (a thread pool for Supabase, SMTP/IMAP and file waits), `render` (threads
+that each drive one whole document generation) and `cpu` (a process pool for
+python-docx / XML work). Each lane has its own concurrency limit; async callers
+over the limit wait on a semaphore instead of piling into the executor queue.
+"""
+
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import threading
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutionLane:
+    """
+    An executor plus a concurrency limit.
+
+    `await lane.run(fn, ...)` is for coroutines; `lane.call(fn, ...)` is for code
+    already running on a worker thread (e.g. inside an io-lane job) and blocks
+    until the result is ready. Functions sent to a process lane must be
+    importable top-level functions with picklable arguments.
+    """
+
+    def __init__(self, name: str, limit: int, processes: bool = False, start_method: str = 'spawn'):
+        self.name = name
+        self.limit = max(1, limit)
+        self.processes = processes
+        self.start_method = start_method
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._semaphores: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]' = \
+            weakref.WeakKeyDictionary()
+        self._active = 0
+        self._waiting = 0
+        self._completed = 0
+        self._failed = 0
+
+    @property
+    def executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.processes:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.limit, mp_context=multiprocessing.get_context(self.start_method))
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.limit, thread_name_prefix=f'{self.name}-lane')
+                logger.info("Started %s lane: %s %s", self.name, self.limit, 'processes' if self.processes else 'threads')
+            return self._executor
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                # one per event loop: asyncio primitives can't be shared across loops
+                semaphore = self._semaphores[loop] = asyncio.Semaphore(self.limit)
+            return semaphore
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on this lane and await the result"""
+        self._count('_waiting', 1)
+        async with self._semaphore():
+            self._count('_waiting', -1)
+            self._count('_active', 1)
+            call = functools.partial(fn, *args, **kwargs)
+            executor = self.executor
+            try:
+                try:
+                    result = await asyncio.get_running_loop().run_in_executor(executor, call)
+                except BrokenProcessPool:
+                    self._replace_broken(executor)
+                    result = await asyncio.get_running_loop().run_in_executor(self.executor, call)
+            except BaseException:
+                self._count('_failed', 1)
+                raise
+            finally:
+                self._count('_active', -1)
+        self._count('_completed', 1)
+        return result
+
+    def call(self, fn: Callable, *args, **kwargs) -> Any:
+        """Blocking variant of run() for callers on a worker thread"""
+        self._count('_active', 1)
+        executor = self.executor
+        try:
+            try:
+                result = executor.submit(fn, *args, **kwargs).result()
+            except BrokenProcessPool:
+                self._replace_broken(executor)
+                result = self.executor.submit(fn, *args, **kwargs).result()
+        except BaseException:
+            self._count('_failed', 1)
+            raise
+        finally:
+            self._count('_active', -1)
+        self._count('_completed', 1)
+        return result
+
+    def _replace_broken(self, broken: Executor):
+        """
+        Drop a process pool that lost a worker (OOM kill, crash in lxml): it fails
+        every later submit, so the next caller gets a fresh one. The failed call
+        is retried once on the new pool.
+        """
+        with self._lock:
+            if self._executor is not broken:
+                return  # another caller already replaced it
+            self._executor = None
+        logger.warning("%s lane: a worker process died, starting a new pool", self.name)
+        broken.shutdown(wait=False)
+
+    def warm(self):
+        """Start the worker processes now rather than on the first request (no-op for thread lanes)"""
+        if self.processes:
+            for _ in range(self.limit):
+                self.executor.submit(os.getpid)
+
+    def _count(self, name: str, delta: int):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + delta)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'kind': 'process' if self.processes else 'thread',
+                'limit': self.limit,
+                'active': self._active,
+                'waiting': self._waiting,
+                'completed': self._completed,
+                'failed': self._failed,
+            }
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._semaphores.clear()
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -0,0 +1,98 @@
+"""
+Placeholder -> data field resolution
+Decides which mapping key fills a placeholder: an exact match on the normalized
+name, else a "smart partial" (substring) match, else generated data. Keys are
+indexed once - normalized names in a hash table, every substring of at least
+MIN_PARTIAL_LENGTH characters in a second one - so a lookup costs a few dict
+probes per placeholder instead of a scan over every key.
+"""
+
+from functools import lru_cache
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+EXACT = 'exact'
+PARTIAL = 'partial'
+GENERATED = 'generated'
+
+# A placeholder mentioning one of these may only partially match a key that mentions one
+# too, so "buyer_bank_name" can't land on a bare key like "buyer"
+CONFLICT_WORDS = ('bank', 'company', 'name', 'address')
+
+# Shortest substring a partial match may hinge on
+MIN_PARTIAL_LENGTH = 4
+
+
+class Resolution(NamedTuple):
+    """How one placeholder is filled"""
+    placeholder: str
+    key: Optional[str]      # mapping key supplying the value; None for generated data
+    kind: str               # EXACT, PARTIAL or GENERATED
+
+
+def normalize_key(name: str) -> str:
+    """Comparison form of placeholder and key names: lower case, no '_', ' ' or '-'"""
+    return name.lower().replace('_', '').replace(' ', '').replace('-', '')
+
+
+def has_conflict_word(normalized: str) -> bool:
+    return any(word in normalized for word in CONFLICT_WORDS)
+
+
+def substrings(text: str, min_length: int = MIN_PARTIAL_LENGTH) -> Iterable[str]:
+    for start in range(len(text) - min_length + 1):
+        for end in range(start + min_length, len(text) + 1):
+            yield text[start:end]
+
+
+class FieldIndex:
+    """
+    Resolver over an ordered set of mapping keys.
+
+    Matching follows key order: when several keys qualify, the one listed
+    first wins, exactly as a front-to-back scan would pick it. Resolutions
+    are memoized per placeholder.
+    """
+
+    def __init__(self, keys: Iterable[str], cache_size: int = 8192):
+        self.keys: Tuple[str, ...] = tuple(dict.fromkeys(keys))
+        # normalized name -> position of the first key with that name
+        self._exact: Dict[str, int] = {}
+        for order, key in enumerate(self.keys):
+            self._exact.setdefault(normalize_key(key), order)
+        # The same tables restricted to keys containing a conflict word
+        self._exact_guarded = {name: order for name, order in self._exact.items() if has_conflict_word(name)}
+        # substring -> position of the first key containing it
+        self._containing: Dict[str, int] = {}
+        self._containing_guarded: Dict[str, int] = {}
+        for name, order in self._exact.items():
+            guarded = has_conflict_word(name)
+            for part in substrings(name):
+                self._containing.setdefault(part, order)
+                if guarded:
+                    self._containing_guarded.setdefault(part, order)
+        self.resolve = lru_cache(maxsize=cache_size)(self._resolve)
+
+    def _resolve(self, placeholder: str) -> Resolution:
+        name = normalize_key(placeholder)
+        order = self._exact.get(name)
+        if order is not None:
+            return Resolution(placeholder, self.keys[order], EXACT)
+
+        if has_conflict_word(name):
+            exact, containing = self._exact_guarded, self._containing_guarded
+        else:
+            exact, containing = self._exact, self._containing
+        # a key containing the placeholder...
+        best = containing.get(name) if len(name) >= MIN_PARTIAL_LENGTH else None
+        # ...or a key contained in it, whichever comes first
+        for part in substrings(name):
+            order = exact.get(part)
+            if order is not None and (best is None or order < best):
+                best = order
+        if best is not None:
+            return Resolution(placeholder, self.keys[best], PARTIAL)
+        return Resolution(placeholder, None, GENERATED)
+
+    def resolve_all(self, placeholders: Iterable[str]) -> Tuple[Resolution, ...]:
+        return tuple(self.resolve(placeholder) for placeholder in placeholders)
+
@@ -0,0 +1,116 @@
+"""
+Chunked file responses with byte-range support
+Generated documents are sent from disk CHUNK_SIZE bytes at a time instead of
+being read into memory whole. A single `Range: bytes=...` request is answered
+with 206 and just that slice, so a retried download resumes where it broke off.
+An on_close callback runs once the response is finished or abandoned, which is
+where temporary files get deleted.
+"""
+
+import os
+from typing import Callable, Dict, Iterator, NamedTuple, Optional
+
+from starlette.responses import Response, StreamingResponse
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ByteRange(NamedTuple):
+    """Inclusive byte offsets of the requested slice"""
+    start: int
+    end: int
+
+
+class RangeNotSatisfiable(ValueError):
+    """The Range header asks only for bytes past the end of the file"""
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[ByteRange]:
+    """
+    The slice a Range header asks for, or None to send the whole file.
+    Multiple ranges and malformed headers get the whole file too, as RFC 9110 allows.
+    """
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    first, _, last = header[len('bytes='):].strip().partition('-')
+    try:
+        start = int(first) if first else None
+        end = int(last) if last else None
+    except ValueError:
+        return None
+    if start is None:
+        # "bytes=-N": the last N bytes
+        if not end or size == 0:
+            raise RangeNotSatisfiable(header)
+        return ByteRange(max(0, size - end), size - 1)
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    end = size - 1 if end is None else min(end, size - 1)
+    if end < start:
+        return None
+    return ByteRange(start, end)
+
+
+def iter_file(path: str, start: int = 0, length: Optional[int] = None,
+              chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = length
+        while remaining is None or remaining > 0:
+            chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+class FileStreamResponse(StreamingResponse):
+    """StreamingResponse over a file slice that calls on_close however the response ends"""
+
+    def __init__(self, path: str, start: int, length: int, on_close: Optional[Callable[[], None]] = None,
+                 **kwargs):
+        super().__init__(iter_file(path, start, length), **kwargs)
+        self.on_close = on_close
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            if self.on_close is not None:
+                self.on_close()
+
+
+def file_response(path: str, media_type: str, filename: Optional[str] = None,
+                  range_header: Optional[str] = None, if_range: Optional[str] = None,
+                  headers: Optional[Dict[str, str]] = None,
+                  on_close: Optional[Callable[[], None]] = None) -> Response:
+    """
+    Stream path as the response body, honouring a single byte range.
+    if_range is the client's If-Range header: when it doesn't repeat our ETag
+    the file may have changed, so the whole of it is sent.
+    """
+    size = os.path.getsize(path)
+    headers = dict(headers or {})
+    headers['Accept-Ranges'] = 'bytes'
+    if filename:
+        headers['Content-Disposition'] = f'attachment; filename={filename}'
+    if if_range is not None and if_range != headers.get('ETag'):
+        range_header = None
+
+    try:
+        byte_range = parse_range(range_header, size)
+    except RangeNotSatisfiable:
+        if on_close is not None:
+            on_close()
+        return Response(status_code=416, headers={**headers, 'Content-Range': f'bytes */{size}'})
+
+    status_code = 200
+    start, length = 0, size
+    if byte_range is not None:
+        status_code = 206
+        start, length = byte_range.start, byte_range.end - byte_range.start + 1
+        headers['Content-Range'] = f'bytes {byte_range.start}-{byte_range.end}/{size}'
+    headers['Content-Length'] = str(length)
+    return FileStreamResponse(path, start, length, on_close, status_code=status_code,
+                              headers=headers, media_type=media_type)
@@ -0,0 +1,190 @@
+"""
+Background job queue for document generation
+Jobs run on a bounded thread pool; each keeps its status, per-stage timings and
+result until the retention period runs out.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+
+class QueueFull(Exception):
+    """More jobs are waiting or running than the manager accepts"""
+
+
+class StageTimings(dict):
+    """Seconds spent per named stage, filled in by `with timings.stage('name'):` blocks"""
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self[name] = self.get(name, 0.0) + time.perf_counter() - start
+
+
+class Job:
+    """One submitted unit of work and everything known about it so far"""
+
+    def __init__(self, job_id: str, params: Dict[str, Any], submitted_at: float):
+        self.id = job_id
+        self.params = params
+        self.status = QUEUED
+        self.submitted_at = submitted_at
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.timings = StageTimings()
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.status_code: Optional[int] = None   # for failures: the HTTP status a synchronous call would have returned
+
+    @property
+    def done(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'params': self.params,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'queue_seconds': round(self.started_at - self.submitted_at, 4) if self.started_at else None,
+            'run_seconds': round(self.finished_at - self.started_at, 4) if self.finished_at and self.started_at else None,
+            'stages': {name: round(seconds, 4) for name, seconds in self.timings.items()},
+            'error': self.error,
+            'status_code': self.status_code,
+        }
+
+
+class JobManager:
+    """
+    Runs func(*args, timings=StageTimings, **kwargs) for each submitted job on
+    `workers` threads. At most max_pending jobs may be queued or running at once;
+    submit() raises QueueFull beyond that. Finished jobs are forgotten after
+    retention_seconds (or when more than max_retained are kept), and on_expire
+    is called with each one so its result can be cleaned up.
+    """
+
+    def __init__(self, workers: int = 4, max_pending: int = 100, retention_seconds: float = 3600.0,
+                 max_retained: int = 1000, on_expire: Optional[Callable[[Job], None]] = None,
+                 error_status: Optional[Callable[[Exception], tuple]] = None):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self.max_retained = max_retained
+        self.on_expire = on_expire
+        self.error_status = error_status or (lambda e: (500, str(e)))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._counters = {'submitted': 0, 'succeeded': 0, 'failed': 0, 'rejected': 0, 'expired': 0}
+        self._stage_totals: Dict[str, List[float]] = {}   # stage -> [count, total seconds, max seconds]
+
+    def submit(self, func: Callable, *args, params: Optional[Dict[str, Any]] = None, **kwargs) -> Job:
+        self._expire()
+        with self._lock:
+            if self._queued + self._running >= self.max_pending:
+                self._counters['rejected'] += 1
+                raise QueueFull(f"{self._queued + self._running} jobs pending (limit {self.max_pending})")
+            job = Job(uuid.uuid4().hex, params or {}, time.time())
+            self._jobs[job.id] = job
+            self._queued += 1
+            self._counters['submitted'] += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='job')
+            executor = self._executor
+        executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._expire()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def recent(self, limit: int = 50) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())[-limit:][::-1]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queue_depth': self._queued,
+                'running': self._running,
+                'max_pending': self.max_pending,
+                'retained': len(self._jobs),
+                **self._counters,
+                'stages': {
+                    name: {'count': int(count), 'avg_seconds': round(total / count, 4), 'max_seconds': round(peak, 4)}
+                    for name, (count, total, peak) in self._stage_totals.items()
+                },
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work on the current threads once queued jobs finish; a later submit() starts new ones"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _run(self, job: Job, func: Callable, args: tuple, kwargs: dict):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        job.started_at = time.time()
+        job.status = RUNNING
+        status = FAILED
+        try:
+            job.result = func(*args, timings=job.timings, **kwargs)
+            status = SUCCEEDED
+        except Exception as e:
+            job.status_code, job.error = self.error_status(e)
+            logger.warning("Job %s failed: %s", job.id, job.error)
+        finally:
+            job.finished_at = time.time()
+            job.status = status
+            with self._lock:
+                self._running -= 1
+                self._counters['succeeded' if job.status == SUCCEEDED else 'failed'] += 1
+                for name, seconds in job.timings.items():
+                    totals = self._stage_totals.setdefault(name, [0, 0.0, 0.0])
+                    totals[0] += 1
+                    totals[1] += seconds
+                    totals[2] = max(totals[2], seconds)
+
+    def _expire(self):
+        cutoff = time.time() - self.retention_seconds
+        expired = []
+        with self._lock:
+            finished = [job for job in self._jobs.values() if job.done]
+            overflow = len(self._jobs) - self.max_retained
+            for job in finished:
+                if job.finished_at < cutoff or overflow > 0:
+                    del self._jobs[job.id]
+                    expired.append(job)
+                    overflow -= 1
+            self._counters['expired'] += len(expired)
+        for job in expired:
+            if self.on_expire:
+                try:
+                    self.on_expire(job)
+                except Exception as e:
+                    logger.warning("Cleanup of job %s failed: %s", job.id, e)
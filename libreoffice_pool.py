@@ -0,0 +1,545 @@
+"""
+LibreOffice conversion worker pool
+A fixed set of long-lived headless LibreOffice workers converts DOCX to PDF from a
+bounded queue. Each worker drives one soffice process over a UNO socket when the
+`uno` bindings are importable; otherwise it runs `soffice --convert-to` against
+its own warm user profile, so workers never contend for one profile lock.
+A worker takes every job waiting in the queue (up to max_batch_size, and its
+share of the queue) into one conversion run, so soffice starts once per batch
+rather than once per document. Jobs have a timeout; workers that crash, time
+out, serve too many jobs or grow too large are restarted.
+"""
+
+import logging
+import os
+import queue
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import Future
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import uno
+    from com.sun.star.beans import PropertyValue
+    from com.sun.star.connection import NoConnectException
+    UNO_AVAILABLE = True
+except ImportError:
+    UNO_AVAILABLE = False
+
+# Checked in order; LIBREOFFICE_PATH (passed as `configured`) goes first
+LIBREOFFICE_CANDIDATES = (
+    '/usr/bin/libreoffice',
+    '/usr/local/bin/libreoffice',
+    '/opt/libreoffice/program/soffice',
+    'libreoffice',
+    'soffice',
+)
+
+_COMMON_ARGS = ['--headless', '--invisible', '--nologo', '--nodefault', '--norestore', '--nolockcheck']
+_UNO_START_TIMEOUT = 60.0
+
+
+class ConversionError(Exception):
+    """A document could not be converted"""
+
+
+class ConversionTimeout(ConversionError):
+    """A conversion ran longer than the job timeout; its worker was restarted"""
+
+
+class PoolSaturated(ConversionError):
+    """The conversion queue is full"""
+
+
+def find_libreoffice(configured: Optional[str] = None,
+                     candidates: Sequence[str] = LIBREOFFICE_CANDIDATES) -> Optional[str]:
+    """Path of the first usable LibreOffice executable, or None"""
+    for candidate in ([configured] if configured else []) + list(candidates):
+        path = candidate if os.path.isabs(candidate) else shutil.which(candidate)
+        if path and os.path.isfile(path) and os.access(path, os.X_OK):
+            return path
+    return None
+
+
+def _profile_url(directory: str) -> str:
+    return 'file://' + os.path.abspath(directory).replace(os.sep, '/')
+
+
+def _rss_mb(pid: int) -> Optional[float]:
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+def _stop_process(process: Optional[subprocess.Popen]):
+    if process is None or process.poll() is not None:
+        return
+    process.terminate()
+    try:
+        process.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+class _SubprocessWorker:
+    """One `soffice --convert-to` run per batch of jobs, each worker with its own user profile"""
+
+    def __init__(self, command: Sequence[str], work_dir: str):
+        self.command = list(command)
+        self.profile_dir = os.path.join(work_dir, 'profile')
+        self.input_dir = os.path.join(work_dir, 'in')
+        self.output_dir = os.path.join(work_dir, 'out')
+        self.process: Optional[subprocess.Popen] = None
+
+    def start(self):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        os.makedirs(self.input_dir, exist_ok=True)
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    # No process outlives a run, so there is nothing to health-check or measure:
+    # crashes surface as a failed run and RSS recycling (max_rss_mb) never fires
+    def alive(self) -> bool:
+        return True
+
+    def pid(self) -> Optional[int]:
+        return None
+
+    def _run(self, docx_paths: Sequence[str]) -> Tuple[int, str]:
+        cmd = self.command + _COMMON_ARGS + [
+            f'-env:UserInstallation={_profile_url(self.profile_dir)}',
+            '--convert-to', 'pdf', '--outdir', self.output_dir,
+        ] + [os.path.abspath(path) for path in docx_paths]
+        self.process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        try:
+            _, stderr = self.process.communicate()
+        finally:
+            returncode, self.process = self.process.returncode, None
+        return returncode, stderr.decode(errors='replace')[-500:]
+
+    def _produced(self, docx_path: str) -> str:
+        return os.path.join(self.output_dir, os.path.splitext(os.path.basename(docx_path))[0] + '.pdf')
+
+    def convert(self, docx_path: str, pdf_path: str):
+        returncode, stderr = self._run([docx_path])
+        produced = self._produced(docx_path)
+        if returncode != 0 or not os.path.exists(produced):
+            raise ConversionError(f"soffice exited with {returncode}: {stderr}")
+        shutil.move(produced, pdf_path)
+
+    def convert_many(self, jobs: Sequence[Tuple[str, str]]) -> List[Optional[Exception]]:
+        """
+        Convert several (docx_path, pdf_path) pairs in one soffice run.
+        Returns one entry per pair: None when its PDF was written, else the error.
+        """
+        # soffice names each output after its input, so stage the inputs under
+        # names that can't collide even when two documents share a file name
+        staged = []
+        for position, (docx_path, _) in enumerate(jobs):
+            link = os.path.join(self.input_dir, f'{position}-{os.path.basename(docx_path)}')
+            if os.path.lexists(link):
+                os.remove(link)
+            try:
+                os.symlink(os.path.abspath(docx_path), link)
+            except OSError:
+                shutil.copyfile(docx_path, link)
+            staged.append(link)
+
+        try:
+            returncode, stderr = self._run(staged)
+        finally:
+            for link in staged:
+                try:
+                    os.remove(link)
+                except OSError:
+                    pass
+
+        errors: List[Optional[Exception]] = []
+        for link, (docx_path, pdf_path) in zip(staged, jobs):
+            produced = self._produced(link)
+            if os.path.exists(produced):
+                shutil.move(produced, pdf_path)
+                errors.append(None)
+            else:
+                errors.append(ConversionError(f"soffice did not convert {os.path.basename(docx_path)} "
+                                              f"(exit {returncode}): {stderr}"))
+        return errors
+
+    def kill(self):
+        process = self.process
+        if process is not None and process.poll() is None:
+            process.kill()
+
+    def stop(self):
+        self.kill()
+
+
+class _UnoWorker:
+    """A long-lived soffice process listening on a local socket, driven over UNO"""
+
+    def __init__(self, command: Sequence[str], work_dir: str):
+        self.command = list(command)
+        self.profile_dir = os.path.join(work_dir, 'profile')
+        self.process: Optional[subprocess.Popen] = None
+        self.desktop = None
+
+    def start(self):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        connection = f'socket,host=127.0.0.1,port={port};urp;StarOffice.ComponentContext'
+        self.process = subprocess.Popen(
+            self.command + _COMMON_ARGS + [
+                f'-env:UserInstallation={_profile_url(self.profile_dir)}',
+                f'--accept={connection}',
+            ],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        local = uno.getComponentContext()
+        resolver = local.ServiceManager.createInstanceWithContext('com.sun.star.bridge.UnoUrlResolver', local)
+        deadline = time.monotonic() + _UNO_START_TIMEOUT
+        while True:
+            try:
+                context = resolver.resolve(f'uno:{connection}')
+                break
+            except NoConnectException:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    self.stop()
+                    raise ConversionError("soffice did not start accepting UNO connections")
+                time.sleep(0.25)
+        self.desktop = context.ServiceManager.createInstanceWithContext('com.sun.star.frame.Desktop', context)
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def pid(self) -> Optional[int]:
+        return self.process.pid if self.process else None
+
+    def convert(self, docx_path: str, pdf_path: str):
+        document = self.desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(os.path.abspath(docx_path)), '_blank', 0,
+            _properties(Hidden=True, ReadOnly=True),
+        )
+        if document is None:
+            raise ConversionError(f"LibreOffice could not open {docx_path}")
+        try:
+            partial_path = pdf_path + '.part'
+            document.storeToURL(uno.systemPathToFileUrl(os.path.abspath(partial_path)),
+                                _properties(FilterName='writer_pdf_Export'))
+        finally:
+            document.close(True)
+        os.replace(partial_path, pdf_path)
+
+    def convert_many(self, jobs: Sequence[Tuple[str, str]]) -> List[Optional[Exception]]:
+        """The running soffice already amortizes startup; convert one document after another"""
+        errors: List[Optional[Exception]] = []
+        for docx_path, pdf_path in jobs:
+            try:
+                self.convert(docx_path, pdf_path)
+                errors.append(None)
+            except Exception as e:
+                errors.append(e)
+        return errors
+
+    def kill(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.kill()
+
+    def stop(self):
+        if self.desktop is not None and self.alive():
+            try:
+                self.desktop.terminate()
+            except Exception:
+                pass
+        self.desktop = None
+        _stop_process(self.process)
+        self.process = None
+
+
+def _properties(**values):
+    properties = []
+    for name, value in values.items():
+        prop = PropertyValue()
+        prop.Name = name
+        prop.Value = value
+        properties.append(prop)
+    return tuple(properties)
+
+
+class _Job(NamedTuple):
+    docx_path: str
+    pdf_path: str
+    future: Future
+    timeout: float
+
+
+_STOP = object()
+
+
+class ConversionPool:
+    """
+    Bounded-queue DOCX -> PDF conversion on `workers` long-lived LibreOffice workers.
+
+    submit() raises PoolSaturated instead of queueing past queue_size; convert()
+    blocks until the PDF is written. Waiting jobs are converted together, up to
+    max_batch_size per run; a document that fails inside a shared run is retried
+    on its own, so one bad document never fails its neighbours. A worker is
+    restarted after a crash, a timeout, max_jobs_per_worker jobs, or (UNO mode)
+    when its RSS exceeds max_rss_mb.
+    """
+
+    def __init__(self, command: Sequence[str], workers: int = 2, queue_size: int = 32,
+                 job_timeout: float = 120.0, max_jobs_per_worker: int = 200,
+                 max_rss_mb: Optional[float] = None, work_dir: Optional[str] = None,
+                 use_uno: Optional[bool] = None, max_batch_size: int = 8, temp_root: Optional[str] = None):
+        self.command = list(command)
+        self.size = max(1, workers)
+        self.job_timeout = job_timeout
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.max_rss_mb = max_rss_mb
+        self.max_batch_size = max(1, max_batch_size)
+        self.use_uno = UNO_AVAILABLE if use_uno is None else use_uno
+        if self.use_uno and not UNO_AVAILABLE:
+            raise ConversionError("UNO mode requested but the uno module is not importable")
+        self.work_dir = work_dir
+        self.temp_root = temp_root     # parent of the work dir the pool creates when none is given
+        self._owns_work_dir = work_dir is None
+        # Entries are tuples of jobs meant to share a run; submit() queues one-job tuples
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._busy = 0
+        self._counters = {'completed': 0, 'failed': 0, 'timeouts': 0, 'restarts': 0, 'rejected': 0,
+                          'batches': 0, 'batched_documents': 0, 'retried': 0}
+
+    @property
+    def mode(self) -> str:
+        return 'uno' if self.use_uno else 'subprocess'
+
+    def start(self):
+        if self._threads:
+            return
+        if self.work_dir is None:
+            self.work_dir = tempfile.mkdtemp(prefix='libreoffice_pool_', dir=self.temp_root)
+        for index in range(self.size):
+            thread = threading.Thread(target=self._run_worker, args=(index,),
+                                      name=f'libreoffice-worker-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info("Started %s LibreOffice workers (%s mode)", self.size, self.mode)
+        if not self.use_uno:
+            logger.warning("LibreOffice subprocess mode: every conversion run starts soffice cold, and worker "
+                           "health checks%s need UNO mode (install python3-uno)",
+                           " and LIBREOFFICE_MAX_RSS_MB recycling" if self.max_rss_mb else "")
+
+    def stop(self, timeout: float = 30.0):
+        """Finish queued jobs, then stop every worker"""
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        if self._owns_work_dir and self.work_dir:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+            self.work_dir = None
+
+    def _enqueue(self, jobs: Tuple[_Job, ...]):
+        if not self._threads:
+            raise ConversionError("Conversion pool is not running")
+        try:
+            self._queue.put_nowait(jobs)
+        except queue.Full:
+            with self._lock:
+                self._counters['rejected'] += len(jobs)
+            raise PoolSaturated(f"Conversion queue is full ({self._queue.maxsize} jobs waiting)")
+
+    def submit(self, docx_path: str, pdf_path: str, timeout: Optional[float] = None) -> Future:
+        """Queue one conversion; the future resolves to pdf_path"""
+        job = _Job(docx_path, pdf_path, Future(), timeout or self.job_timeout)
+        self._enqueue((job,))
+        return job.future
+
+    def submit_many(self, paths: Sequence[Tuple[str, str]], timeout: Optional[float] = None) -> List[Future]:
+        """
+        Queue several (docx_path, pdf_path) conversions, split into at most one
+        run per worker. Futures come back in input order. Raises PoolSaturated,
+        with nothing left queued, when the queue can't take them all.
+        """
+        jobs = [_Job(docx_path, pdf_path, Future(), timeout or self.job_timeout) for docx_path, pdf_path in paths]
+        chunk = min(self.max_batch_size, max(1, -(-len(jobs) // self.size)))
+        queued: List[_Job] = []
+        try:
+            for start in range(0, len(jobs), chunk):
+                self._enqueue(tuple(jobs[start:start + chunk]))
+                queued.extend(jobs[start:start + chunk])
+        except ConversionError:
+            for job in queued:
+                job.future.cancel()
+            raise
+        return [job.future for job in jobs]
+
+    def convert(self, docx_path: str, pdf_path: str, timeout: Optional[float] = None) -> str:
+        """Convert and wait; raises ConversionError (or a subclass) on failure"""
+        return self.submit(docx_path, pdf_path, timeout).result()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'mode': self.mode,
+                'workers': self.size,
+                'busy': self._busy,
+                'queue_depth': self._queue.qsize(),
+                'queue_size': self._queue.maxsize,
+                'max_batch_size': self.max_batch_size,
+                **self._counters,
+            }
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _new_worker(self, index: int):
+        worker_cls = _UnoWorker if self.use_uno else _SubprocessWorker
+        return worker_cls(self.command, os.path.join(self.work_dir, f'worker-{index}'))
+
+    def _needs_restart(self, worker, jobs_served: int) -> bool:
+        if not worker.alive() or jobs_served >= self.max_jobs_per_worker:
+            return True
+        if self.max_rss_mb and worker.pid():
+            rss = _rss_mb(worker.pid())
+            if rss is not None and rss > self.max_rss_mb:
+                logger.info("Restarting LibreOffice worker at %.0f MB RSS", rss)
+                return True
+        return False
+
+    def _take_batch(self, entry: Tuple[_Job, ...]) -> Tuple[List[_Job], bool]:
+        """
+        The jobs of one queue entry plus whatever else is waiting, up to
+        max_batch_size and this worker's share of the queue, so idle workers
+        still get work. Returns (live jobs, whether a stop request was taken).
+        """
+        jobs = list(entry)
+        limit = min(self.max_batch_size, len(jobs) + -(-self._queue.qsize() // self.size))
+        stopping = False
+        while len(jobs) < limit:
+            try:
+                extra = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if extra is _STOP:
+                stopping = True
+                break
+            jobs.extend(extra)
+        return [job for job in jobs if job.future.set_running_or_notify_cancel()], stopping
+
+    def _run_worker(self, index: int):
+        worker = None
+        jobs_served = 0
+        stopping = False
+        try:
+            while not stopping:
+                entry = self._queue.get()
+                if entry is _STOP:
+                    break
+                jobs, stopping = self._take_batch(entry)
+                runs = [jobs] if len(jobs) > 1 else [[job] for job in jobs]
+                while runs:
+                    run = runs.pop(0)
+                    if worker is not None and self._needs_restart(worker, jobs_served):
+                        worker.stop()
+                        worker = None
+                        self._count('restarts')
+                    try:
+                        if worker is None:
+                            worker = self._new_worker(index)
+                            worker.start()
+                            jobs_served = 0
+                    except Exception as e:
+                        worker = None
+                        self._count('failed', len(run))
+                        for job in run:
+                            job.future.set_exception(ConversionError(f"LibreOffice worker failed to start: {e}"))
+                        continue
+
+                    if len(run) == 1:
+                        self._run_job(worker, run[0])
+                    else:
+                        # whatever failed in the shared run gets a run of its own
+                        retries = self._run_batch(worker, run)
+                        self._count('retried', len(retries))
+                        runs.extend([job] for job in retries)
+                    jobs_served += len(run)
+                    if not worker.alive():
+                        worker.stop()
+                        worker = None
+                        self._count('restarts')
+        finally:
+            if worker is not None:
+                worker.stop()
+
+    @contextmanager
+    def _supervised(self, worker, timeout: float):
+        """Kill the worker's conversion if it runs past timeout; yields the timed-out flag"""
+        timed_out = threading.Event()
+
+        def watchdog():
+            timed_out.set()
+            worker.kill()
+
+        timer = threading.Timer(timeout, watchdog)
+        with self._lock:
+            self._busy += 1
+        timer.start()
+        try:
+            yield timed_out
+        finally:
+            timer.cancel()
+            with self._lock:
+                self._busy -= 1
+
+    def _run_job(self, worker, job: _Job):
+        with self._supervised(worker, job.timeout) as timed_out:
+            try:
+                worker.convert(job.docx_path, job.pdf_path)
+                error = None
+            except Exception as e:
+                error = e
+        if error is None:
+            self._count('completed')
+            job.future.set_result(job.pdf_path)
+        elif timed_out.is_set():
+            self._count('timeouts')
+            job.future.set_exception(ConversionTimeout(f"Conversion of {os.path.basename(job.docx_path)} "
+                                                       f"exceeded {job.timeout:.0f}s"))
+        else:
+            self._count('failed')
+            job.future.set_exception(error if isinstance(error, ConversionError) else ConversionError(str(error)))
+
+    def _run_batch(self, worker, jobs: List[_Job]) -> List[_Job]:
+        """Convert jobs in one run; resolves the ones that succeeded and returns the rest"""
+        with self._supervised(worker, max(job.timeout for job in jobs)):
+            try:
+                errors = worker.convert_many([(job.docx_path, job.pdf_path) for job in jobs])
+            except Exception as e:
+                errors = [e] * len(jobs)
+        self._count('batches')
+        self._count('batched_documents', len(jobs))
+        failed = []
+        for job, error in zip(jobs, errors):
+            if error is None:
+                self._count('completed')
+                job.future.set_result(job.pdf_path)
+            else:
+                failed.append(job)
+        return failed
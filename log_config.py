@@ -0,0 +1,106 @@
+"""
+Logging setup for the API process
+Records are handed to a queue and written by a background thread, so a request
+never blocks on stdout or the PM2 log file, and messages are only formatted
+there, for records that pass the level check. LOG_FORMAT=json writes one JSON
+object per line, including any `extra` fields; sampled loggers keep one in N
+of their info and debug records.
+"""
+
+import atexit
+import copy
+import itertools
+import json
+import logging
+import logging.handlers
+import queue
+from typing import Iterable, Optional
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+# Attributes every LogRecord has; anything else on a record came in through `extra`
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'taskName'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message and the `extra` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS})
+        exc_text = record.exc_text or (self.formatException(record.exc_info) if record.exc_info else None)
+        if exc_text:
+            entry['exc_info'] = exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Lets one in `every` records at or below max_level through; more severe records always pass"""
+
+    def __init__(self, every: int, max_level: int = logging.INFO):
+        super().__init__()
+        self.every = max(1, every)
+        self.max_level = max_level
+        self._seen = itertools.count()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level:
+            return True
+        return next(self._seen) % self.every == 0
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves message formatting to the listener thread.
+    The stock prepare() formats in the caller, which is the cost we want off the
+    request path; log arguments must therefore not be mutated after the call.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    """QueueListener whose stop() may be called again, e.g. at exit after a manual stop"""
+
+    def stop(self):
+        if self._thread is not None:
+            super().stop()
+
+
+def configure_logging(level: str = 'INFO', fmt: str = 'text', sample_every: int = 1,
+                      sampled_loggers: Iterable[str] = (),
+                      handler: Optional[logging.Handler] = None) -> logging.handlers.QueueListener:
+    """
+    Route the root logger through a queue to `handler` (stderr by default).
+    Returns the started listener; it is stopped, flushing what is queued, at exit.
+    """
+    if handler is None:
+        handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    listener = _QueueListener(records, handler, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(DeferredQueueHandler(records))
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+
+    if sample_every > 1:
+        for name in sampled_loggers:
+            logging.getLogger(name).addFilter(SamplingFilter(sample_every))
+
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
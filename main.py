@@ -3,25 +3,54 @@ Simple Document Processing API
 Handles Word document processing with vessel data
 """
 
+import asyncio
+import json
+import re
 import os
 import uuid
 import tempfile
 import zipfile
 import shutil
 import logging
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+import time
+from datetime import datetime
+from typing import AsyncIterator, List, Dict, NamedTuple, Optional, Tuple, Union
 from fastapi import FastAPI, HTTPException, File, UploadFile, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from dotenv import load_dotenv
 from supabase import create_client, Client
-from docx import Document
-import re
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+from vessel_context import load_vessel_context, load_vessel_contexts
+from reference_cache import ReferenceCache, DEFAULT_TTLS
+from placeholders import clean_placeholder_name
+from docx_text import fill_docx_bytes
+from template_registry import CompiledTemplate, TemplateRegistry
+from template_catalog import TemplateCatalog
+from libreoffice_pool import ConversionError, ConversionPool, ConversionTimeout, PoolSaturated, find_libreoffice
+from jobs import FAILED, SUCCEEDED, JobManager, QueueFull, StageTimings
+from executors import ExecutionLane
+from synthetic_data import generate as generate_synthetic_value
+from field_resolver import GENERATED, Resolution
+from vessel_fields import FIELD_INDEX, FIELDS, VesselFields
+from resolution_plans import PlanCache, ResolutionPlan
+from zip_stream import ZipStream
+from log_config import configure_logging
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsRegistry
+from output_cache import OutputCache, output_key
+from file_streaming import file_response
+
+# Configure logging: queued, leveled; LOG_FORMAT=json for structured lines,
+# LOG_SAMPLE_EVERY=N keeps one in N per-document pipeline records
 logger = logging.getLogger(__name__)
+# Per-document detail (placeholders, mappings, stage outcomes), mostly at DEBUG
+pipeline_log = logging.getLogger(f"{__name__}.pipeline")
+log_listener = configure_logging(
+    os.getenv("LOG_LEVEL", "INFO"),
+    os.getenv("LOG_FORMAT", "text"),
+    sample_every=int(os.getenv("LOG_SAMPLE_EVERY", "1")),
+    sampled_loggers=(pipeline_log.name,),
+)
 
 # Initialize FastAPI app
 app = FastAPI(title="Document Processing API", version="1.0.0")
@@ -30,7 +59,7 @@ app = FastAPI(title="Document Processing API", version="1.0.0")
 try:
     load_dotenv()
 except Exception as e:
-    logger.warning(f"Could not load .env file: {e}")
+    logger.warning("Could not load .env file: %s", e)
 
 # CORS middleware - Must use specific origins when credentials=True
 ALLOWED_ORIGINS = [
@@ -68,7 +97,7 @@ else:
         supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
         logger.info("Successfully connected to Supabase")
     except Exception as e:
-        logger.error(f"Failed to connect to Supabase: {e}")
+        logger.error("Failed to connect to Supabase: %s", e)
         supabase = None
 
 # Create directories
@@ -77,23 +106,171 @@ TEMP_DIR = "./temp"
 os.makedirs(TEMPLATES_DIR, exist_ok=True)
 os.makedirs(TEMP_DIR, exist_ok=True)
 
+def default_scratch_dir() -> str:
+    """tmpfs when the host has one, so conversion hand-offs never touch the disk"""
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return os.path.join("/dev/shm", "document_processor")
+    return TEMP_DIR
+
+# Filled DOCX files waiting for LibreOffice and the PDFs it writes
+SCRATCH_DIR = os.getenv("SCRATCH_DIR") or default_scratch_dir()
+os.makedirs(SCRATCH_DIR, exist_ok=True)
+
+# Placeholder fill engine: "docx" (python-docx object tree) or "stream" (direct OOXML rewrite)
+FILL_ENGINES = ("docx", "stream")
+DEFAULT_FILL_ENGINE = os.getenv("DOCX_FILL_ENGINE", "docx")
+
+# Blocking work leaves the event loop: "io" threads for short network/file waits,
+# "render" threads for whole document generations (which wait on the cpu lane and
+# LibreOffice for up to LIBREOFFICE_JOB_TIMEOUT, so they must not starve the io lane),
+# "cpu" worker processes for docx filling (CPU_POOL_PROCESSES=0 keeps it in threads)
+io_lane = ExecutionLane("io", int(os.getenv("IO_POOL_SIZE", "32")))
+render_lane = ExecutionLane("render", int(os.getenv("RENDER_POOL_SIZE", "8")))
+cpu_lane = ExecutionLane(
+    "cpu",
+    int(os.getenv("CPU_POOL_SIZE", str(os.cpu_count() or 1))),
+    processes=os.getenv("CPU_POOL_PROCESSES", "1") != "0",
+    start_method=os.getenv("CPU_POOL_START_METHOD", "spawn"),
+)
+
+PDF_MEDIA_TYPE = "application/pdf"
+DOCX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+# Long-lived LibreOffice workers for PDF conversion, started on app startup
+# (None when no LibreOffice executable was found)
+conversion_pool: Optional[ConversionPool] = None
+
+# Compiled template models (placeholder index + content hash), parsed once per file version
+template_registry = TemplateRegistry(TEMPLATES_DIR)
+
+# Stable id, hash, size and placeholders per template, persisted; /templates answers from it
+template_catalog = TemplateCatalog(os.getenv("TEMPLATE_CATALOG_PATH", "./cache/template_catalog.json"),
+                                   template_registry)
+TEMPLATE_SCAN_INTERVAL = float(os.getenv("TEMPLATE_SCAN_INTERVAL", "30"))
+
+# Placeholder -> field decisions per template version, kept on disk across restarts
+resolution_plans = PlanCache(os.getenv("RESOLUTION_PLANS_DIR", "./cache/resolution_plans"), FIELD_INDEX)
+
+# Finished PDFs by (template content hash, filled values, output format), LRU-bounded on disk
+output_cache = OutputCache(
+    os.getenv("OUTPUT_CACHE_DIR", "./cache/outputs"),
+    max_bytes=int(float(os.getenv("OUTPUT_CACHE_MAX_MB", "512")) * 1024 * 1024),
+)
+
+# Cache for vessel/port/company/refinery rows (TTL per table, override with REFERENCE_CACHE_TTL_<TABLE>)
+reference_cache = ReferenceCache(
+    max_entries=int(os.getenv("REFERENCE_CACHE_MAX_ENTRIES", "5000")),
+    ttls={
+        table: float(os.getenv(f"REFERENCE_CACHE_TTL_{table.upper()}", ttl))
+        for table, ttl in DEFAULT_TTLS.items()
+    },
+)
+
+# Prometheus metrics (GET /metrics): per-template stage latency, output formats, fallbacks, caches
+metrics = MetricsRegistry()
+stage_seconds = metrics.histogram(
+    "document_stage_seconds", "Seconds spent in one generation stage", ("template", "stage"))
+generation_seconds = metrics.histogram(
+    "document_generation_seconds", "Seconds to produce one document, all stages", ("template",))
+documents_generated = metrics.counter(
+    "documents_generated_total", "Documents produced, by output format and whether the output cache served them",
+    ("template", "format", "source"))
+generation_failures = metrics.counter(
+    "document_generation_failures_total", "Generation requests that failed, by HTTP status", ("status",))
+conversion_failures = metrics.counter(
+    "pdf_conversion_failures_total", "PDF conversions that did not produce a PDF, by reason", ("reason",))
+
+
+def cache_lookups() -> Dict[Tuple[str, str], int]:
+    reference, outputs, plans = reference_cache.stats(), output_cache.stats(), resolution_plans.lookups()
+    return {
+        ("output", "hit"): outputs["hits"], ("output", "miss"): outputs["misses"],
+        ("reference", "hit"): reference["hits"], ("reference", "miss"): reference["misses"],
+        ("plan", "hit"): plans["hits"], ("plan", "miss"): plans["disk_loads"] + plans["compiles"],
+    }
+
+
+def libreoffice_conversions() -> Dict[Tuple[str], int]:
+    pool_stats = conversion_pool.stats() if conversion_pool else {}
+    return {(result,): pool_stats.get(result, 0) for result in ("completed", "failed", "timeouts", "rejected")}
+
+
+metrics.callback("cache_lookups_total", "Cache lookups by cache and result", "counter", cache_lookups,
+                 ("cache", "result"))
+metrics.callback("libreoffice_conversions_total", "LibreOffice pool conversions by result", "counter",
+                 libreoffice_conversions, ("result",))
+metrics.callback("libreoffice_queue_depth", "Conversions waiting for a LibreOffice worker", "gauge",
+                 lambda: {(): conversion_pool.stats()["queue_depth"] if conversion_pool else 0})
+metrics.callback("generation_jobs_queued", "Background generation jobs waiting or running", "gauge",
+                 lambda: {(): job_manager.stats()["queue_depth"] + job_manager.stats()["running"]})
+
+
+def observe_generation(template: str, timings: StageTimings, seconds: float):
+    for stage, stage_time in timings.items():
+        stage_seconds.observe(stage_time, template=template, stage=stage)
+    generation_seconds.observe(seconds, template=template)
+
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize the application on startup"""
     logger.info("🚀 Document Processing API starting up...")
-    logger.info(f"📁 Templates directory: {TEMPLATES_DIR}")
-    logger.info(f"📁 Temp directory: {TEMP_DIR}")
-    logger.info(f"🔗 Supabase URL: {SUPABASE_URL}")
+    logger.info("📁 Templates directory: %s", TEMPLATES_DIR)
+    logger.info("📁 Temp directory: %s", TEMP_DIR)
+    logger.info("🔗 Supabase URL: %s", SUPABASE_URL)
     
     # Check if templates directory has files
     template_files = [f for f in os.listdir(TEMPLATES_DIR) if f.endswith('.docx')]
-    logger.info(f"📄 Found {len(template_files)} template files")
+    logger.info("📄 Found %s template files", len(template_files))
+    
+    # Compile every template up front so the first requests don't pay for parsing
+    template_registry.list()
+    
+    # Catalogue new or changed templates, then keep watching the directory
+    template_catalog.refresh()
+    template_catalog.start(TEMPLATE_SCAN_INTERVAL)
+    
+    # Start the docx worker processes before the first request needs them
+    cpu_lane.warm()
+    
+    # Find LibreOffice once and start the conversion workers
+    global conversion_pool
+    libreoffice_path = find_libreoffice(os.getenv("LIBREOFFICE_PATH"))
+    if libreoffice_path:
+        max_rss_mb = os.getenv("LIBREOFFICE_MAX_RSS_MB")
+        conversion_pool = ConversionPool(
+            [libreoffice_path],
+            workers=int(os.getenv("LIBREOFFICE_WORKERS", str(min(4, os.cpu_count() or 1)))),
+            queue_size=int(os.getenv("LIBREOFFICE_QUEUE_SIZE", "32")),
+            job_timeout=float(os.getenv("LIBREOFFICE_JOB_TIMEOUT", "120")),
+            max_jobs_per_worker=int(os.getenv("LIBREOFFICE_MAX_JOBS_PER_WORKER", "200")),
+            max_rss_mb=float(max_rss_mb) if max_rss_mb else None,
+            max_batch_size=int(os.getenv("LIBREOFFICE_MAX_BATCH_SIZE", "8")),
+            temp_root=SCRATCH_DIR,
+        )
+        conversion_pool.start()
+        logger.info("📄 LibreOffice: %s (%s workers, %s mode)", libreoffice_path, conversion_pool.size, conversion_pool.mode)
+    else:
+        logger.warning("⚠️  LibreOffice not found - PDF conversion will fall back to docx2pdf / DOCX output")
     
     if supabase:
         logger.info("✅ Supabase connection established")
     else:
         logger.warning("⚠️ Supabase connection failed - using fallback data only")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers"""
+    global conversion_pool
+    if conversion_pool is not None:
+        conversion_pool.stop()
+        conversion_pool = None
+    template_catalog.stop()
+    job_manager.shutdown(wait=False)
+    io_lane.shutdown(wait=False)
+    render_lane.shutdown(wait=False)
+    cpu_lane.shutdown(wait=False)
+
 def get_vessel_data(imo: str) -> Optional[Dict]:
     """Get comprehensive vessel data from multiple Supabase tables"""
     try:
@@ -111,707 +288,141 @@ def get_vessel_data(imo: str) -> Optional[Dict]:
                 'gross_tonnage': '30000'
             }
         
-        vessel_data = {}
-        
-        # 1. Get vessel data from vessels table
-        response = supabase.table('vessels').select('*').eq('imo', imo).execute()
-        if response.data:
-            vessel_data.update(response.data[0])
-        else:
+        # Vessel plus ports, companies and refinery in one round trip
+        # (or one vessel query + parallel lookups when relations can't be embedded)
+        vessel_data = load_vessel_context(supabase, imo, cache=reference_cache)
+        if not vessel_data:
             return None
         
-        # 2. Get port data if vessel has port references
-        if vessel_data.get('loading_port_id'):
-            try:
-                port_response = supabase.table('ports').select('*').eq('id', vessel_data['loading_port_id']).execute()
-                if port_response.data:
-                    for key, value in port_response.data[0].items():
-                        vessel_data[f'loading_port_{key}'] = value
-            except Exception as e:
-                print(f"Error fetching loading port data: {e}")
-        
-        if vessel_data.get('destination_port_id'):
-            try:
-                port_response = supabase.table('ports').select('*').eq('id', vessel_data['destination_port_id']).execute()
-                if port_response.data:
-                    for key, value in port_response.data[0].items():
-                        vessel_data[f'destination_port_{key}'] = value
-            except Exception as e:
-                print(f"Error fetching destination port data: {e}")
-        
-        # 3. Get company data if vessel has company references
-        if vessel_data.get('owner_id'):
-            try:
-                company_response = supabase.table('companies').select('*').eq('id', vessel_data['owner_id']).execute()
-                if company_response.data:
-                    for key, value in company_response.data[0].items():
-                        vessel_data[f'owner_{key}'] = value
-            except Exception as e:
-                print(f"Error fetching owner company data: {e}")
-        
-        if vessel_data.get('operator_id'):
-            try:
-                company_response = supabase.table('companies').select('*').eq('id', vessel_data['operator_id']).execute()
-                if company_response.data:
-                    for key, value in company_response.data[0].items():
-                        vessel_data[f'operator_{key}'] = value
-            except Exception as e:
-                print(f"Error fetching operator company data: {e}")
-        
-        # 4. Get refinery data if available
-        if vessel_data.get('refinery_id'):
-            try:
-                refinery_response = supabase.table('refineries').select('*').eq('id', vessel_data['refinery_id']).execute()
-                if refinery_response.data:
-                    for key, value in refinery_response.data[0].items():
-                        vessel_data[f'refinery_{key}'] = value
-            except Exception as e:
-                print(f"Error fetching refinery data: {e}")
-        
-        print(f"DEBUG: Fetched comprehensive vessel data with {len(vessel_data)} fields")
+        pipeline_log.debug("Fetched vessel %s with %d fields", imo, len(vessel_data))
         return vessel_data
         
     except Exception as e:
-        print(f"Error fetching vessel data: {e}")
+        logger.error("Error fetching vessel data for %s: %s", imo, e)
         return None
 
-def find_placeholders(text: str) -> List[str]:
-    """Find placeholders in text using various patterns"""
-    # Only look for properly formatted placeholders
-    patterns = [
-        r'\{\{([^}]+)\}\}',  # {{placeholder}}
-        r'\{([^}]+)\}',      # {placeholder} (but not malformed ones)
-        r'\[([^\]]+)\]',     # [placeholder]
-        r'\[\[([^\]]+)\]\]', # [[placeholder]]
-        r'%([^%]+)%',        # %placeholder%
-        r'<([^>]+)>',        # <placeholder>
-        r'__([^_]+)__',      # __placeholder__
-        r'##([^#]+)##',      # ##placeholder##
-    ]
-    
-    placeholders = []
-    for pattern in patterns:
-        matches = re.findall(pattern, text)
-        placeholders.extend(matches)
-    
-    # Clean up placeholders (remove extra spaces, normalize, but be more permissive)
-    cleaned_placeholders = []
-    for placeholder in placeholders:
-        cleaned = placeholder.strip().replace(' ', '_')
-        # Only filter out obviously bad placeholders
-        if (cleaned and 
-            cleaned not in cleaned_placeholders and 
-            len(cleaned) < 200 and  # Increased limit
-            len(cleaned) > 0 and
-            not cleaned.startswith('{') and  # Don't start with {
-            not cleaned.endswith('{') and    # Don't end with {
-            not cleaned.startswith('}') and  # Don't start with }
-            not cleaned.endswith('}')):      # Don't end with }
-            cleaned_placeholders.append(cleaned)
-    
-    return cleaned_placeholders
+def get_vessels_data(imos: List[str]) -> Dict[str, Optional[Dict]]:
+    """Vessel data for many IMOs with one bulk query, {imo: vessel or None}"""
+    if not supabase:
+        return {imo: get_vessel_data(imo) for imo in imos}
+    try:
+        return load_vessel_contexts(supabase, imos, cache=reference_cache)
+    except Exception as e:
+        logger.error("Error fetching vessel data for %d vessels: %s", len(imos), e)
+        return {imo: None for imo in imos}
 
-def replace_placeholders_in_docx(docx_path: str, data: Dict[str, str]) -> str:
-    """Replace placeholders in a Word document"""
+def fill_placeholders(docx_path: str, data: Dict[str, str], engine: Optional[str] = None) -> bytes:
+    """The Word document with its placeholders replaced, in memory (engine: "docx" or "stream", default DOCX_FILL_ENGINE)"""
+    engine = engine or DEFAULT_FILL_ENGINE
+    if engine not in FILL_ENGINES:
+        raise ValueError(f"Unknown fill engine: {engine}")
     try:
-        print(f"DEBUG: Starting replacement with {len(data)} mappings")
-        for key, value in data.items():
-            print(f"DEBUG: Will replace {key} -> {value}")
-        
-        # Load the document
-        doc = Document(docx_path)
-        
-        replacements_made = 0
-        
-        # Replace in paragraphs
-        for paragraph in doc.paragraphs:
-            for placeholder, value in data.items():
-                # Try different placeholder formats
-                formats = [
-                    f"{{{{{placeholder}}}}}",  # {{placeholder}}
-                    f"{{{placeholder}}}",       # {placeholder}
-                    f"[{placeholder}]",         # [placeholder]
-                    f"[[{placeholder}]]",       # [[placeholder]]
-                    f"%{placeholder}%",         # %placeholder%
-                    f"<{placeholder}>",         # <placeholder>
-                    f"__{placeholder}__",       # __placeholder__
-                    f"##{placeholder}##",       # ##placeholder##
-                ]
-                
-                for fmt in formats:
-                    if fmt in paragraph.text:
-                        paragraph.text = paragraph.text.replace(fmt, str(value))
-                        replacements_made += 1
-                        print(f"DEBUG: Replaced '{fmt}' with '{value}' in paragraph")
+        pipeline_log.debug("Filling %s with %d values (%s engine)", docx_path, len(data), engine)
         
-        # Replace in tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        for placeholder, value in data.items():
-                            formats = [
-                                f"{{{{{placeholder}}}}}",  # {{placeholder}}
-                                f"{{{placeholder}}}",       # {placeholder}
-                                f"[{placeholder}]",         # [placeholder]
-                                f"[[{placeholder}]]",       # [[placeholder]]
-                                f"%{placeholder}%",         # %placeholder%
-                                f"<{placeholder}>",         # <placeholder>
-                                f"__{placeholder}__",       # __placeholder__
-                                f"##{placeholder}##",       # ##placeholder##
-                            ]
-                            
-                            for fmt in formats:
-                                if fmt in paragraph.text:
-                                    paragraph.text = paragraph.text.replace(fmt, str(value))
-                                    replacements_made += 1
-                                    print(f"DEBUG: Replaced '{fmt}' with '{value}' in table cell")
+        # One regex pass per paragraph (body, tables, text boxes, headers, footers),
+        # looking each hit up by its cleaned name; only the affected runs change
+        values = {clean_placeholder_name(key): str(value) for key, value in data.items()}
         
-        print(f"DEBUG: Total replacements made: {replacements_made}")
+        # Parsing and rewriting the XML is CPU-bound: run it on the cpu lane
+        content, replacements_made = cpu_lane.call(fill_docx_bytes, docx_path, values, engine)
         
-        # Save the modified document
-        output_path = os.path.join(TEMP_DIR, f"processed_{uuid.uuid4().hex}.docx")
-        doc.save(output_path)
-        return output_path
+        pipeline_log.debug("Made %d replacements in %s", replacements_made, docx_path)
+        return content
         
     except Exception as e:
-        print(f"Error processing document: {e}")
+        logger.exception("Error filling %s", docx_path)
         raise HTTPException(status_code=500, detail=f"Document processing failed: {str(e)}")
 
+def record_libreoffice_error(error: ConversionError):
+    conversion_failures.inc(reason="timeout" if isinstance(error, ConversionTimeout) else "libreoffice_error")
+    logger.warning("LibreOffice error, falling back to docx2pdf: %s", error)
+
+def convert_with_docx2pdf(docx_path: str, pdf_path: str) -> Optional[str]:
+    """Last-resort conversion; None when docx2pdf isn't usable here"""
+    try:
+        from docx2pdf import convert
+        convert(docx_path, pdf_path)
+        return pdf_path
+    except Exception as e:
+        conversion_failures.inc(reason="docx2pdf_failed")
+        pipeline_log.info("docx2pdf fallback failed: %s", e)
+        return None
+
 def convert_docx_to_pdf(docx_path: str) -> str:
-    """Convert DOCX to PDF using LibreOffice headless mode"""
+    """Convert DOCX to PDF on the LibreOffice worker pool (falls back to docx2pdf, then the DOCX itself)"""
+    pdf_path = os.path.join(SCRATCH_DIR, f"output_{uuid.uuid4().hex}.pdf")
+    
+    if conversion_pool is not None:
+        try:
+            return conversion_pool.convert(docx_path, pdf_path)
+        except PoolSaturated as e:
+            # Don't pile more work onto a saturated host: hand back the DOCX straight away
+            conversion_failures.inc(reason="saturated")
+            logger.warning("PDF conversion skipped: %s", e)
+            return docx_path
+        except ConversionError as e:
+            record_libreoffice_error(e)
+    else:
+        pipeline_log.debug("LibreOffice not found, trying docx2pdf fallback")
+    
+    # Final fallback: return the DOCX file
+    return convert_with_docx2pdf(docx_path, pdf_path) or docx_path
+
+def write_scratch_docx(content: bytes) -> str:
+    docx_path = os.path.join(SCRATCH_DIR, f"processed_{uuid.uuid4().hex}.docx")
+    with open(docx_path, 'wb') as f:
+        f.write(content)
+    return docx_path
+
+def remove_scratch(paths: List[str]):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # Ignore cleanup errors
+
+def convert_docx_content_to_pdf(content: bytes) -> Optional[str]:
+    """PDF of an in-memory DOCX, handed to the converter through SCRATCH_DIR; None if conversion failed"""
+    docx_path = write_scratch_docx(content)
     try:
-        import subprocess
-        
-        pdf_path = os.path.join(TEMP_DIR, f"output_{uuid.uuid4().hex}.pdf")
-        
-        # Try different LibreOffice paths
-        libreoffice_paths = [
-            '/usr/bin/libreoffice',
-            '/usr/local/bin/libreoffice',
-            '/opt/libreoffice/program/soffice',
-            'libreoffice'  # fallback to PATH
-        ]
-        
-        libreoffice_found = None
-        for path in libreoffice_paths:
-            try:
-                # Test if LibreOffice is available
-                result = subprocess.run([path, '--version'], 
-                                      capture_output=True, text=True, timeout=10)
-                if result.returncode == 0:
-                    print(f"Found LibreOffice at: {path}")
-                    libreoffice_found = path
-                    break
-            except:
-                continue
-        
-        if not libreoffice_found:
-            print("LibreOffice not found, trying docx2pdf fallback...")
-            # Fallback to docx2pdf
-            try:
-                from docx2pdf import convert
-                convert(docx_path, pdf_path)
-                return pdf_path
-            except Exception as e:
-                print(f"docx2pdf fallback failed: {e}")
-                # Final fallback: return the DOCX file
-                return docx_path
-        
-        # Convert using LibreOffice
-        cmd = [
-            libreoffice_found,
-            '--headless',
-            '--convert-to', 'pdf',
-            '--outdir', os.path.dirname(pdf_path),
-            docx_path
-        ]
-        
-        print(f"Running command: {' '.join(cmd)}")
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+        pdf_path = convert_docx_to_pdf(docx_path)
+    finally:
+        remove_scratch([docx_path])
+    return pdf_path if pdf_path.endswith('.pdf') else None
+
+def convert_docx_contents_to_pdf(contents: List[bytes]) -> List[Optional[str]]:
+    """
+    PDFs of several in-memory DOCX files, submitted to the pool together so
+    they share soffice runs; None for each document that couldn't be converted.
+    """
+    if conversion_pool is None or len(contents) == 1:
+        return [convert_docx_content_to_pdf(content) for content in contents]
+    
+    docx_paths = [write_scratch_docx(content) for content in contents]
+    pdf_paths = [os.path.join(SCRATCH_DIR, f"output_{uuid.uuid4().hex}.pdf") for _ in contents]
+    try:
+        try:
+            futures = conversion_pool.submit_many(list(zip(docx_paths, pdf_paths)))
+        except PoolSaturated as e:
+            conversion_failures.inc(len(contents), reason="saturated")
+            logger.warning("PDF conversion skipped for %d documents: %s", len(contents), e)
+            return [None] * len(contents)
         
-        if result.returncode == 0:
-            print("PDF conversion successful")
-            # LibreOffice creates PDF with same name as DOCX
-            expected_pdf = os.path.join(os.path.dirname(pdf_path), 
-                                      os.path.splitext(os.path.basename(docx_path))[0] + '.pdf')
-            if os.path.exists(expected_pdf):
-                # Rename to our expected name
-                os.rename(expected_pdf, pdf_path)
-            return pdf_path
-        else:
-            print(f"LibreOffice error: {result.stderr}")
-            # Fallback to docx2pdf
-            print("Falling back to docx2pdf...")
+        results = []
+        for docx_path, pdf_path, future in zip(docx_paths, pdf_paths, futures):
             try:
-                from docx2pdf import convert
-                convert(docx_path, pdf_path)
-                return pdf_path
-            except Exception as e:
-                print(f"docx2pdf fallback failed: {e}")
-                # Final fallback: return the DOCX file
-                return docx_path
-            
-    except Exception as e:
-        print(f"PDF conversion failed: {e}")
-        # Final fallback: return the DOCX file
-        return docx_path
+                results.append(future.result())
+            except ConversionError as e:
+                record_libreoffice_error(e)
+                results.append(convert_with_docx2pdf(docx_path, pdf_path))
+        return results
+    finally:
+        remove_scratch(docx_paths)
 
 
 def generate_realistic_random_data(placeholder: str, vessel_imo: str = None) -> str:
     """Generate highly realistic, varied random data for oil trading documents with real professional data"""
-    import random
-    import hashlib
-    
-    # Create unique seed for each entity type to ensure different data for different people/companies
-    if vessel_imo:
-        # Create different seeds for different entity types
-        entity_type = placeholder.lower().replace('_', '').replace(' ', '')
-        if 'buyer' in entity_type:
-            seed_input = f"{vessel_imo}_buyer"
-        elif 'seller' in entity_type:
-            seed_input = f"{vessel_imo}_seller"
-        elif 'bank' in entity_type or 'financial' in entity_type:
-            seed_input = f"{vessel_imo}_bank"
-        elif 'principal' in entity_type:
-            seed_input = f"{vessel_imo}_principal"
-        elif 'logistics' in entity_type:
-            seed_input = f"{vessel_imo}_logistics"
-        elif 'authorized' in entity_type or 'signatory' in entity_type:
-            seed_input = f"{vessel_imo}_signatory"
-        else:
-            seed_input = f"{vessel_imo}_{entity_type}"
-        
-        random.seed(int(hashlib.md5(seed_input.encode()).hexdigest()[:8], 16))
-    
-    # REALISTIC BUYERS - ENHANCED WITH REAL EMAILS AND PHONES
-    real_buyers = [
-        {"name": "Shell International Trading and Shipping Company Ltd", "email": "trading@shell.com", "phone": "+44 20 7934 1234", "address": "1 Shell Centre, London SE1 7NA, UK"},
-        {"name": "BP International Ltd", "email": "operations@bp.com", "phone": "+44 20 7623 4567", "address": "1 St James's Square, London SW1Y 4PD, UK"},
-        {"name": "TotalEnergies Trading SA", "email": "commercial@totalenergies.com", "phone": "+33 1 40 14 45 46", "address": "2 Place Jean Millier, 92078 Paris La Défense, France"},
-        {"name": "Vitol Group", "email": "info@vitol.com", "phone": "+44 20 7283 7890", "address": "10 Upper Bank Street, London E14 5JJ, UK"},
-        {"name": "Trafigura Group Pte Ltd", "email": "info@trafigura.com", "phone": "+65 6221 1234", "address": "1 HarbourFront Avenue, #18-01 Keppel Bay Tower, Singapore 098632"},
-        {"name": "Glencore Energy UK Ltd", "email": "trading@glencore.com", "phone": "+44 20 7747 1000", "address": "20 Fenchurch Street, London EC3M 3BY, UK"},
-        {"name": "Mercuria Energy Trading SA", "email": "contact@mercuria.com", "phone": "+41 22 319 90 00", "address": "Route de Florissant 13, 1206 Geneva, Switzerland"},
-        {"name": "ExxonMobil Global Trading Company", "email": "trading@exxonmobil.com", "phone": "+1 713 546 1234", "address": "600 Travis Street, Suite 1900, Houston, TX 77002, USA"},
-        {"name": "Chevron Global Energy Inc", "email": "energy@chevron.com", "phone": "+1 713 546 5678", "address": "1000 Main Street, Houston, TX 77002, USA"},
-        {"name": "Gunvor Group Ltd", "email": "trading@gunvor.com", "phone": "+41 22 319 90 00", "address": "Route de Florissant 13, 1206 Geneva, Switzerland"},
-        {"name": "Koch Supply & Trading LP", "email": "trading@kochind.com", "phone": "+1 713 546 9012", "address": "1500 Louisiana Street, Houston, TX 77002, USA"},
-        {"name": "Castleton Commodities International LLC", "email": "info@castletoncommodities.com", "phone": "+1 212 270 6000", "address": "383 Madison Avenue, New York, NY 10017, USA"},
-        {"name": "Freepoint Commodities LLC", "email": "trading@freepoint.com", "phone": "+1 212 270 6000", "address": "383 Madison Avenue, New York, NY 10017, USA"},
-        {"name": "Hartree Partners LP", "email": "info@hartreepartners.com", "phone": "+1 212 270 6000", "address": "383 Madison Avenue, New York, NY 10017, USA"},
-        {"name": "BB Energy Trading Ltd", "email": "trading@bbenergy.com", "phone": "+44 20 7000 7000", "address": "1 Canada Square, Canary Wharf, London E14 5AB, UK"},
-        {"name": "ConocoPhillips Global Trading", "email": "trading@conocophillips.com", "phone": "+1 713 546 3456", "address": "1100 Louisiana Street, Houston, TX 77002, USA"},
-        {"name": "Eni Trading & Shipping SpA", "email": "trading@eni.com", "phone": "+39 06 59821", "address": "Piazzale Enrico Mattei 1, 00144 Rome, Italy"},
-        {"name": "Repsol Trading SA", "email": "trading@repsol.com", "phone": "+34 91 348 81 00", "address": "Calle Méndez Álvaro 44, 28045 Madrid, Spain"},
-        {"name": "Equinor ASA Trading", "email": "trading@equinor.com", "phone": "+47 51 99 00 00", "address": "Forusbeen 50, 4035 Stavanger, Norway"},
-        {"name": "PetroChina International Company Ltd", "email": "trading@petrochina.com.cn", "phone": "+86 10 5998 6000", "address": "9 Dongzhimen North Street, Dongcheng District, Beijing 100007, China"}
-    ]
-    
-    # REALISTIC SELLERS - ENHANCED WITH REAL EMAILS AND PHONES
-    real_sellers = [
-        {"name": "Saudi Aramco Trading Company", "email": "marketing@aramco.com", "phone": "+966 11 402 9000", "address": "King Fahd Road, Riyadh 11564, Saudi Arabia"},
-        {"name": "ADNOC Global Trading", "email": "trading@adnoc.ae", "phone": "+971 2 707 0000", "address": "Sheikh Zayed Road, Abu Dhabi, UAE"},
-        {"name": "Qatar Energy Trading LLC", "email": "export@qatarenergy.qa", "phone": "+974 4407 0000", "address": "QNB Tower, West Bay, Doha, Qatar"},
-        {"name": "Kuwait Petroleum Corporation", "email": "export@kpc.com.kw", "phone": "+965 1 888 888", "address": "Abdullah Al-Mubarak Street, Kuwait City, Kuwait"},
-        {"name": "Sonatrach Trading Ltd", "email": "export@sonatrach.dz", "phone": "+213 21 54 11 11", "address": "80 Avenue Ahmed Ghermoul, Algiers, Algeria"},
-        {"name": "Gazprom Marketing & Trading Ltd", "email": "trading@gazprom.com", "phone": "+7 495 719 30 00", "address": "Nametkina Street 16, 117420 Moscow, Russia"},
-        {"name": "Petrobras Global Trading BV", "email": "trading@petrobras.com", "phone": "+55 21 3224 1000", "address": "Avenida República do Chile 65, Rio de Janeiro, RJ 20031-170, Brazil"},
-        {"name": "Pemex Trading International Inc", "email": "trading@pemex.com", "phone": "+52 55 1944 2500", "address": "Marina Nacional 329, Col. Huasteca, Miguel Hidalgo, 11311 Mexico City, Mexico"},
-        {"name": "Nigerian National Petroleum Corporation", "email": "trading@nnpcgroup.com", "phone": "+234 9 234 0000", "address": "NNPC Towers, Herbert Macaulay Way, Central Business District, Abuja, Nigeria"},
-        {"name": "Petronas Trading Corporation Sdn Bhd", "email": "trading@petronas.com.my", "phone": "+60 3 2051 5000", "address": "Tower 1, Petronas Twin Towers, Kuala Lumpur City Centre, 50088 Kuala Lumpur, Malaysia"},
-        {"name": "Rosneft Trading SA", "email": "trading@rosneft.com", "phone": "+7 495 777 44 22", "address": "Sofiyskaya Embankment 26/1, 115035 Moscow, Russia"},
-        {"name": "Lukoil Trading & Supply", "email": "trading@lukoil.com", "phone": "+7 495 627 44 44", "address": "Sretensky Boulevard 11, 101000 Moscow, Russia"},
-        {"name": "Tatneft Trading", "email": "trading@tatneft.ru", "phone": "+7 8553 37 11 11", "address": "75 Lenin Street, 423450 Almetyevsk, Tatarstan, Russia"},
-        {"name": "Surgutneftegas Trading", "email": "trading@surgutneftegas.ru", "phone": "+7 3462 42 00 00", "address": "Lenin Avenue 1, 628415 Surgut, Russia"},
-        {"name": "Bashneft Trading", "email": "trading@bashneft.ru", "phone": "+7 347 279 00 00", "address": "Karl Marx Street 30, 450077 Ufa, Russia"},
-        {"name": "NOVATEK Trading", "email": "trading@novatek.ru", "phone": "+7 495 730 60 00", "address": "2 Udaltsova Street, 119415 Moscow, Russia"},
-        {"name": "Irkutsk Oil Company", "email": "trading@irkutskoil.com", "phone": "+7 3952 25 00 00", "address": "Lenin Street 1, 664003 Irkutsk, Russia"},
-        {"name": "Zarubezhneft Trading", "email": "trading@zarubezhneft.ru", "phone": "+7 495 232 00 00", "address": "Bolshaya Ordynka Street 24/26, 119017 Moscow, Russia"},
-        {"name": "Russneft Trading", "email": "trading@russneft.ru", "phone": "+7 495 232 00 00", "address": "Bolshaya Ordynka Street 24/26, 119017 Moscow, Russia"},
-        {"name": "TNK-BP Trading", "email": "trading@tnk-bp.com", "phone": "+7 495 363 11 11", "address": "Arbat Street 1, 119019 Moscow, Russia"}
-    ]
-    
-    # REAL BANK NAMES WITH COMPLETE DETAILS
-    banks = {
-        'international': [
-            {'name': 'JPMorgan Chase Bank NA', 'swift': 'CHASUS33', 'address': '383 Madison Avenue, New York, NY 10017, USA', 'phone': '+1 212 270 6000'},
-            {'name': 'HSBC Bank plc', 'swift': 'HBUKGB4B', 'address': '1 Centenary Square, Birmingham B1 1HQ, UK', 'phone': '+44 20 7991 8888'},
-            {'name': 'Standard Chartered Bank', 'swift': 'SCBLUS33', 'address': '1095 Avenue of the Americas, New York, NY 10036, USA', 'phone': '+1 212 667 7000'},
-            {'name': 'Deutsche Bank AG', 'swift': 'DEUTDEFF', 'address': 'Taunusanlage 12, 60325 Frankfurt am Main, Germany', 'phone': '+49 69 910 00'},
-            {'name': 'BNP Paribas SA', 'swift': 'BNPAFRPP', 'address': '16 Boulevard des Italiens, 75009 Paris, France', 'phone': '+33 1 40 14 45 46'},
-            {'name': 'Societe Generale SA', 'swift': 'SOGEFRPP', 'address': '29 Boulevard Haussmann, 75009 Paris, France', 'phone': '+33 1 42 14 20 00'},
-            {'name': 'Credit Suisse AG', 'swift': 'CRESCHZZ', 'address': 'Paradeplatz 8, 8001 Zurich, Switzerland', 'phone': '+41 44 333 11 11'},
-            {'name': 'UBS AG', 'swift': 'UBSWCHZH', 'address': 'Bahnhofstrasse 45, 8001 Zurich, Switzerland', 'phone': '+41 44 234 11 11'},
-            {'name': 'Barclays Bank plc', 'swift': 'BARCGB22', 'address': '1 Churchill Place, London E14 5HP, UK', 'phone': '+44 20 7116 1000'},
-            {'name': 'Citibank NA', 'swift': 'CITIUS33', 'address': '388 Greenwich Street, New York, NY 10013, USA', 'phone': '+1 212 559 1000'}
-        ],
-        'energy_specialists': [
-            {'name': 'ING Bank NV', 'swift': 'INGBNL2A', 'address': 'Bijlmerplein 888, 1102 MG Amsterdam, Netherlands', 'phone': '+31 20 563 9111'},
-            {'name': 'ABN AMRO Bank NV', 'swift': 'ABNANL2A', 'address': 'Gustav Mahlerlaan 10, 1082 PP Amsterdam, Netherlands', 'phone': '+31 20 343 3433'},
-            {'name': 'Natixis SA', 'swift': 'NATXFRPP', 'address': '30 Avenue Pierre Mendes France, 75013 Paris, France', 'phone': '+33 1 58 19 40 00'},
-            {'name': 'Credit Agricole CIB', 'swift': 'AGRIFRPP', 'address': '12 Place des Etats-Unis, 92127 Montrouge, France', 'phone': '+33 1 41 89 20 00'},
-            {'name': 'Mizuho Bank Ltd', 'swift': 'MHCBJPJT', 'address': '1-5-5 Otemachi, Chiyoda-ku, Tokyo 100-8176, Japan', 'phone': '+81 3 5224 1111'},
-            {'name': 'Sumitomo Mitsui Banking Corporation', 'swift': 'SMBCJPJT', 'address': '1-1-2 Marunouchi, Chiyoda-ku, Tokyo 100-0005, Japan', 'phone': '+81 3 3287 0111'},
-            {'name': 'Bank of China Ltd', 'swift': 'BKCHCNBJ', 'address': '1 Fuxingmen Nei Dajie, Xicheng District, Beijing 100818, China', 'phone': '+86 10 6659 6688'},
-            {'name': 'Industrial and Commercial Bank of China', 'swift': 'ICBKCNBJ', 'address': '55 Fuxingmen Nei Street, Xicheng District, Beijing 100032, China', 'phone': '+86 10 6610 6114'},
-            {'name': 'Wells Fargo Bank NA', 'swift': 'WFBIUS6S', 'address': '420 Montgomery Street, San Francisco, CA 94104, USA', 'phone': '+1 415 396 0123'},
-            {'name': 'Bank of America NA', 'swift': 'BOFAUS3N', 'address': '100 North Tryon Street, Charlotte, NC 28255, USA', 'phone': '+1 704 386 5681'}
-        ],
-        'regional': [
-            {'name': 'First Abu Dhabi Bank PJSC', 'swift': 'NBADAEAA', 'address': 'Sheikh Zayed Road, Abu Dhabi, UAE', 'phone': '+971 2 681 0000'},
-            {'name': 'Emirates NBD Bank PJSC', 'swift': 'EBILAEAD', 'address': 'Baniyas Road, Deira, Dubai, UAE', 'phone': '+971 4 609 2222'},
-            {'name': 'National Bank of Kuwait SAK', 'swift': 'NBOKKWKW', 'address': 'Abdullah Al-Mubarak Street, Kuwait City, Kuwait', 'phone': '+965 1 888 888'},
-            {'name': 'Qatar National Bank SAQ', 'swift': 'QNBAQAQA', 'address': 'QNB Tower, West Bay, Doha, Qatar', 'phone': '+974 4407 0000'},
-            {'name': 'Saudi National Bank', 'swift': 'NCBKSAJE', 'address': 'King Fahd Road, Riyadh 11564, Saudi Arabia', 'phone': '+966 11 402 9000'},
-            {'name': 'Banco do Brasil SA', 'swift': 'BRASBRRJ', 'address': 'Setor Bancario Sul, Quadra 1, Brasilia, DF 70073-900, Brazil', 'phone': '+55 61 3214 2000'},
-            {'name': 'Banco Santander SA', 'swift': 'BSCHESMM', 'address': 'Paseo de Pereda 9-12, 39004 Santander, Spain', 'phone': '+34 942 20 61 00'},
-            {'name': 'UniCredit Bank AG', 'swift': 'UNCRITMM', 'address': 'Piazza Gae Aulenti 3, 20154 Milan, Italy', 'phone': '+39 02 8862 1'},
-            {'name': 'Intesa Sanpaolo SpA', 'swift': 'BCITITMM', 'address': 'Piazza San Carlo 156, 10121 Turin, Italy', 'phone': '+39 011 555 1'},
-            {'name': 'Nordea Bank Abp', 'swift': 'NDEAFIHH', 'address': 'Satamaradankatu 5, 00020 Helsinki, Finland', 'phone': '+358 9 1651'}
-        ]
-    }
-    
-    # REAL OIL TYPES & SPECIFICATIONS
-    oil_types = {
-        'crude_oils': [
-            'Brent Crude Oil (API 38.3°, Sulfur 0.37%)',
-            'WTI Crude Oil (API 39.6°, Sulfur 0.24%)',
-            'Arabian Light Crude (API 33.4°, Sulfur 1.77%)',
-            'Urals Crude Oil (API 31.8°, Sulfur 1.35%)',
-            'Bonny Light Crude (API 35.1°, Sulfur 0.14%)',
-            'Forties Crude Oil (API 40.3°, Sulfur 0.56%)',
-            'Oman Crude Oil (API 34.0°, Sulfur 0.94%)',
-            'Dubai Crude Oil (API 31.0°, Sulfur 2.04%)',
-            'Basrah Light Crude (API 33.7°, Sulfur 2.85%)',
-            'Maya Crude Oil (API 22.2°, Sulfur 3.30%)'
-        ],
-        'refined_products': [
-            'Gasoline 95 RON (Euro 5)',
-            'Diesel EN590 (Ultra Low Sulfur)',
-            'Jet Fuel A-1 (ASTM D1655)',
-            'Heavy Fuel Oil 380 CST',
-            'Marine Gas Oil (MGO)',
-            'Naphtha Light Straight Run',
-            'Kerosene JP-54',
-            'Bunker Fuel Oil 180 CST',
-            'LPG Propane/Butane Mix',
-            'Bitumen 60/70 Penetration'
-        ]
-    }
-    
-    # REAL PORTS & TERMINALS
-    ports = {
-        'loading_ports': [
-            'Rotterdam Europoort (Netherlands)',
-            'Singapore Jurong Island (Singapore)',
-            'Houston Ship Channel (USA)',
-            'Ras Tanura Terminal (Saudi Arabia)',
-            'Fujairah Port (UAE)',
-            'Antwerp Port (Belgium)',
-            'Hamburg Port (Germany)',
-            'Los Angeles Port (USA)',
-            'Shanghai Yangshan Port (China)',
-            'Yokohama Port (Japan)'
-        ],
-        'discharge_ports': [
-            'Rotterdam Europoort (Netherlands)',
-            'Singapore Jurong Island (Singapore)',
-            'New York Harbor (USA)',
-            'Genoa Port (Italy)',
-            'Barcelona Port (Spain)',
-            'Marseille Port (France)',
-            'Southampton Port (UK)',
-            'Hamburg Port (Germany)',
-            'Amsterdam Port (Netherlands)',
-            'Le Havre Port (France)'
-        ]
-    }
-    
-    # REAL VESSEL NAMES & SPECIFICATIONS
-    vessel_data = {
-        'names': [
-            'MT Atlantic Pioneer', 'MT Pacific Navigator', 'MT Ocean Explorer',
-            'MT Maritime Star', 'MT Sea Voyager', 'MT Global Trader',
-            'MT Energy Carrier', 'MT Oil Express', 'MT Crude Master',
-            'MT Petroleum Queen', 'MT Liquid Gold', 'MT Black Diamond',
-            'MT Energy Phoenix', 'MT Ocean Breeze', 'MT Trade Wind',
-            'MT Commercial Spirit', 'MT Industrial Pride', 'MT Global Energy',
-            'MT Maritime Legend', 'MT Ocean Warrior'
-        ],
-        'types': [
-            'VLCC (Very Large Crude Carrier)',
-            'Suezmax Tanker',
-            'Aframax Tanker',
-            'Panamax Tanker',
-            'Handymax Tanker',
-            'Product Tanker',
-            'Chemical Tanker',
-            'LNG Carrier',
-            'LPG Carrier',
-            'Bulk Carrier'
-        ],
-        'flags': [
-            'Panama', 'Liberia', 'Marshall Islands', 'Singapore', 'Malta',
-            'Cyprus', 'Bahamas', 'Bermuda', 'Isle of Man', 'Gibraltar'
-        ]
-    }
-    
-    # REAL PROFESSIONAL EMAIL DOMAINS
-    professional_domains = [
-        'shell.com', 'exxonmobil.com', 'bp.com', 'chevron.com', 'totalenergies.com',
-        'vitol.com', 'trafigura.com', 'glencore.com', 'mercuria.com', 'gunvor.com',
-        'aramco.com', 'gazprom.com', 'petrobras.com', 'pemex.com', 'adnoc.ae',
-        'kpc.com.kw', 'qatarpetroleum.qa', 'sonatrach.dz', 'nnpcgroup.com', 'petronas.com.my',
-        'jpmorgan.com', 'hsbc.com', 'standardchartered.com', 'deutsche-bank.com', 'bnpparibas.com',
-        'societegenerale.com', 'credit-suisse.com', 'ubs.com', 'barclays.com', 'citi.com'
-    ]
-    
-    # REAL ADDRESSES BY MAJOR OIL TRADING CITIES
-    real_addresses = {
-        'london': [
-            '1 Shell Centre, London SE1 7NA, UK',
-            '25 North Colonnade, Canary Wharf, London E14 5HS, UK',
-            '10 Upper Bank Street, London E14 5JJ, UK',
-            '20 Fenchurch Street, London EC3M 3BY, UK',
-            '1 Canada Square, Canary Wharf, London E14 5AB, UK'
-        ],
-        'singapore': [
-            '1 HarbourFront Avenue, #18-01 Keppel Bay Tower, Singapore 098632',
-            '8 Marina Boulevard, #05-01 Marina Bay Financial Centre, Singapore 018981',
-            '1 Raffles Place, #44-01 One Raffles Place, Singapore 048616',
-            '6 Battery Road, #01-01, Singapore 049909',
-            '9 Raffles Place, #50-01 Republic Plaza, Singapore 048619'
-        ],
-        'houston': [
-            '600 Travis Street, Suite 1900, Houston, TX 77002, USA',
-            '1000 Main Street, Houston, TX 77002, USA',
-            '1500 Louisiana Street, Houston, TX 77002, USA',
-            '1100 Louisiana Street, Houston, TX 77002, USA',
-            '1200 Smith Street, Houston, TX 77002, USA'
-        ],
-        'rotterdam': [
-            'Wilhelminakade 123, 3072 AP Rotterdam, Netherlands',
-            'Boompjes 40, 3011 XB Rotterdam, Netherlands',
-            'Coolsingel 40, 3011 AD Rotterdam, Netherlands',
-            'Weena 700, 3013 DA Rotterdam, Netherlands',
-            'Kruisplein 1, 3012 CC Rotterdam, Netherlands'
-        ],
-        'dubai': [
-            'Sheikh Zayed Road, Emirates Towers, Dubai, UAE',
-            'Dubai International Financial Centre, Dubai, UAE',
-            'Burj Khalifa, Downtown Dubai, UAE',
-            'Dubai Marina, Dubai, UAE',
-            'Jumeirah Lake Towers, Dubai, UAE'
-        ]
-    }
-    
-    # REAL PHONE NUMBERS BY REGION
-    real_phone_numbers = {
-        'london': ['+44 20 7934 1234', '+44 20 7623 4567', '+44 20 7283 7890', '+44 20 7747 1000', '+44 20 7000 7000'],
-        'singapore': ['+65 6221 1234', '+65 6222 5678', '+65 6223 9012', '+65 6224 3456', '+65 6225 7890'],
-        'houston': ['+1 713 546 1234', '+1 713 546 5678', '+1 713 546 9012', '+1 713 546 3456', '+1 713 546 7890'],
-        'rotterdam': ['+31 10 400 1234', '+31 10 400 5678', '+31 10 400 9012', '+31 10 400 3456', '+31 10 400 7890'],
-        'dubai': ['+971 4 123 4567', '+971 4 123 5678', '+971 4 123 6789', '+971 4 123 7890', '+971 4 123 8901']
-    }
-    
-    # REAL PERSON NAMES BY REGION
-    names = {
-        'western': [
-            'James Richardson', 'Michael Thompson', 'David Anderson', 'Robert Wilson',
-            'Christopher Brown', 'Daniel Davis', 'Matthew Miller', 'Anthony Garcia',
-            'Mark Martinez', 'Donald Rodriguez', 'Steven Lewis', 'Paul Lee',
-            'Andrew Walker', 'Joshua Hall', 'Kenneth Allen', 'Kevin Young',
-            'Brian King', 'George Wright', 'Edward Lopez', 'Ronald Hill'
-        ],
-        'middle_eastern': [
-            'Ahmed Al-Rashid', 'Mohammed Al-Zahra', 'Omar Al-Mansouri', 'Hassan Al-Kuwaiti',
-            'Yusuf Al-Dubai', 'Khalid Al-Riyadh', 'Tariq Al-Qatar', 'Nasser Al-Bahrain',
-            'Faisal Al-Oman', 'Saeed Al-Abu Dhabi', 'Rashid Al-Sharjah', 'Majid Al-Ajman',
-            'Sultan Al-Fujairah', 'Hamdan Al-Ras Al Khaimah', 'Zayed Al-Umm Al Quwain',
-            'Mansour Al-Doha', 'Abdullah Al-Kuwait', 'Ibrahim Al-Manama', 'Yousef Al-Muscat'
-        ],
-        'asian': [
-            'Li Wei', 'Zhang Ming', 'Wang Lei', 'Chen Hao', 'Liu Jian',
-            'Yang Xin', 'Huang Wei', 'Zhou Min', 'Wu Gang', 'Xu Feng',
-            'Yuki Tanaka', 'Hiroshi Sato', 'Takeshi Yamamoto', 'Kenji Nakamura',
-            'Raj Patel', 'Amit Kumar', 'Vikram Singh', 'Arjun Sharma', 'Ravi Gupta',
-            'Suresh Mehta', 'Park Min-ho', 'Kim Jong-hyun', 'Lee Sang-woo', 'Choi Hyun-jin'
-        ]
-    }
-    
-    # REAL TRADING TERMS & CONTRACTS
-    trading_terms = {
-        'incoterms': ['FOB (Free On Board)', 'CIF (Cost, Insurance & Freight)', 'CFR (Cost & Freight)',
-                     'EXW (Ex Works)', 'DDP (Delivered Duty Paid)', 'FAS (Free Alongside Ship)',
-                     'CPT (Carriage Paid To)', 'CIP (Carriage & Insurance Paid To)'],
-        'payment_terms': ['LC at Sight', 'LC 30 Days', 'LC 60 Days', 'LC 90 Days',
-                         'TT in Advance', 'TT on Delivery', 'Open Account 30 Days',
-                         'Open Account 60 Days', 'Cash Against Documents', 'Documentary Collection'],
-        'quality_standards': ['API 38.3°', 'Sulfur 0.37%', 'ASTM D4052', 'ASTM D4294',
-                             'ISO 8217', 'EN 590', 'ASTM D1655', 'ASTM D975']
-    }
-    
-    # Generate consistent data based on placeholder type
-    placeholder_lower = placeholder.lower().replace('_', '').replace(' ', '')
-    
-    # Bank names - ensure different banks for different entities with complete details (PRIORITY)
-    if any(word in placeholder_lower for word in ['bank', 'financial', 'credit']):
-        if 'buyer' in placeholder_lower:
-            # Buyer banks - international and energy specialists
-            bank_data = random.choice(banks['international'] + banks['energy_specialists'])
-        elif 'seller' in placeholder_lower:
-            # Seller banks - regional and energy specialists
-            bank_data = random.choice(banks['regional'] + banks['energy_specialists'])
-        else:
-            # Default bank selection
-            bank_data = random.choice(banks['international'] + banks['energy_specialists'])
-        
-        # Return appropriate bank detail based on placeholder
-        if 'swift' in placeholder_lower:
-            return bank_data['swift']
-        elif 'address' in placeholder_lower:
-            return bank_data['address']
-        elif 'phone' in placeholder_lower or 'tel' in placeholder_lower:
-            return bank_data['phone']
-        else:
-            return bank_data['name']
-    
-    # Company/Buyer/Seller names - use simplified realistic data (AFTER bank logic)
-    elif any(word in placeholder_lower for word in ['company', 'buyer', 'seller', 'principal']):
-        if 'buyer' in placeholder_lower:
-            buyer = random.choice(real_buyers)
-            if 'email' in placeholder_lower:
-                return buyer["email"]
-            elif 'phone' in placeholder_lower or 'tel' in placeholder_lower or 'mobile' in placeholder_lower:
-                return buyer["phone"]
-            elif 'address' in placeholder_lower:
-                return buyer["address"]
-            else:
-                return buyer["name"]
-        elif 'seller' in placeholder_lower:
-            seller = random.choice(real_sellers)
-            if 'email' in placeholder_lower:
-                return seller["email"]
-            elif 'phone' in placeholder_lower or 'tel' in placeholder_lower or 'mobile' in placeholder_lower:
-                return seller["phone"]
-            elif 'address' in placeholder_lower:
-                return seller["address"]
-            else:
-                return seller["name"]
-        elif 'principal' in placeholder_lower:
-            buyer = random.choice(real_buyers)
-            return buyer["name"]
-        else:
-            # Default to buyer
-            buyer = random.choice(real_buyers)
-            return buyer["name"]
-    
-    # Oil types and products
-    elif any(word in placeholder_lower for word in ['oil', 'product', 'cargo', 'commodity']):
-        if 'crude' in placeholder_lower:
-            return random.choice(oil_types['crude_oils'])
-        else:
-            return random.choice(oil_types['refined_products'])
-    
-    # Ports
-    elif any(word in placeholder_lower for word in ['port', 'terminal', 'loading', 'discharge']):
-        if 'loading' in placeholder_lower:
-            return random.choice(ports['loading_ports'])
-        elif 'discharge' in placeholder_lower:
-            return random.choice(ports['discharge_ports'])
-        else:
-            return random.choice(ports['loading_ports'] + ports['discharge_ports'])
-    
-    # Vessel data
-    elif any(word in placeholder_lower for word in ['vessel', 'ship', 'tanker']):
-        if 'name' in placeholder_lower:
-            return random.choice(vessel_data['names'])
-        elif 'type' in placeholder_lower:
-            return random.choice(vessel_data['types'])
-        elif 'flag' in placeholder_lower:
-            return random.choice(vessel_data['flags'])
-    
-    # Email addresses - handled above in buyer/seller logic
-    elif any(word in placeholder_lower for word in ['email', 'mail', 'e-mail', 'e_mail', 'contact']):
-        # Default email if not buyer/seller specific
-        buyer = random.choice(real_buyers)
-        return buyer["email"]
-    
-    # Addresses - handled above in buyer/seller logic  
-    elif any(word in placeholder_lower for word in ['address', 'location', 'street']):
-        # Default address if not buyer/seller specific
-        buyer = random.choice(real_buyers)
-        return buyer["address"]
-    
-    # Phone numbers - handled above in buyer/seller logic
-    elif any(word in placeholder_lower for word in ['phone', 'tel', 'mobile', 'contact']):
-        # Default phone if not buyer/seller specific
-        buyer = random.choice(real_buyers)
-        return buyer["phone"]
-    
-    # Person names - handled above in buyer/seller logic
-    elif any(word in placeholder_lower for word in ['name', 'person', 'signatory', 'authorized']):
-        # Default name if not buyer/seller specific
-        buyer = random.choice(real_buyers)
-        return buyer["name"]
-    
-    # Trading terms
-    elif any(word in placeholder_lower for word in ['incoterm', 'payment', 'terms']):
-        if 'payment' in placeholder_lower:
-            return random.choice(trading_terms['payment_terms'])
-        elif 'incoterm' in placeholder_lower:
-            return random.choice(trading_terms['incoterms'])
-        else:
-            return random.choice(trading_terms['incoterms'] + trading_terms['payment_terms'])
-    
-    # Quality specifications
-    elif any(word in placeholder_lower for word in ['quality', 'spec', 'standard', 'api', 'sulfur']):
-        return random.choice(trading_terms['quality_standards'])
-    
-    # Numeric data with realistic ranges
-    elif any(word in placeholder_lower for word in ['price', 'value', 'amount', 'cost']):
-        if 'price' in placeholder_lower and 'oil' in placeholder_lower:
-            return f"${random.uniform(45.50, 95.75):.2f}/bbl"
-        elif 'value' in placeholder_lower or 'amount' in placeholder_lower:
-            return f"${random.randint(5000000, 50000000):,}"
-        else:
-            return f"${random.randint(100000, 5000000):,}"
-    
-    elif any(word in placeholder_lower for word in ['quantity', 'volume', 'capacity', 'tonnage']):
-        if 'quantity' in placeholder_lower:
-            return f"{random.randint(50000, 300000):,} MT"
-        elif 'capacity' in placeholder_lower:
-            return f"{random.randint(80000, 320000):,} DWT"
-        else:
-            return f"{random.randint(10000, 100000):,}"
-    
-    # Dates - all dates 2 weeks before today
-    elif any(word in placeholder_lower for word in ['date', 'time', 'eta', 'etd']):
-        from datetime import timedelta
-        date_result = (datetime.now() - timedelta(days=14)).strftime('%Y-%m-%d')
-        print(f"DEBUG: Processing date placeholder: {placeholder} -> {date_result}")
-        return date_result
-    
-    # Reference numbers
-    elif any(word in placeholder_lower for word in ['ref', 'number', 'id', 'code']):
-        prefixes = ['REF', 'PO', 'SO', 'INV', 'LC', 'BL', 'COA', 'SGS']
-        prefix = random.choice(prefixes)
-        number = random.randint(100000, 999999)
-        return f"{prefix}-{number}"
-    
-    # Default fallback - handle special cases
-    else:
-        # Check if it's an email-related placeholder that didn't match above
-        if any(word in placeholder_lower for word in ['email', 'mail', 'e-mail', 'e_mail', 'contact']):
-            buyer = random.choice(real_buyers)
-            return buyer["email"]
-        # Check if it's a date-related placeholder that didn't match above
-        elif 'date' in placeholder_lower or 'time' in placeholder_lower:
-            from datetime import timedelta
-            return (datetime.now() - timedelta(days=14)).strftime('%Y-%m-%d')
-        else:
-            return f"Sample {placeholder.replace('_', ' ').title()}"
+    return generate_synthetic_value(placeholder, vessel_imo)
 
 # Keep the old function name for backward compatibility
 def generate_random_data(placeholder: str) -> str:
@@ -835,549 +446,683 @@ async def health_check():
         "templates": template_files,
         "temp_dir_exists": os.path.exists(TEMP_DIR),
         "templates_dir_exists": os.path.exists(TEMPLATES_DIR),
+        "pdf_conversion": conversion_pool.stats() if conversion_pool else None,
+        "output_cache": output_cache.stats(),
+        "template_catalog": template_catalog.stats(),
+        "executors": {"io": io_lane.stats(), "render": render_lane.stats(), "cpu": cpu_lane.stats()},
         "timestamp": datetime.now().isoformat(),
         "version": "1.0.0"
     }
 
+# Rendered /templates body for the current catalog snapshot: (etag, JSON bytes)
+templates_listing_cache: Optional[Tuple[str, bytes]] = None
+
+def templates_listing() -> Tuple[str, bytes]:
+    global templates_listing_cache
+    snapshot = template_catalog.snapshot()
+    cached = templates_listing_cache
+    if cached is None or cached[0] != snapshot.etag:
+        templates = [
+            {
+                "id": entry.id,
+                "name": entry.file_name.replace('.docx', ''),
+                "description": f"Template: {entry.file_name}",
+                "file_name": entry.file_name,
+                "file_size": entry.size,
+                "content_hash": entry.content_hash,
+                "placeholders": list(entry.placeholders),
+                "is_active": True,
+                "created_at": entry.created_at,
+                "updated_at": entry.updated_at,
+            }
+            for entry in snapshot.entries
+        ]
+        body = json.dumps({"success": True, "templates": templates, "count": len(templates)}).encode()
+        cached = templates_listing_cache = (snapshot.etag, body)
+    return cached
+
 @app.get("/templates")
-async def get_templates():
-    """Get list of available templates"""
+async def get_templates(request: Request):
+    """Get list of available templates (from the template catalog; honours If-None-Match)"""
     try:
-        templates = []
-        for filename in os.listdir(TEMPLATES_DIR):
-            if filename.lower().endswith('.docx'):
-                file_path = os.path.join(TEMPLATES_DIR, filename)
-                file_size = os.path.getsize(file_path)
-                
-                # Extract placeholders
-                doc = Document(file_path)
-                full_text = ""
-                for paragraph in doc.paragraphs:
-                    full_text += paragraph.text + "\n"
-                
-                placeholders = find_placeholders(full_text)
-                
-                template = {
-                    "id": str(uuid.uuid4()),
-                    "name": filename.replace('.docx', ''),
-                    "description": f"Template: {filename}",
-                    "file_name": filename,
-                    "file_size": file_size,
-                    "placeholders": placeholders,
-                    "is_active": True,
-                    "created_at": datetime.now().isoformat()
-                }
-                templates.append(template)
-        
-        return {"success": True, "templates": templates, "count": len(templates)}
+        if template_catalog.scans == 0:
+            await io_lane.run(template_catalog.refresh)
+        etag, body = templates_listing()
+        headers = {"ETag": f'"{etag}"'}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch templates: {str(e)}")
 
+@app.post("/templates/refresh")
+async def refresh_templates():
+    """Rescan the templates directory now instead of waiting for the next scan"""
+    changes = await io_lane.run(template_catalog.refresh)
+    return {"success": True, "changes": changes, "catalog": template_catalog.stats()}
+
+def list_vessels(limit: int = 50) -> List[Dict]:
+    response = supabase.table('vessels').select('id, name, imo, vessel_type, flag').limit(limit).execute()
+    return response.data
+
 @app.get("/vessels")
 async def get_vessels():
     """Get list of vessels"""
     try:
-        response = supabase.table('vessels').select('id, name, imo, vessel_type, flag').limit(50).execute()
-        return {"success": True, "vessels": response.data, "count": len(response.data)}
+        vessels = await io_lane.run(list_vessels)
+        return {"success": True, "vessels": vessels, "count": len(vessels)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch vessels: {str(e)}")
 
 @app.get("/vessel/{imo}")
 async def get_vessel(imo: str):
     """Get vessel by IMO"""
-    vessel = get_vessel_data(imo)
+    vessel = await io_lane.run(get_vessel_data, imo)
     if not vessel:
         raise HTTPException(status_code=404, detail=f"Vessel with IMO {imo} not found")
     return {"success": True, "vessel": vessel}
 
-@app.post("/process-document")
-async def process_document(request: Request):
-    """Process a document template with vessel data"""
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Reference data cache statistics"""
+    return {"success": True, "cache": reference_cache.stats()}
+
+@app.post("/cache/invalidate")
+async def invalidate_cache(request: Request):
+    """Invalidate one cached row ({"table", "key"}), a whole table ({"table"}) or everything ({})"""
     try:
-        # Parse JSON request
         body = await request.json()
-        template_name = body.get('template_name')
-        vessel_imo = body.get('vessel_imo')
-        
-        if not template_name or not vessel_imo:
-            raise HTTPException(status_code=422, detail="template_name and vessel_imo are required")
-        
-        print(f"Processing document: {template_name}")
-        print(f"Vessel IMO: {vessel_imo}")
-        
-        # Find template file - try with .docx extension if not found
-        template_path = os.path.join(TEMPLATES_DIR, template_name)
+    except Exception:
+        body = {}
+    table = body.get('table')
+    key = body.get('key')
+    
+    if not table:
+        if key is not None:
+            raise HTTPException(status_code=422, detail="key requires a table")
+        removed = reference_cache.clear()
+    elif table not in reference_cache.ttls:
+        raise HTTPException(status_code=400, detail=f"Unknown cache table: {table}")
+    else:
+        removed = reference_cache.invalidate(table, key)
+    
+    return {"success": True, "table": table, "key": key, "removed": removed}
+
+@app.get("/plans/stats")
+async def get_plan_stats():
+    """Resolution plan cache statistics"""
+    return {"success": True, "plans": await io_lane.run(resolution_plans.stats)}
+
+@app.post("/plans/invalidate")
+async def invalidate_plans(request: Request):
+    """Drop the resolution plans of one template ({"template"}) or all of them ({})"""
+    try:
+        body = await request.json()
+    except Exception:
+        body = {}
+    template = body.get('template')
+    removed = await io_lane.run(resolution_plans.invalidate, template)
+    return {"success": True, "template": template, "removed": removed}
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus scrape endpoint (rendered inline: in-memory counters only, so scrapes work on a saturated host)"""
+    return Response(content=metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/outputs/stats")
+async def get_output_stats():
+    """Generated document cache statistics, including the hit ratio"""
+    return {"success": True, "outputs": output_cache.stats()}
+
+@app.post("/outputs/clear")
+async def clear_outputs():
+    """Drop every cached generated document"""
+    removed = await io_lane.run(output_cache.clear)
+    return {"success": True, "removed": removed}
+
+def build_data_mapping(vessel: Dict, placeholders: List[str], vessel_imo: str,
+                       resolutions: Optional[Tuple[Resolution, ...]] = None) -> Dict[str, str]:
+    """
+    Value for every template placeholder: vessel fields where they match, realistic random data otherwise.
+    Pass a template's resolution plan as `resolutions` to skip matching the placeholders again.
+    """
+    data_mapping = {}
+    
+    # Only the fields the template's placeholders resolve to are ever computed
+    fields = VesselFields(vessel, vessel_imo)
+    
+    # Exact, then smart partial match against the field names; realistic random data otherwise
+    if resolutions is None:
+        resolutions = FIELD_INDEX.resolve_all(placeholders)
+    for resolution in resolutions:
+        placeholder = resolution.placeholder
+        value = fields.get(resolution.key)
+        data_mapping[placeholder] = value if value else generate_realistic_random_data(placeholder, vessel_imo)
+    
+    if pipeline_log.isEnabledFor(logging.DEBUG):
+        for resolution in resolutions:
+            source = 'realistic random data' if resolution.kind == GENERATED else \
+                f"{resolution.kind} match with {resolution.key}"
+            pipeline_log.debug("  %s -> %s (%s)", resolution.placeholder, data_mapping[resolution.placeholder], source)
+    pipeline_log.debug("Mapped %d placeholders, computed %d of %d fields",
+                       len(data_mapping), fields.evaluated, len(FIELDS))
+    
+    return data_mapping
+
+
+class GeneratedDocument(NamedTuple):
+    """A finished document, ready to be sent: a file on disk, or `content` in memory (path None)"""
+    path: Optional[str]
+    media_type: str
+    filename: str
+    etag: Optional[str] = None      # output cache key; None for DOCX fallbacks, which aren't cached
+    content: Optional[bytes] = None
+
+
+def find_template_path(template_name: str) -> str:
+    """Template file for a name, with or without the .docx extension"""
+    template_path = os.path.join(TEMPLATES_DIR, template_name)
+    if not os.path.exists(template_path):
+        # Try with .docx extension
+        template_path = os.path.join(TEMPLATES_DIR, f"{template_name}.docx")
         if not os.path.exists(template_path):
-            # Try with .docx extension
-            template_path = os.path.join(TEMPLATES_DIR, f"{template_name}.docx")
-            if not os.path.exists(template_path):
-                raise HTTPException(status_code=404, detail=f"Template file not found: {template_name}")
+            raise HTTPException(status_code=404, detail=f"Template file not found: {template_name}")
+    return template_path
+
+
+def parse_generation_request(body: Dict) -> Tuple[str, str, str]:
+    """(template_name, vessel_imo, fill_engine) from a /process-document or /jobs body"""
+    template_name = body.get('template_name')
+    vessel_imo = body.get('vessel_imo')
+    fill_engine = body.get('fill_engine') or DEFAULT_FILL_ENGINE
+    
+    if not template_name or not vessel_imo:
+        raise HTTPException(status_code=422, detail="template_name and vessel_imo are required")
+    if fill_engine not in FILL_ENGINES:
+        raise HTTPException(status_code=422, detail=f"fill_engine must be one of: {', '.join(FILL_ENGINES)}")
+    return template_name, vessel_imo, fill_engine
+
+
+def generate_document(template_name: str, vessel_imo: str, fill_engine: Optional[str] = None,
+                      timings: Optional[StageTimings] = None) -> GeneratedDocument:
+    """
+    Fill a template with vessel data and convert it to PDF (DOCX if conversion fails).
+    Blocking; stage durations are added to `timings`. The caller owns the returned file.
+    """
+    started = time.perf_counter()
+    timings = timings if timings is not None else StageTimings()
+    pipeline_log.info("Generating %s for vessel %s", template_name, vessel_imo,
+                      extra={"template": template_name, "vessel_imo": vessel_imo})
+    
+    try:
+        template_path = find_template_path(template_name)
         
         # Get vessel data
-        vessel = get_vessel_data(vessel_imo)
+        with timings.stage('vessel'):
+            vessel = get_vessel_data(vessel_imo)
         if not vessel:
             raise HTTPException(status_code=404, detail=f"Vessel with IMO {vessel_imo} not found")
         
-        # Extract placeholders from template
-        doc = Document(template_path)
-        full_text = ""
-        for paragraph in doc.paragraphs:
-            full_text += paragraph.text + "\n"
-
-        # Also check tables - THIS WAS MISSING!
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        full_text += paragraph.text + "\n"
-
-        print(f"DEBUG: Template {template_name} - USING ENHANCED REALISTIC DATA WITH REAL EMAILS & PHONES")
-        print(f"DEBUG: Full text length: {len(full_text)}")
-        print(f"DEBUG: First 500 characters: {full_text[:500]}")
-        
-        placeholders = find_placeholders(full_text)
-        print(f"DEBUG: Found {len(placeholders)} placeholders: {placeholders}")
-        
-        # Create comprehensive data mapping
-        data_mapping = {}
-        
-        # COMPREHENSIVE MAPPING FOR ALL YOUR TEMPLATE PLACEHOLDERS
-        vessel_mapping = {
-            # === VESSEL BASIC INFO ===
-            'vessel_name': vessel.get('name', ''),
-            'name': vessel.get('name', ''),
-            'imo': vessel.get('imo', ''),
-            'imo_number': vessel.get('imo', ''),
-            'vessel_type': vessel.get('vessel_type', ''),
-            'type': vessel.get('vessel_type', ''),
-            'flag': vessel.get('flag', ''),
-            'flag_state': vessel.get('flag', ''),
-            'mmsi': vessel.get('mmsi', ''),
-            'callsign': vessel.get('callsign', ''),
-            'call_sign': vessel.get('callsign', ''),
-            'built': str(vessel.get('built', '')),
-            'year_built': str(vessel.get('built', '')),
-            'deadweight': str(vessel.get('deadweight', '')),
-            'cargo_capacity': str(vessel.get('cargo_capacity', '')),
-            'length': str(vessel.get('length', '')),
-            'length_overall': str(vessel.get('length', '')),
-            'width': str(vessel.get('width', '')),
-            'beam': str(vessel.get('beam', '')),
-            'draught': str(vessel.get('draught', '')),
-            'draft': str(vessel.get('draught', '')),
-            'gross_tonnage': str(vessel.get('gross_tonnage', '')),
-            'net_tonnage': str(int(vessel.get('gross_tonnage', 0) * 0.7) if vessel.get('gross_tonnage') else ''),
-            'engine_power': str(vessel.get('engine_power', '')),
-            'engine_type': 'Diesel Engine',
-            'crew_size': str(vessel.get('crew_size', '')),
-            'speed': str(vessel.get('speed', '')),
-            'course': str(vessel.get('course', '')),
-            'status': vessel.get('status', ''),
-            'current_region': vessel.get('current_region', ''),
-            'region': vessel.get('current_region', ''),
-            
-            # === COMMERCIAL PARTIES ===
-            'owner_name': vessel.get('owner_name', ''),
-            'owner': vessel.get('owner_name', ''),
-            'vessel_owner': vessel.get('owner_name', ''),
-            'operator_name': vessel.get('operator_name', ''),
-            'operator': vessel.get('operator_name', ''),
-            'vessel_operator': vessel.get('operator_name', ''),
-            'buyer_name': generate_realistic_random_data('buyer_name', vessel_imo),
-            'buyer': generate_realistic_random_data('buyer_name', vessel_imo),
-            'seller_name': generate_realistic_random_data('seller_name', vessel_imo),
-            'seller': generate_realistic_random_data('seller_name', vessel_imo),
-            'company_name': vessel.get('owner_name', ''),
-            
-            # === CARGO INFORMATION ===
-            'cargo_type': vessel.get('cargo_type', ''),
-            'cargo': vessel.get('cargo_type', ''),
-            'cargo_quantity': str(vessel.get('cargo_quantity', '')),
-            'quantity': str(vessel.get('cargo_quantity', '')),
-            'oil_type': vessel.get('oil_type', ''),
-            'oil_source': vessel.get('oil_source', ''),
-            'commodity': vessel.get('cargo_type', ''),
-            'product_name': vessel.get('cargo_type', ''),
-            'product_description': (vessel.get('cargo_type', '') or 'Crude Oil') + ' - ' + (vessel.get('oil_type', '') or 'Brent Quality'),
-            
-            # === PORTS AND NAVIGATION ===
-            'departure_port': vessel.get('departure_port_name', ''),
-            'departure_port_name': vessel.get('departure_port_name', ''),
-            'destination_port': vessel.get('destination_port_name', ''),
-            'destination_port_name': vessel.get('destination_port_name', ''),
-            'loading_port': vessel.get('loading_port_name', ''),
-            'loading_port_name': vessel.get('loading_port_name', ''),
-            'port_loading': vessel.get('loading_port_name', ''),
-            'port_discharge': vessel.get('destination_port_name', ''),
-            'departure_date': vessel.get('departure_date', ''),
-            'arrival_date': vessel.get('arrival_date', ''),
-            'eta': vessel.get('eta', ''),
-            'registry_port': vessel.get('flag', ''),
-            
-            # === FINANCIAL ===
-            'deal_value': str(vessel.get('deal_value', '')),
-            'price': str(vessel.get('price', '')),
-            'market_price': str(vessel.get('market_price', '')),
-            'total_quantity': str(vessel.get('cargo_quantity', '')),
-            'contract_quantity': str(vessel.get('cargo_quantity', '')),
-            'contract_value': str(vessel.get('deal_value', '')),
-            'total_amount': str(vessel.get('deal_value', '')),
-            'total_amount_due': str(vessel.get('deal_value', '')),
-            'unit_price': str(vessel.get('price', '')),
-            'unit_price2': str(vessel.get('price', '')),
-            'unit_price3': str(vessel.get('price', '')),
-            'amount2': str(int(vessel.get('deal_value', 0) * 0.3) if vessel.get('deal_value') else ''),
-            'amount3': str(int(vessel.get('deal_value', 0) * 0.2) if vessel.get('deal_value') else ''),
-            'amount_in_words': 'As per contract',
-            
-            # === TECHNICAL SPECIFICATIONS ===
-            'cargo_tanks': '12',
-            'pumping_capacity': '5000',
-            'class_society': 'Lloyd\'s Register',
-            'ism_manager': vessel.get('operator_name', ''),
-            
-            # === DATES AND REFERENCES ===
-            'date': (datetime.now() - timedelta(days=14)).strftime('%Y-%m-%d'),
-            'issued_date': (datetime.now() - timedelta(days=14)).strftime('%Y-%m-%d'),
-            'issue_date': (datetime.now() - timedelta(days=14)).strftime('%Y-%m-%d'),
-            'date_of_issue': (datetime.now() - timedelta(days=14)).strftime('%Y-%m-%d'),
-            'issued_date': (datetime.now() - timedelta(days=14)).strftime('%Y-%m-%d'),
-            'validity': '30 days',
-            'valid_until': (datetime.now().replace(day=datetime.now().day + 30) if datetime.now().day <= 1 else datetime.now().replace(month=datetime.now().month + 1, day=1)).strftime('%Y-%m-%d'),
-            'contract_duration': '12 months',
-            'pop_reference': f"POP-{vessel.get('imo', '') or 'UNKNOWN'}-{datetime.now().strftime('%Y%m%d')}",
-            'document_number': f"DOC-{vessel.get('imo', '') or 'UNKNOWN'}-{datetime.now().strftime('%Y%m%d')}",
-            'commercial_invoice_no': f"INV-{vessel.get('imo', '') or 'UNKNOWN'}-{datetime.now().strftime('%Y%m%d')}",
-            'proforma_invoice_no': f"PRO-{vessel.get('imo', '') or 'UNKNOWN'}-{datetime.now().strftime('%Y%m%d')}",
-            'invoice_no': f"INV-{vessel.get('imo', '') or 'UNKNOWN'}-{datetime.now().strftime('%Y%m%d')}",
-            
-            # === BUYER INFORMATION ===
-            'principal_buyer_name': generate_realistic_random_data('buyer_name', vessel_imo),
-            'buyer_logistics_name': generate_realistic_random_data('buyer_name', vessel_imo),
-            'principal_buyer_designation': 'Procurement Manager',
-            'buyer_logistics_designation': 'Logistics Coordinator',
-            'principal_buyer_company': generate_realistic_random_data('buyer_company', vessel_imo),
-            'buyer_logistics_company': generate_realistic_random_data('buyer_company', vessel_imo),
-            'buyer_company_name': generate_realistic_random_data('buyer_company', vessel_imo),
-            'buyer_company_name2': generate_realistic_random_data('buyer_company', vessel_imo),
-            'authorized_person_name': generate_realistic_random_data('buyer_name', vessel_imo),
-            'buyer_name': generate_realistic_random_data('buyer_name', vessel_imo),
-            'buyer_company': generate_realistic_random_data('buyer_company', vessel_imo),
-            'buyer_address': generate_realistic_random_data('buyer_address', vessel_imo),
-            'buyer_city_country': generate_realistic_random_data('buyer_address', vessel_imo).split(',')[-2].strip() + ', ' + generate_realistic_random_data('buyer_address', vessel_imo).split(',')[-1].strip(),
-            'buyer_email': generate_realistic_random_data('buyer_email', vessel_imo),
-            'buyer_emails': generate_realistic_random_data('buyer_email', vessel_imo),
-            'buyer_contact_email': generate_realistic_random_data('buyer_email', vessel_imo),
-            'buyer_representative_email': generate_realistic_random_data('buyer_email', vessel_imo),
-            'buyer_fax': generate_realistic_random_data('buyer_phone', vessel_imo),
-            'buyer_mobile': generate_realistic_random_data('buyer_phone', vessel_imo),
-            'buyer_office_tel': generate_realistic_random_data('buyer_phone', vessel_imo),
-            'buyer_position': 'Procurement Manager',
-            'buyer_registration': 'NL123456789',
-            'buyer_representative': generate_realistic_random_data('buyer_name', vessel_imo),
-            'buyer_signatory_name': generate_realistic_random_data('buyer_name', vessel_imo),
-            'buyer_signatory_position': 'Authorized Signatory',
-            'buyer_signatory_date': (datetime.now() - timedelta(days=14)).strftime('%Y-%m-%d'),
-            'buyer_signature': 'Digital Signature',
-            'buyer_attention': 'Procurement Department',
-            'buyer_attention2': 'Logistics Department',
-            'buyer_bin': 'BIN123456789',
-            'buyer_bank_address': generate_realistic_random_data('buyer_bank_address', vessel_imo),
-            'buyer_bank_name': generate_realistic_random_data('buyer_bank_name', vessel_imo),
-            'buyer_bank_website': 'www.bank.com',
-            'buyer_swift': generate_realistic_random_data('buyer_bank_swift', vessel_imo),
-            'buyer_telfax': generate_realistic_random_data('buyer_phone', vessel_imo),
-            'buyer_account_name': generate_realistic_random_data('buyer_name', vessel_imo),
-            'buyer_account_no': 'NL91ABNA0417164300',
-            'buyer_passport_no': 'P123456789',
-            
-            # === SELLER INFORMATION ===
-            'seller_name': generate_realistic_random_data('seller_name', vessel_imo),
-            'seller_designation': 'Sales Director',
-            'seller_company': generate_realistic_random_data('seller_company', vessel_imo),
-            'seller_signature': 'Authorized Signature',
-            'seller_signatory': generate_realistic_random_data('seller_name', vessel_imo),
-            'seller_title': 'Sales Director',
-            'seller_address': generate_realistic_random_data('seller_address', vessel_imo),
-            'seller_address2': generate_realistic_random_data('seller_address', vessel_imo),
-            'seller_company_no': 'REG123456789',
-            'seller_company_reg': 'Registered in Oil Country',
-            'seller_emails': generate_realistic_random_data('seller_email', vessel_imo),
-            'seller_passport_no': 'P987654321',
-            'seller_refinery': 'Oil Refinery Complex',
-            'seller_representative': generate_realistic_random_data('seller_name', vessel_imo),
-            'seller_swift': generate_realistic_random_data('seller_bank_swift', vessel_imo),
-            'seller_bank_address': generate_realistic_random_data('seller_bank_address', vessel_imo),
-            'seller_bank_iban': 'NL91OILN0417164300',
-            'seller_bank_name': generate_realistic_random_data('seller_bank_name', vessel_imo),
-            'seller_beneficiary_address': generate_realistic_random_data('seller_address', vessel_imo),
-            'seller_bank_account_name': generate_realistic_random_data('seller_name', vessel_imo),
-            'seller_bank_account_no': 'NL91OILN0417164300',
-            'seller_bank_officer_mobile': generate_realistic_random_data('seller_phone', vessel_imo),
-            'seller_bank_officer_name': 'Bank Officer',
-            'seller_bank_swift': generate_realistic_random_data('seller_bank_swift', vessel_imo),
-            'seller_tel': generate_realistic_random_data('seller_phone', vessel_imo),
-            'seller_email': generate_realistic_random_data('seller_email', vessel_imo),
-            'seller_contact_email': generate_realistic_random_data('seller_email', vessel_imo),
-            'seller_representative_email': generate_realistic_random_data('seller_email', vessel_imo),
-            'seller_company_email': generate_realistic_random_data('seller_email', vessel_imo),
-            'seller_registration': 'OIL123456789',
-            
-            # === PRODUCT SPECIFICATIONS ===
-            'country_of_origin': 'Saudi Arabia',
-            'origin': 'Saudi Arabia',
-            'delivery_port': vessel.get('destination_port_name', ''),
-            'final_delivery_place': vessel.get('destination_port_name', ''),
-            'place_of_destination': vessel.get('destination_port_name', ''),
-            'port_of_loading': vessel.get('loading_port_name', ''),
-            'port_of_discharge': vessel.get('destination_port_name', ''),
-            'specification': 'As per contract specifications',
-            'quality': 'Premium Grade',
-            'inspection': 'SGS Inspection',
-            'insurance': 'All Risks Coverage',
-            'shipping_terms': 'FOB',
-            'terms_of_delivery': 'FOB Loading Port',
-            'payment_terms': 'LC at Sight',
-            'shipping_documents': 'Bill of Lading, Certificate of Origin',
-            'performance_bond': '2% of contract value',
-            'partial_shipment': 'Allowed',
-            'transshipment': 'Not Allowed',
-            'monthly_delivery': 'As per schedule',
-            'total_containers': '1',
-            'total_gross': str(vessel.get('cargo_quantity', '')),
-            'total_weight': str(vessel.get('cargo_quantity', '')),
-            'transaction_currency': 'USD',
-            'shipping_charges': 'As per contract',
-            'discount': '0%',
-            'other_expenditures': 'As per contract',
-            'via_name': 'Direct',
-            'through_name': 'Direct',
-            'consignment2': 'As per contract',
-            'consignment33': 'As per contract',
-            'item2': 'Additional Item',
-            'item3': 'Additional Item',
-            'quantity2': str(int(vessel.get('cargo_quantity', 0) * 0.3) if vessel.get('cargo_quantity') else ''),
-            'quantity3': str(int(vessel.get('cargo_quantity', 0) * 0.2) if vessel.get('cargo_quantity') else ''),
-            'shipment_date2': (datetime.now() - timedelta(days=14)).strftime('%Y-%m-%d'),
-            'shipment_date3': (datetime.now() - timedelta(days=14)).strftime('%Y-%m-%d'),
-            'goods_details': 'As per specification',
-            'position_title': 'Authorized Signatory',
-            'signatory_name': vessel.get('seller_name', ''),
-            
-            # === BANKING INFORMATION ===
-            'confirming_bank_account_name': 'Confirming Bank Account',
-            'confirming_bank_account_number': 'NL91CONF0417164300',
-            'confirming_bank_address': 'Bank Street, Financial District',
-            'confirming_bank_name': 'Confirming Bank International',
-            'confirming_bank_officer': 'Bank Officer',
-            'confirming_bank_officer_contact': '+31-20-111-2222',
-            'confirming_bank_swift': 'CONFNL2A',
-            'confirming_bank_tel': '+31-20-111-2222',
-            'issuing_bank_account_name': 'Issuing Bank Account',
-            'issuing_bank_account_number': 'NL91ISSU0417164300',
-            'issuing_bank_address': 'Issuing Bank Street',
-            'issuing_bank_name': 'Issuing Bank International',
-            'issuing_bank_officer': 'Issuing Officer',
-            'issuing_bank_officer_contact': '+31-20-333-4444',
-            'issuing_bank_swift': 'ISSUENL2A',
-            'issuing_bank_tel': '+31-20-333-4444',
-            'notary_number': 'NOT123456789',
-            
-            # === TECHNICAL SPECIFICATIONS (OIL/PRODUCT) ===
-            'api_gravity': '35.5',
-            'density': '0.845',
-            'specific_gravity': '0.845',
-            'sulfur': '0.5%',
-            'water_content': '0.1%',
-            'ash_content': '0.01%',
-            'carbon_residue': '0.1%',
-            'flash_point': '65°C',
-            'pour_point': '-15°C',
-            'cloud_point': '-10°C',
-            'cfpp': '-12°C',
-            'cetane_number': '52',
-            'octane_number': '95',
-            'viscosity_40': '2.5',
-            'viscosity_100': '1.2',
-            'viscosity_index': '95',
-            'lubricity': '460',
-            'calorific_value': '42.5',
-            'dist_ibp': '35°C',
-            'dist_10': '65°C',
-            'dist_50': '180°C',
-            'dist_90': '350°C',
-            'dist_fbp': '380°C',
-            'dist_residue': '2%',
-            'aromatics': '25%',
-            'olefins': '5%',
-            'oxygenates': '0%',
-            'nickel': '5 ppm',
-            'vanadium': '10 ppm',
-            'sodium': '2 ppm',
-            'nitrogen': '0.1%',
-            'sediment': '0.01%',
-            'smoke_point': '25mm',
-            'free_fatty_acid': '0.1%',
-            'iodine_value': '85',
-            'slip_melting_point': '35°C',
-            'moisture_impurities': '0.1%',
-            'colour': 'Light Yellow',
-            'cloud_point': '-10°C',
-            
-            # === TEST RESULTS ===
-            'result_ash': '0.01%',
-            'result_aspect': 'Clear',
-            'result_cfpp_summer': '-8°C',
-            'result_cfpp_winter': '-15°C',
-            'result_cetaneindex': '52',
-            'result_cetanenumber': '52',
-            'result_color': 'Light Yellow',
-            'result_density': '0.845',
-            'result_distillation': 'As per spec',
-            'result_lubricity': '460',
-            'result_oxidation': 'Pass',
-            'result_pah': '0.1%',
-            'result_sulfur': '0.5%',
-            'result_viscosity': '2.5',
-            
-            # === MAX/MIN SPECIFICATIONS ===
-            'max_acidity': '0.1%',
-            'max_aspect': 'Clear',
-            'max_cfpp_summer': '-5°C',
-            'max_cloud_winter': '-8°C',
-            'max_color': 'Light Yellow',
-            'max_density': '0.850',
-            'max_distillation': 'As per spec',
-            'max_pah': '0.2%',
-            'max_viscosity': '3.0',
-            'min_acidity': '0.05%',
-            'min_ash': '0.005%',
-            'min_cfpp_summer': '-10°C',
-            'min_cloud_winter': '-12°C',
-            'min_viscosity': '2.0',
-            
-            # === ADDITIONAL FIELDS ===
-            'optional': 'N/A',
-            'to': 'To:',
-            'via': 'Via:',
-            'tel': '+31-20-123-4567',
-            'email': 'info@company.com',
-            'address': '123 Business Street',
-            'bin': 'BIN123456789',
-            'okpo': 'OKPO123456789',
-            'designations': 'Authorized Signatory',
-            'position': 'Manager',
-        }
-        
-        # Process each placeholder with improved matching logic
-        print(f"Processing {len(placeholders)} placeholders: {placeholders}")
-        for placeholder in placeholders:
-            placeholder_lower = placeholder.lower().replace('_', '').replace(' ', '').replace('-', '')
-            
-            # Try to find exact match first
-            found = False
-            replacement_value = None
-            
-            # 1. Exact match (most precise)
-            for key, value in vessel_mapping.items():
-                key_lower = key.lower().replace('_', '').replace(' ', '').replace('-', '')
-                
-                if key_lower == placeholder_lower:
-                    replacement_value = value if value else generate_realistic_random_data(placeholder, vessel_imo)
-                    data_mapping[placeholder] = replacement_value
-                    print(f"  {placeholder} -> {replacement_value} (exact match with {key})")
-                    found = True
-                    break
-            
-            # 2. Smart partial match (only for specific cases to avoid wrong matches)
-            if not found:
-                for key, value in vessel_mapping.items():
-                    key_lower = key.lower().replace('_', '').replace(' ', '').replace('-', '')
-                    
-                    # Only allow partial matches for specific safe cases
-                    if (placeholder_lower in key_lower and len(placeholder_lower) >= 4) or \
-                       (key_lower in placeholder_lower and len(key_lower) >= 4):
-                        # Additional safety checks to avoid wrong matches
-                        if not any(conflict in placeholder_lower for conflict in ['bank', 'company', 'name', 'address']) or \
-                           any(conflict in key_lower for conflict in ['bank', 'company', 'name', 'address']):
-                            replacement_value = value if value else generate_realistic_random_data(placeholder, vessel_imo)
-                            data_mapping[placeholder] = replacement_value
-                            print(f"  {placeholder} -> {replacement_value} (smart partial match with {key})")
-                            found = True
-                            break
-            
-            # 3. If no match found, generate realistic random data
-            if not found:
-                replacement_value = generate_realistic_random_data(placeholder, vessel_imo)
-                data_mapping[placeholder] = replacement_value
-                print(f"  {placeholder} -> {replacement_value} (realistic random data)")
-        
-        print(f"Final data mapping: {data_mapping}")
+        # Placeholders from the compiled template model (parsed once per file version)
+        with timings.stage('template'):
+            template_model = template_registry.get(os.path.relpath(template_path, TEMPLATES_DIR))
+            plan = resolution_plans.get(template_model)
         
-        # Process the document
-        processed_docx_path = replace_placeholders_in_docx(template_path, data_mapping)
-        
-        # Convert DOCX to PDF using LibreOffice
+        document = render_document(template_path, template_model, plan, vessel, vessel_imo, fill_engine, timings)
+    except Exception as e:
+        generation_failures.inc(status=str(job_error_status(e)[0]))
+        raise
+    observe_generation(template_model.file_name, timings, time.perf_counter() - started)
+    return document
+
+
+class FilledDocument(NamedTuple):
+    """A filled DOCX, in memory, still to be converted to PDF"""
+    model: CompiledTemplate
+    vessel_imo: str
+    content: bytes
+    cache_key: str
+
+
+def render_document(template_path: str, template_model: CompiledTemplate, plan: ResolutionPlan, vessel: Dict,
+                    vessel_imo: str, fill_engine: Optional[str], timings: StageTimings) -> GeneratedDocument:
+    """The fill and convert half of generate_document, for a template and vessel already loaded"""
+    prepared = prepare_document(template_path, template_model, plan, vessel, vessel_imo, fill_engine, timings)
+    if isinstance(prepared, GeneratedDocument):
+        return prepared
+    
+    # Convert DOCX to PDF using LibreOffice
+    with timings.stage('convert'):
         try:
-            pdf_path = convert_docx_to_pdf(processed_docx_path)
-            
-            if pdf_path.endswith('.pdf'):
-                print(f"Successfully converted DOCX to PDF: {pdf_path}")
-                
-                # Read PDF content
-                with open(pdf_path, 'rb') as f:
-                    pdf_content = f.read()
-                
-                # Clean up temp files
-                try:
-                    os.remove(processed_docx_path)
-                    os.remove(pdf_path)
-                except:
-                    pass  # Ignore cleanup errors
-                
-                # Return PDF file
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filename = f"processed_{vessel_imo}_{timestamp}.pdf"
-                
-                return Response(
-                    content=pdf_content,
-                    media_type="application/pdf",
-                    headers={"Content-Disposition": f"attachment; filename={filename}"}
-                )
-            else:
-                print("PDF conversion failed, falling back to DOCX output...")
-                raise Exception("PDF conversion failed")
-            
+            pdf_path = convert_docx_content_to_pdf(prepared.content)
         except Exception as pdf_error:
-            print(f"PDF conversion failed: {pdf_error}")
-            print("Falling back to DOCX output...")
-            
-            # Fallback: return DOCX if PDF conversion fails
-            with open(processed_docx_path, 'rb') as f:
-                docx_content = f.read()
-            
-            # Clean up temp files
-            try:
-                os.remove(processed_docx_path)
-            except:
-                pass  # Ignore cleanup errors
-            
-            # Return DOCX file as fallback
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"processed_{vessel_imo}_{timestamp}.docx"
-            
-            return Response(
-                content=docx_content,
-                media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                headers={"Content-Disposition": f"attachment; filename={filename}"}
-            )
+            conversion_failures.inc(reason="exception")
+            logger.warning("PDF conversion failed: %s", pdf_error)
+            pdf_path = None
+    return finish_document(prepared, pdf_path)
+
+
+def prepare_document(template_path: str, template_model: CompiledTemplate, plan: ResolutionPlan, vessel: Dict,
+                     vessel_imo: str, fill_engine: Optional[str],
+                     timings: StageTimings) -> Union[GeneratedDocument, FilledDocument]:
+    """Mapping, output cache lookup and fill: the cached PDF, or the filled DOCX to convert"""
+    placeholders = list(template_model.placeholders)
+    pipeline_log.debug("Template %s: %d characters, %d placeholders: %s", template_model.file_name,
+                       len(template_model.text), len(placeholders), placeholders)
+    
+    with timings.stage('mapping'):
+        data_mapping = build_data_mapping(vessel, placeholders, vessel_imo, plan.resolutions)
+    
+    # Same template version + same values = same PDF: serve it from the output cache
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    cache_key = output_key(template_model.content_hash, data_mapping, f"pdf/{fill_engine or DEFAULT_FILL_ENGINE}")
+    cached_path = os.path.join(TEMP_DIR, f"output_{uuid.uuid4().hex}.pdf")
+    with timings.stage('cache'):
+        hit = output_cache.fetch(cache_key, cached_path)
+    if hit:
+        pipeline_log.info("Serving cached document %s", cache_key, extra={"template": template_model.file_name,
+                                                                            "vessel_imo": vessel_imo})
+        documents_generated.inc(template=template_model.file_name, format="pdf", source="cache")
+        return GeneratedDocument(cached_path, PDF_MEDIA_TYPE, f"processed_{vessel_imo}_{timestamp}.pdf", cache_key)
+    
+    # Process the document (kept in memory)
+    with timings.stage('fill'):
+        docx_content = fill_placeholders(template_path, data_mapping, engine=fill_engine)
+    return FilledDocument(template_model, vessel_imo, docx_content, cache_key)
+
+
+def finish_document(filled: FilledDocument, pdf_path: Optional[str]) -> GeneratedDocument:
+    """The converted PDF (stored in the output cache), or the DOCX itself when conversion failed"""
+    template_name, vessel_imo = filled.model.file_name, filled.vessel_imo
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    if pdf_path:
+        pipeline_log.debug("Converted DOCX to PDF: %s", pdf_path)
+        output_cache.store(filled.cache_key, pdf_path)
+        documents_generated.inc(template=template_name, format="pdf", source="rendered")
+        return GeneratedDocument(pdf_path, PDF_MEDIA_TYPE, f"processed_{vessel_imo}_{timestamp}.pdf",
+                                 filled.cache_key)
+    
+    # Fallback: return DOCX if PDF conversion fails
+    pipeline_log.info("PDF conversion failed, falling back to DOCX output",
+                      extra={"template": template_name, "vessel_imo": vessel_imo})
+    documents_generated.inc(template=template_name, format="docx", source="rendered")
+    return GeneratedDocument(None, DOCX_MEDIA_TYPE, f"processed_{vessel_imo}_{timestamp}.docx",
+                             content=filled.content)
+
+
+def remove_generated(document: GeneratedDocument):
+    if document.path is None:
+        return
+    try:
+        os.remove(document.path)
+    except OSError:
+        pass  # Ignore cleanup errors
+
+
+def generated_response(document: GeneratedDocument, request: Request, headers: Optional[Dict[str, str]] = None,
+                       on_close=None) -> Response:
+    """In-memory documents are sent as they are; files are streamed, honouring Range"""
+    if document.content is not None:
+        if on_close is not None:
+            on_close()
+        return Response(content=document.content, media_type=document.media_type, headers={
+            **(headers or {}), "Content-Disposition": f"attachment; filename={document.filename}"})
+    return file_response(
+        document.path, document.media_type, document.filename,
+        range_header=request.headers.get("range"), if_range=request.headers.get("if-range"),
+        headers=headers, on_close=on_close,
+    )
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header names this (strong or weak) ETag"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or any(tag.removeprefix('W/').strip('"') == etag for tag in tags)
+
+
+def discard_job_result(job):
+    if job.result is not None:
+        remove_generated(job.result)
+
+
+def job_error_status(error: Exception) -> Tuple[int, str]:
+    """HTTP status and message a failed generation job reports"""
+    if isinstance(error, HTTPException):
+        return error.status_code, str(error.detail)
+    return 500, f"Processing failed: {error}"
+
+
+# Background generation jobs (POST /jobs); finished results are kept for JOB_RETENTION_SECONDS
+job_manager = JobManager(
+    workers=int(os.getenv("JOB_WORKERS", "4")),
+    max_pending=int(os.getenv("JOB_MAX_PENDING", "100")),
+    retention_seconds=float(os.getenv("JOB_RETENTION_SECONDS", "3600")),
+    on_expire=discard_job_result,
+    error_status=job_error_status,
+)
+
+
+@app.post("/process-document")
+async def process_document(request: Request):
+    """Process a document template with vessel data"""
+    try:
+        # Parse JSON request
+        body = await request.json()
+        template_name, vessel_imo, fill_engine = parse_generation_request(body)
+        
+        document = await render_lane.run(generate_document, template_name, vessel_imo, fill_engine)
+        headers = {}
+        if document.etag:
+            headers["ETag"] = f'"{document.etag}"'
+            if etag_matches(request.headers.get("if-none-match"), document.etag):
+                await io_lane.run(remove_generated, document)
+                return Response(status_code=304, headers=headers)
+        
+        # Streamed from disk in chunks; the file is deleted once the response is done
+        return generated_response(document, request, headers, on_close=lambda: remove_generated(document))
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
 
+
+# Batch generation (POST /process-batch): every vessel x every template, streamed back as one zip
+MAX_BATCH_DOCUMENTS = int(os.getenv("MAX_BATCH_DOCUMENTS", "200"))
+BATCH_IMO_RE = re.compile(r"^[A-Za-z0-9]+$")
+
+
+class BatchItem(NamedTuple):
+    """Outcome of one (vessel, template) pair of a batch"""
+    vessel_imo: str
+    template_name: str
+    document: Optional[GeneratedDocument]
+    status_code: int
+    error: Optional[str]
+
+
+def parse_batch_request(body: Dict) -> Tuple[List[str], List[str], str]:
+    """(vessel_imos, template_names, fill_engine) from a /process-batch body, deduplicated in order"""
+    vessel_imos = body.get('vessel_imos')
+    template_names = body.get('template_names')
+    fill_engine = body.get('fill_engine') or DEFAULT_FILL_ENGINE
+    
+    for field, values in (('vessel_imos', vessel_imos), ('template_names', template_names)):
+        if not isinstance(values, list) or not values or not all(isinstance(v, (str, int)) and str(v) for v in values):
+            raise HTTPException(status_code=422, detail=f"{field} must be a non-empty list")
+    vessel_imos = list(dict.fromkeys(str(imo) for imo in vessel_imos))
+    # IMOs become zip folder names: anything but letters and digits could escape the archive root
+    invalid = [imo for imo in vessel_imos if not BATCH_IMO_RE.match(imo)]
+    if invalid:
+        raise HTTPException(status_code=422, detail=f"Invalid vessel IMO: {invalid[0]!r}")
+    # "X" and "X.docx" name the same template
+    template_names = list(dict.fromkeys(
+        name if name.lower().endswith('.docx') else f"{name}.docx" for name in map(str, template_names)))
+    if len(vessel_imos) * len(template_names) > MAX_BATCH_DOCUMENTS:
+        raise HTTPException(status_code=413, detail=f"A batch may produce at most {MAX_BATCH_DOCUMENTS} documents")
+    if fill_engine not in FILL_ENGINES:
+        raise HTTPException(status_code=422, detail=f"fill_engine must be one of: {', '.join(FILL_ENGINES)}")
+    return vessel_imos, template_names, fill_engine
+
+
+def load_batch_templates(template_names: List[str]) -> Dict[str, Tuple[str, CompiledTemplate, ResolutionPlan]]:
+    """Path, compiled model and resolution plan per template name, each looked up once"""
+    templates = {}
+    for template_name in template_names:
+        template_path = find_template_path(template_name)
+        model = template_registry.get(os.path.relpath(template_path, TEMPLATES_DIR))
+        templates[template_name] = (template_path, model, resolution_plans.get(model))
+    return templates
+
+
+class PendingBatchItem(NamedTuple):
+    """A batch document that is filled and waiting for its PDF conversion"""
+    template_name: str
+    filled: FilledDocument
+    timings: StageTimings
+    started: float
+
+
+def fill_batch_item(template_name: str, template: Tuple[str, CompiledTemplate, ResolutionPlan],
+                    vessel: Dict, vessel_imo: str, fill_engine: str) -> Union[BatchItem, PendingBatchItem]:
+    """A finished item (output cache hit or failure), or the filled document still to convert"""
+    template_path, model, plan = template
+    started = time.perf_counter()
+    timings = StageTimings()
+    try:
+        prepared = prepare_document(template_path, model, plan, vessel, vessel_imo, fill_engine, timings)
+    except Exception as e:
+        status_code, error = job_error_status(e)
+        generation_failures.inc(status=str(status_code))
+        return BatchItem(vessel_imo, template_name, None, status_code, error)
+    if isinstance(prepared, FilledDocument):
+        return PendingBatchItem(template_name, prepared, timings, started)
+    observe_generation(model.file_name, timings, time.perf_counter() - started)
+    return BatchItem(vessel_imo, template_name, prepared, 200, None)
+
+
+def convert_batch_items(pending: List[PendingBatchItem]) -> List[BatchItem]:
+    """Convert filled batch documents together: one pool submission, shared soffice runs"""
+    started = time.perf_counter()
+    try:
+        pdf_paths = convert_docx_contents_to_pdf([item.filled.content for item in pending])
+    except Exception as e:
+        conversion_failures.inc(len(pending), reason="exception")
+        logger.warning("PDF conversion failed: %s", e)
+        pdf_paths = [None] * len(pending)
+    elapsed = time.perf_counter() - started
+    
+    items = []
+    for item, pdf_path in zip(pending, pdf_paths):
+        item.timings['convert'] = elapsed
+        document = finish_document(item.filled, pdf_path)
+        observe_generation(item.filled.model.file_name, item.timings, time.perf_counter() - item.started)
+        items.append(BatchItem(item.filled.vessel_imo, item.template_name, document, 200, None))
+    return items
+
+
+async def render_batch(tasks: List[asyncio.Future]) -> AsyncIterator[BatchItem]:
+    """
+    Batch items as they finish. Documents whose fill completes while a
+    conversion is under way are converted together in the next round.
+    Items not handed out when the generator is closed are deleted.
+    """
+    pending = set(tasks)
+    unsent: List[BatchItem] = []
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            filled = []
+            for task in done:
+                result = task.result()
+                if isinstance(result, PendingBatchItem):
+                    filled.append(result)
+                else:
+                    unsent.append(result)
+            if filled:
+                conversion = asyncio.ensure_future(render_lane.run(convert_batch_items, filled))
+                try:
+                    unsent.extend(await asyncio.shield(conversion))
+                except asyncio.CancelledError:
+                    conversion.add_done_callback(discard_batch_task)
+                    raise
+            while unsent:
+                yield unsent.pop(0)
+    finally:
+        for item in unsent:
+            if item.document is not None:
+                remove_generated(item.document)
+
+
+def batch_member_name(item: BatchItem) -> str:
+    extension = os.path.splitext(item.document.filename)[1]
+    return f"{item.vessel_imo}/{os.path.splitext(os.path.basename(item.template_name))[0]}{extension}"
+
+
+def add_batch_member(archive: ZipStream, item: BatchItem) -> bytes:
+    """Write a finished document into the archive and delete the file"""
+    try:
+        if item.document.content is not None:
+            return archive.add_bytes(batch_member_name(item), item.document.content)
+        return archive.add_file(item.document.path, batch_member_name(item))
+    finally:
+        remove_generated(item.document)
+
+
+def discard_batch_task(task: asyncio.Future):
+    """Delete the documents a batch task produced for a client that has gone away"""
+    if task.cancelled() or task.exception() is not None:
+        return
+    result = task.result()
+    for item in result if isinstance(result, list) else [result]:
+        if isinstance(item, BatchItem) and item.document is not None:
+            remove_generated(item.document)
+
+
+async def stream_batch(tasks: List[asyncio.Future], failed: List[BatchItem]):
+    """Zip members in order of completion, then manifest.json listing every pair and its outcome"""
+    archive = ZipStream()
+    outcomes = list(failed)
+    items = render_batch(tasks)
+    finished = False
+    try:
+        async for item in items:
+            if item.document is not None:
+                yield await io_lane.run(add_batch_member, archive, item)
+            outcomes.append(item)
+        manifest = [
+            {
+                "vessel_imo": item.vessel_imo,
+                "template_name": item.template_name,
+                "status_code": item.status_code,
+                "file": batch_member_name(item) if item.document else None,
+                "error": item.error,
+            }
+            for item in outcomes
+        ]
+        yield archive.add_bytes("manifest.json", json.dumps({"documents": manifest}, indent=2).encode())
+        yield archive.close()
+        finished = True
+    finally:
+        if not finished:
+            # Client went away mid-stream: stop generations that haven't finished
+            # and delete the documents it will never receive
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                task.add_done_callback(discard_batch_task)
+            await items.aclose()
+
+
+@app.post("/process-batch")
+async def process_batch(request: Request):
+    """
+    Generate every template for every vessel in one call:
+    {"vessel_imos": [...], "template_names": [...], "fill_engine"?}.
+    Vessels are fetched with one bulk query and each template is loaded once; the
+    documents are filled in parallel, converted in groups through the LibreOffice
+    pool's submit_many, and streamed back as a zip with a manifest.json.
+    """
+    body = await request.json()
+    vessel_imos, template_names, fill_engine = parse_batch_request(body)
+    
+    templates = await io_lane.run(load_batch_templates, template_names)
+    vessels = await io_lane.run(get_vessels_data, vessel_imos)
+    
+    tasks = []
+    failed = []
+    for vessel_imo in vessel_imos:
+        vessel = vessels.get(vessel_imo)
+        for template_name in template_names:
+            if not vessel:
+                failed.append(BatchItem(vessel_imo, template_name, None, 404,
+                                        f"Vessel with IMO {vessel_imo} not found"))
+                continue
+            tasks.append(asyncio.ensure_future(render_lane.run(
+                fill_batch_item, template_name, templates[template_name], vessel, vessel_imo, fill_engine)))
+    
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return StreamingResponse(
+        stream_batch(tasks, failed),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=documents_{timestamp}.zip"},
+    )
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: Request):
+    """Queue document generation; returns a job id to poll"""
+    body = await request.json()
+    template_name, vessel_imo, fill_engine = parse_generation_request(body)
+    find_template_path(template_name)  # fail fast on unknown templates
+    
+    try:
+        job = job_manager.submit(
+            generate_document, template_name, vessel_imo, fill_engine,
+            params={"template_name": template_name, "vessel_imo": vessel_imo, "fill_engine": fill_engine},
+        )
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=f"Job queue is full: {e}", headers={"Retry-After": "5"})
+    
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/jobs/{job.id}",
+        "result_url": f"/jobs/{job.id}/result",
+    }
+
+
+@app.get("/jobs/stats")
+async def get_job_stats():
+    """Queue depth, counters and average per-stage timings"""
+    return job_manager.stats()
+
+
+@app.get("/jobs")
+async def list_jobs(limit: int = 50):
+    """Most recent jobs, newest first"""
+    return {
+        "stats": job_manager.stats(),
+        "jobs": [job.to_dict() for job in job_manager.recent(limit)],
+    }
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status and stage timings of one job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job.to_dict()
+
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str, request: Request):
+    """Stream the finished document, or a byte range of it (409 while the job is still queued or running)"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    if job.status == FAILED:
+        raise HTTPException(status_code=job.status_code or 500, detail=job.error)
+    if job.status != SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    
+    document = job.result
+    if document.content is None and not os.path.exists(document.path):
+        raise HTTPException(status_code=410, detail="Job result is no longer available")
+    headers = {"ETag": f'"{document.etag}"'} if document.etag else None
+    return generated_response(document, request, headers)
+
+def save_template(file_name: str, content: bytes):
+    with open(os.path.join(TEMPLATES_DIR, file_name), 'wb') as f:
+        f.write(content)
+    template_registry.invalidate(file_name)
+    resolution_plans.invalidate(file_name)
+    return template_catalog.update(file_name)
+
 @app.post("/upload-template")
 async def upload_template(
     name: str = Form(...),
@@ -1390,15 +1135,14 @@ async def upload_template(
             raise HTTPException(status_code=400, detail="Only .docx files are allowed")
         
         # Save file
-        file_path = os.path.join(TEMPLATES_DIR, template_file.filename)
-        with open(file_path, 'wb') as f:
-            content = await template_file.read()
-            f.write(content)
+        content = await template_file.read()
+        entry = await io_lane.run(save_template, template_file.filename, content)
         
         return {
             "success": True,
             "message": "Template uploaded successfully",
             "template": {
+                "id": entry.id if entry else None,
                 "name": name,
                 "description": description,
                 "file_name": template_file.filename,
@@ -1421,6 +1165,26 @@ except ImportError:
     EMAIL_LIBS_AVAILABLE = False
     logger.warning("Email libraries not available. Email endpoints will be disabled.")
 
+# Network timeout for the connection tests, so a dead host doesn't hold an io thread indefinitely
+EMAIL_TEST_TIMEOUT = float(os.getenv("EMAIL_TEST_TIMEOUT", "30"))
+
+def check_smtp_login(host: str, port: int, username: str, password: str, enable_tls: bool):
+    """Connect and log in to an SMTP server (raises on failure)"""
+    server = smtplib.SMTP(host, port, timeout=EMAIL_TEST_TIMEOUT)
+    if enable_tls:
+        server.starttls()
+    server.login(username, password)
+    server.quit()
+
+def check_imap_login(host: str, port: int, username: str, password: str, enable_tls: bool):
+    """Connect and log in to an IMAP server (raises on failure)"""
+    if enable_tls:
+        mail = imaplib.IMAP4_SSL(host, port, timeout=EMAIL_TEST_TIMEOUT)
+    else:
+        mail = imaplib.IMAP4(host, port, timeout=EMAIL_TEST_TIMEOUT)
+    mail.login(username, password)
+    mail.logout()
+
 @app.options("/email/test-smtp")
 async def options_test_smtp(request: Request):
     """Handle CORS preflight for test-smtp endpoint"""
@@ -1453,15 +1217,7 @@ async def test_smtp_connection(request: Request):
         
         # Test SMTP connection
         try:
-            if enable_tls:
-                server = smtplib.SMTP(host, port)
-                server.starttls()
-            else:
-                server = smtplib.SMTP(host, port)
-            
-            server.login(username, password)
-            server.quit()
-            
+            await io_lane.run(check_smtp_login, host, port, username, password, enable_tls)
             return {"success": True, "message": "SMTP connection successful"}
         except smtplib.SMTPAuthenticationError as e:
             return {"success": False, "message": f"Authentication failed: {str(e)}"}
@@ -1473,7 +1229,7 @@ async def test_smtp_connection(request: Request):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error testing SMTP connection: {e}")
+        logger.error("Error testing SMTP connection: %s", e)
         return {"success": False, "message": str(e)}
 
 @app.options("/email/test-imap")
@@ -1508,14 +1264,7 @@ async def test_imap_connection(request: Request):
         
         # Test IMAP connection
         try:
-            if enable_tls:
-                mail = imaplib.IMAP4_SSL(host, port)
-            else:
-                mail = imaplib.IMAP4(host, port)
-            
-            mail.login(username, password)
-            mail.logout()
-            
+            await io_lane.run(check_imap_login, host, port, username, password, enable_tls)
             return {"success": True, "message": "IMAP connection successful"}
         except imaplib.IMAP4.error as e:
             return {"success": False, "message": f"IMAP authentication failed: {str(e)}"}
@@ -1525,7 +1274,7 @@ async def test_imap_connection(request: Request):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error testing IMAP connection: {e}")
+        logger.error("Error testing IMAP connection: %s", e)
         return {"success": False, "message": str(e)}
 
 if __name__ == "__main__":
@@ -1536,9 +1285,9 @@ if __name__ == "__main__":
     host = os.environ.get('FASTAPI_HOST', '0.0.0.0')
     
     logger.info("🚀 Starting Document Processing API...")
-    logger.info(f"🌐 Server running on: http://{host}:{port}")
-    logger.info(f"📁 Templates directory: {os.path.join(os.getcwd(), 'templates')}")
-    logger.info(f"📁 Temp directory: {os.path.join(os.getcwd(), 'temp')}")
+    logger.info("🌐 Server running on: http://%s:%s", host, port)
+    logger.info("📁 Templates directory: %s", os.path.join(os.getcwd(), 'templates'))
+    logger.info("📁 Temp directory: %s", os.path.join(os.getcwd(), 'temp'))
     logger.info("🔧 Ready for VPS deployment!")
     
     uvicorn.run(app, host=host, port=port, log_level="info")
\ No newline at end of file
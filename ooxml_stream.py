@@ -0,0 +1,272 @@
+"""
+Streaming placeholder fill for .docx files
+Rewrites the document body, headers and footers straight from the zip with an
+incremental tokenizer, without building the python-docx object tree. Every other
+zip member is copied byte-for-byte, still compressed.
+"""
+
+import codecs
+import copy
+import posixpath
+import re
+import struct
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import BinaryIO, Dict, List, Set, Union
+
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+
+from placeholders import substitute_runs
+
+CHUNK_SIZE = 64 * 1024
+
+W_NAMESPACE = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+_REL_NAMESPACE = '{http://schemas.openxmlformats.org/package/2006/relationships}Relationship'
+_STORY_RELTYPES = (RT.HEADER, RT.FOOTER)
+
+_PREFIX_RE = re.compile(r'xmlns:(\w+)="' + re.escape(W_NAMESPACE) + '"')
+_ENCODING_RE = re.compile(rb'^(?:\xef\xbb\xbf)?<\?xml[^>]*encoding="([^"]+)"')
+_ENTITY_RE = re.compile(r'&(?:#(\d+)|#x([0-9a-fA-F]+)|(amp|lt|gt|quot|apos));')
+_ENTITIES = {'amp': '&', 'lt': '<', 'gt': '>', 'quot': '"', 'apos': "'"}
+
+# Local file header: fixed part, then file name and extra field of the lengths stored at bytes 26-30
+_LOCAL_HEADER_SIZE = 30
+_DATA_DESCRIPTOR_FLAG = 0x08
+
+Target = Union[str, BinaryIO]
+
+
+def _token_pattern(prefix: str):
+    """Paragraph open/close and text-node tokens for a WordprocessingML namespace prefix"""
+    p = re.escape(prefix)
+    # One shared '<' up front keeps the scan fast: the engine only tries the branches at tag starts
+    return re.compile(
+        rf'<(?:(?P<p_close>/{p}:p>)'
+        rf'|(?P<p_open>{p}:p(?=[\s>/])[^>]*>)'
+        rf'|(?P<t_open>{p}:t(?:\s[^>]*)?(?<!/)>)(?P<t_text>[^<]*)(?P<t_close></{p}:t>))'
+    )
+
+
+def _decode_text(raw: str) -> str:
+    if '&' not in raw:
+        return raw
+
+    def entity(match):
+        decimal, hexadecimal, name = match.groups()
+        if name:
+            return _ENTITIES[name]
+        return chr(int(decimal) if decimal else int(hexadecimal, 16))
+
+    return _ENTITY_RE.sub(entity, raw)
+
+
+def _encode_text(text: str) -> str:
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def _preserve_space(open_tag: str) -> str:
+    if 'xml:space=' in open_tag:
+        return open_tag
+    return open_tag[:-1] + ' xml:space="preserve">'
+
+
+class _TextNode:
+    """One w:t inside an open paragraph; rendered when the paragraph closes"""
+    __slots__ = ('open_tag', 'raw', 'close_tag')
+
+    def __init__(self, open_tag: str, raw: str, close_tag: str):
+        self.open_tag = open_tag
+        self.raw = raw
+        self.close_tag = close_tag
+
+    def render(self) -> str:
+        return self.open_tag + self.raw + self.close_tag
+
+
+class PartRewriter:
+    """
+    Fills placeholders in one XML part fed in chunks. feed() must be given text
+    that ends on a token boundary (stream_part cuts after a paragraph close tag).
+    Paragraphs are buffered until they close; a text-box paragraph nested in a run
+    is filled on its own, like docx_text.iter_paragraphs treats it.
+    """
+
+    def __init__(self, values: Dict[str, str], prefix: str = 'w'):
+        self.values = values
+        self.pattern = _token_pattern(prefix)
+        self.close_tag = f'</{prefix}:p>'
+        self.replacements = 0
+        self._stack: List[list] = []      # open paragraphs: [str | _TextNode, ...]
+
+    def feed(self, text: str) -> str:
+        output: List[str] = []
+        position = 0
+        for match in self.pattern.finditer(text):
+            self._emit(output, text[position:match.start()])
+            position = match.end()
+            if match.group('p_open') is not None:
+                if match.group(0).endswith('/>'):
+                    self._emit(output, match.group(0))
+                else:
+                    self._stack.append([match.group(0)])
+            elif match.group('p_close') is not None:
+                if not self._stack:
+                    self._emit(output, match.group(0))
+                    continue
+                segments = self._stack.pop()
+                segments.append(match.group(0))
+                self._emit(output, self._close_paragraph(segments))
+            elif self._stack:
+                self._stack[-1].append(_TextNode('<' + match.group('t_open'), match.group('t_text'), match.group('t_close')))
+            else:
+                self._emit(output, match.group(0))
+        self._emit(output, text[position:])
+        return ''.join(output)
+
+    def finish(self) -> str:
+        """Flush anything left open (only happens with malformed XML)"""
+        output: List[str] = []
+        while self._stack:
+            segments = self._stack.pop()
+            self._emit(output, ''.join(s if isinstance(s, str) else s.render() for s in segments))
+        return ''.join(output)
+
+    def _emit(self, output: List[str], text: str):
+        if not text:
+            return
+        if self._stack:
+            self._stack[-1].append(text)
+        else:
+            output.append(text)
+
+    def _close_paragraph(self, segments: list) -> str:
+        nodes = [s for s in segments if isinstance(s, _TextNode)]
+        if nodes:
+            texts = [_decode_text(node.raw) for node in nodes]
+            new_texts, count = substitute_runs(texts, self.values)
+            if count:
+                self.replacements += count
+                for node, old_text, new_text in zip(nodes, texts, new_texts):
+                    if new_text != old_text:
+                        node.raw = _encode_text(new_text)
+                        if new_text != new_text.strip():
+                            node.open_tag = _preserve_space(node.open_tag)
+        return ''.join(s if isinstance(s, str) else s.render() for s in segments)
+
+
+def stream_part(source: BinaryIO, destination: BinaryIO, values: Dict[str, str]) -> int:
+    """Copy one XML part from source to destination, filling placeholders. Returns replacements made."""
+    chunk = source.read(CHUNK_SIZE)
+    declared = _ENCODING_RE.match(chunk)
+    encoding = declared.group(1).decode('ascii') if declared else 'utf-8'
+    decoder = codecs.getincrementaldecoder(encoding)()
+    encoder = codecs.getincrementalencoder(encoding)()
+
+    rewriter = None
+    pending = ''
+    while True:
+        text = pending + decoder.decode(chunk, final=not chunk)
+        if rewriter is None:
+            prefix = _PREFIX_RE.search(text)
+            if not prefix and chunk:
+                # root start tag not complete yet
+                pending = text
+                chunk = source.read(CHUNK_SIZE)
+                continue
+            rewriter = PartRewriter(values, prefix.group(1) if prefix else 'w')
+        if chunk:
+            cut = text.rfind(rewriter.close_tag)
+            if cut == -1:
+                pending = text
+                chunk = source.read(CHUNK_SIZE)
+                continue
+            cut += len(rewriter.close_tag)
+            ready, pending = text[:cut], text[cut:]
+            destination.write(encoder.encode(rewriter.feed(ready)))
+            chunk = source.read(CHUNK_SIZE)
+        else:
+            destination.write(encoder.encode(rewriter.feed(text) + rewriter.finish(), final=True))
+            return rewriter.replacements
+
+
+def _rels_name(part_name: str) -> str:
+    directory, file_name = posixpath.split(part_name)
+    return posixpath.join(directory, '_rels', file_name + '.rels')
+
+
+def _read_rels(src: zipfile.ZipFile, part_name: str):
+    try:
+        root = ET.fromstring(src.read(_rels_name(part_name)))
+    except KeyError:
+        return []
+    return [
+        (rel.get('Type'), rel.get('Target'))
+        for rel in root.iter(_REL_NAMESPACE)
+        if rel.get('TargetMode') != 'External'
+    ]
+
+
+def story_part_names(src: zipfile.ZipFile) -> Set[str]:
+    """Zip member names of the main document and its headers and footers, found through the relationships"""
+    main_part = next(
+        (target.lstrip('/') for reltype, target in _read_rels(src, '') if reltype == RT.OFFICE_DOCUMENT),
+        'word/document.xml',
+    )
+    base = posixpath.dirname(main_part)
+    names = {main_part}
+    for reltype, target in _read_rels(src, main_part):
+        if reltype in _STORY_RELTYPES:
+            name = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join(base, target))
+            names.add(name)
+    return names
+
+
+def copy_member_raw(src: zipfile.ZipFile, dst: zipfile.ZipFile, info: zipfile.ZipInfo):
+    """Copy one member's compressed bytes as-is, with a fresh local header in dst"""
+    src.fp.seek(info.header_offset)
+    header = src.fp.read(_LOCAL_HEADER_SIZE)
+    if header[:4] != b'PK\x03\x04':
+        raise zipfile.BadZipFile(f"Bad local file header for {info.filename}")
+    name_length, extra_length = struct.unpack('<HH', header[26:30])
+    src.fp.seek(info.header_offset + _LOCAL_HEADER_SIZE + name_length + extra_length)
+
+    new_info = copy.copy(info)
+    # Sizes and CRC are known, so they go in the local header instead of a trailing data descriptor
+    new_info.flag_bits &= ~_DATA_DESCRIPTOR_FLAG
+    new_info.header_offset = dst.fp.tell()
+    dst.fp.write(new_info.FileHeader())
+
+    remaining = info.compress_size
+    while remaining:
+        block = src.fp.read(min(CHUNK_SIZE, remaining))
+        if not block:
+            raise zipfile.BadZipFile(f"Truncated data for {info.filename}")
+        dst.fp.write(block)
+        remaining -= len(block)
+
+    dst.filelist.append(new_info)
+    dst.NameToInfo[new_info.filename] = new_info
+    dst.start_dir = dst.fp.tell()
+    dst._didModify = True
+
+
+def fill_docx_stream(source: Target, destination: Target, values: Dict[str, str]) -> int:
+    """
+    Write a copy of the .docx at source to destination with placeholders filled in
+    the document body, headers and footers. values maps cleaned placeholder names
+    to replacement strings. Returns the number of replacements made.
+    """
+    replacements = 0
+    with zipfile.ZipFile(source) as src, zipfile.ZipFile(destination, 'w') as dst:
+        story_parts = story_part_names(src)
+        for info in src.infolist():
+            if info.filename not in story_parts:
+                copy_member_raw(src, dst, info)
+                continue
+            new_info = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+            new_info.compress_type = zipfile.ZIP_DEFLATED
+            new_info.external_attr = info.external_attr
+            with src.open(info) as part_in, dst.open(new_info, 'w') as part_out:
+                replacements += stream_part(part_in, part_out, values)
+    return replacements
+
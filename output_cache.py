@@ -0,0 +1,159 @@
+"""
+Content-addressed cache of generated documents
+A generated document depends only on the template file, the values filled into
+it and the output settings, so a hash of those three is its key: an identical
+request is served from disk without filling or converting again, and a changed
+template or changed vessel data simply hashes to a new key. Entries are files in
+cache_dir; the least recently used go once their total size passes max_bytes.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def output_key(content_hash: str, data: Dict[str, str], output_format: str) -> str:
+    """Key (and ETag) of the document a template version renders with these values"""
+    digest = hashlib.sha256(f"{content_hash}\0{output_format}\0".encode())
+    digest.update(json.dumps(data, sort_keys=True, ensure_ascii=False, default=str).encode())
+    return digest.hexdigest()[:32]
+
+
+def _link_or_copy(source: str, destination: str):
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+class OutputCache:
+    """
+    Generated files by output_key, bounded to max_bytes on disk (0 disables it).
+
+    fetch() hands out a copy (a hard link where possible), so callers own and
+    may delete what they get; entries are only ever removed by eviction.
+    """
+
+    def __init__(self, cache_dir: Optional[str], max_bytes: int, suffix: str = '.pdf'):
+        self.cache_dir = cache_dir if max_bytes > 0 else None
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._sizes: 'OrderedDict[str, int]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._evictions = 0
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._load_index()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + self.suffix)
+
+    def _load_index(self):
+        """Pick up the entries a previous process left, oldest use first"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(self.suffix):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, name[:-len(self.suffix)], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._sizes[key] = size
+            self._bytes += size
+        self._evict()
+
+    def fetch(self, key: str, destination: str) -> bool:
+        """Place the cached document for key at destination; False on a miss"""
+        if not self.cache_dir:
+            return False
+        with self._lock:
+            known = key in self._sizes
+            if known:
+                self._sizes.move_to_end(key)
+        if known:
+            path = self._path(key)
+            try:
+                _link_or_copy(path, destination)
+                os.utime(path)      # recency survives a restart
+            except OSError:
+                with self._lock:
+                    self._bytes -= self._sizes.pop(key, 0)
+            else:
+                with self._lock:
+                    self._hits += 1
+                return True
+        with self._lock:
+            self._misses += 1
+        return False
+
+    def store(self, key: str, source: str):
+        """Keep a copy of source under key; the caller keeps source"""
+        if not self.cache_dir:
+            return
+        try:
+            size = os.path.getsize(source)
+            if size > self.max_bytes:
+                return
+            temp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            _link_or_copy(source, temp_path)
+            os.replace(temp_path, self._path(key))
+        except OSError as e:
+            logger.warning("Could not cache generated document %s: %s", key, e)
+            return
+        with self._lock:
+            self._bytes += size - self._sizes.pop(key, 0)
+            self._sizes[key] = size
+            self._stores += 1
+            self._evict()
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._sizes:
+            key, size = self._sizes.popitem(last=False)
+            self._bytes -= size
+            self._evictions += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def clear(self) -> int:
+        """Remove every entry. Returns entries removed."""
+        with self._lock:
+            keys = list(self._sizes)
+            self._sizes.clear()
+            self._bytes = 0
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+        return len(keys)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.cache_dir is not None,
+                "entries": len(self._sizes),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else None,
+                "stores": self._stores,
+                "evictions": self._evictions,
+                "cache_dir": self.cache_dir,
+            }
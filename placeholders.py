@@ -0,0 +1,114 @@
+"""
+Placeholder scanning and substitution
+One precompiled regex finds every supported delimiter style in a single pass;
+substitution works on a paragraph's text runs so formatting survives
+"""
+
+import re
+from bisect import bisect_right
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+# Characters that can't appear inside any placeholder: other delimiters and line breaks.
+# Keeping them out stops one style from swallowing another, e.g. "____ {buyer} ____".
+_EXCLUDED = r'{}\[\]<>\n'
+
+# (style, opening delimiter, name pattern, closing delimiter)
+# Order matters: longer delimiters must come before their single-character forms.
+PLACEHOLDER_STYLES = (
+    ('double_brace', r'\{\{', f'[^{_EXCLUDED}]+', r'\}\}'),       # {{placeholder}}
+    ('brace', r'\{', f'[^{_EXCLUDED}]+', r'\}'),                  # {placeholder}
+    ('double_bracket', r'\[\[', f'[^{_EXCLUDED}]+', r'\]\]'),     # [[placeholder]]
+    ('bracket', r'\[', f'[^{_EXCLUDED}]+', r'\]'),                # [placeholder]
+    ('percent', '%', f'[^%{_EXCLUDED}]+', '%'),                   # %placeholder%
+    ('angle', '<', f'[^{_EXCLUDED}]+', '>'),                      # <placeholder>
+    ('double_underscore', '__', f'[^_{_EXCLUDED}]+', '__'),       # __placeholder__
+    ('double_hash', '##', f'[^#{_EXCLUDED}]+', '##'),             # ##placeholder##
+)
+
+PLACEHOLDER_PATTERN = re.compile('|'.join(
+    f'{opening}(?P<{style}>{name}){closing}'
+    for style, opening, name, closing in PLACEHOLDER_STYLES
+))
+
+MAX_PLACEHOLDER_LENGTH = 200
+
+
+class PlaceholderMatch(NamedTuple):
+    """One placeholder occurrence in scanned text"""
+    name: str    # cleaned name, as used for data mapping keys
+    raw: str     # text between the delimiters, as written in the document
+    style: str   # one of the PLACEHOLDER_STYLES names
+    start: int   # span of the whole placeholder, delimiters included
+    end: int
+
+
+def clean_placeholder_name(raw: str) -> str:
+    """Normalize a placeholder name the way mapping keys are written (spaces -> underscores)"""
+    return raw.strip().replace(' ', '_')
+
+
+def _is_valid_name(name: str) -> bool:
+    return 0 < len(name) < MAX_PLACEHOLDER_LENGTH
+
+
+def scan_placeholders(text: str) -> Iterator[PlaceholderMatch]:
+    """Yield every placeholder occurrence in document order, with its span and delimiter style"""
+    for match in PLACEHOLDER_PATTERN.finditer(text):
+        style = match.lastgroup
+        raw = match.group(style)
+        name = clean_placeholder_name(raw)
+        if _is_valid_name(name):
+            yield PlaceholderMatch(name, raw, style, match.start(), match.end())
+
+
+def find_placeholders(text: str) -> List[str]:
+    """Find placeholder names in text, deduplicated, in order of first appearance"""
+    return list(dict.fromkeys(match.name for match in scan_placeholders(text)))
+
+
+def substitute_runs(texts: List[str], values: Dict[str, str]) -> Tuple[Optional[List[str]], int]:
+    """
+    Replace placeholders in one paragraph whose text is split across runs.
+
+    texts are the run texts in order; values maps cleaned placeholder names to
+    replacement strings. A placeholder spanning several runs is written into
+    the run where it starts (keeping that run's formatting) and its remaining
+    characters are removed from the following runs.
+    Returns (new run texts, replacements made), or (None, 0) if nothing matched.
+    """
+    joined = ''.join(texts)
+    hits = [match for match in scan_placeholders(joined) if match.name in values]
+    if not hits:
+        return None, 0
+
+    offsets = run_offsets(texts)
+    new_texts = list(texts)
+    # Right to left, so earlier spans keep their original offsets
+    for match in reversed(hits):
+        first = run_at(offsets, match.start)
+        last = run_at(offsets, match.end - 1)
+        value = values[match.name]
+        head = new_texts[first][:match.start - offsets[first]]
+        if first == last:
+            new_texts[first] = head + value + new_texts[first][match.end - offsets[first]:]
+        else:
+            new_texts[first] = head + value
+            for middle in range(first + 1, last):
+                new_texts[middle] = ''
+            new_texts[last] = new_texts[last][match.end - offsets[last]:]
+    return new_texts, len(hits)
+
+
+def run_offsets(texts: List[str]) -> List[int]:
+    """Start offset of each run within the joined paragraph text"""
+    offsets = []
+    position = 0
+    for text in texts:
+        offsets.append(position)
+        position += len(text)
+    return offsets
+
+
+def run_at(offsets: List[int], position: int) -> int:
+    """Index of the run containing character `position` (empty runs are never picked)"""
+    return bisect_right(offsets, position) - 1
@@ -0,0 +1,110 @@
+"""
+In-process TTL + LRU cache for Supabase reference rows
+Keyed by (table, id); vessels, ports, companies and refineries change rarely
+and are shared by many documents, so they don't need a round trip every time
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+# Seconds a row stays fresh. Vessel rows carry voyage data and go stale sooner.
+DEFAULT_TTLS: Dict[str, float] = {
+    'vessels': 60,
+    'ports': 3600,
+    'companies': 3600,
+    'refineries': 3600,
+}
+
+
+class ReferenceCache:
+    """
+    Bounded LRU cache with a per-table TTL and hit/miss counters.
+
+    Thread-safe; rows are returned as shallow copies so callers can't
+    mutate what is cached.
+    """
+
+    def __init__(self, max_entries: int = 5000, ttls: Optional[Dict[str, float]] = None,
+                 default_ttl: float = 300, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self._clock = clock
+        self._entries: 'OrderedDict[Tuple[str, str], Tuple[float, Dict]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+        self._evictions = 0
+
+    def ttl_for(self, table: str) -> float:
+        return self.ttls.get(table, self.default_ttl)
+
+    def get(self, table: str, key) -> Optional[Dict]:
+        cache_key = (table, str(key))
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                expires_at, row = entry
+                if expires_at > self._clock():
+                    self._entries.move_to_end(cache_key)
+                    self._hits[table] = self._hits.get(table, 0) + 1
+                    return dict(row)
+                del self._entries[cache_key]
+            self._misses[table] = self._misses.get(table, 0) + 1
+            return None
+
+    def set(self, table: str, key, row: Dict):
+        ttl = self.ttl_for(table)
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        cache_key = (table, str(key))
+        with self._lock:
+            self._entries[cache_key] = (self._clock() + ttl, dict(row))
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, table: str, key=None) -> int:
+        """Drop one key, or every key of the table when key is None. Returns entries removed."""
+        with self._lock:
+            if key is not None:
+                return 1 if self._entries.pop((table, str(key)), None) is not None else 0
+            doomed = [cache_key for cache_key in self._entries if cache_key[0] == table]
+            for cache_key in doomed:
+                del self._entries[cache_key]
+            return len(doomed)
+
+    def clear(self) -> int:
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+            return removed
+
+    def stats(self) -> Dict:
+        with self._lock:
+            sizes: Dict[str, int] = {}
+            for table, _ in self._entries:
+                sizes[table] = sizes.get(table, 0) + 1
+            tables = sorted(set(sizes) | set(self._hits) | set(self._misses) | set(self.ttls))
+            hits = sum(self._hits.values())
+            misses = sum(self._misses.values())
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "evictions": self._evictions,
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+                "tables": {
+                    table: {
+                        "entries": sizes.get(table, 0),
+                        "ttl_seconds": self.ttl_for(table),
+                        "hits": self._hits.get(table, 0),
+                        "misses": self._misses.get(table, 0),
+                    }
+                    for table in tables
+                },
+            }
@@ -0,0 +1,181 @@
+"""
+Per-template resolution plans
+Which field fills each placeholder depends only on the template's placeholders
+and the field registry, never on the vessel. A plan records those decisions
+once per template content hash; it is kept in memory and as a JSON file, so a
+restarted process doesn't resolve its templates again.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from field_resolver import CONFLICT_WORDS, MIN_PARTIAL_LENGTH, FieldIndex, Resolution
+from template_registry import CompiledTemplate
+
+logger = logging.getLogger(__name__)
+
+# Bump when resolution rules change in a way the field names don't show
+PLAN_FORMAT = 1
+
+
+class ResolutionPlan(NamedTuple):
+    """The placeholder -> field decisions for one template version"""
+    file_name: str
+    content_hash: str
+    fields_version: str
+    resolutions: Tuple[Resolution, ...]
+
+
+def fields_version(keys: Iterable[str]) -> str:
+    """Fingerprint of the field names (in order) and matching rules a plan was built against"""
+    digest = hashlib.sha256(f"{PLAN_FORMAT}|{MIN_PARTIAL_LENGTH}|{','.join(CONFLICT_WORDS)}".encode())
+    for key in keys:
+        digest.update(b'\n' + key.encode())
+    return digest.hexdigest()[:16]
+
+
+class PlanCache:
+    """
+    Resolution plans by (template content hash, fields version).
+
+    Memory is an LRU of max_entries plans; plans_dir holds one JSON file per
+    plan. A changed template hashes differently and gets a new plan on its
+    own; invalidate() also drops the old one, e.g. after an upload.
+    """
+
+    def __init__(self, plans_dir: Optional[str], index: FieldIndex, max_entries: int = 256):
+        self.plans_dir = plans_dir
+        self.index = index
+        self.version = fields_version(index.keys)
+        self.max_entries = max_entries
+        self._plans: 'OrderedDict[str, ResolutionPlan]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_loads = 0
+        self._compiles = 0
+        self._invalidations = 0
+        if plans_dir:
+            os.makedirs(plans_dir, exist_ok=True)
+
+    def _key(self, content_hash: str) -> str:
+        return f"{content_hash}-{self.version}"
+
+    def _path(self, key: str) -> Optional[str]:
+        return os.path.join(self.plans_dir, f"{key}.json") if self.plans_dir else None
+
+    def get(self, template: CompiledTemplate) -> ResolutionPlan:
+        key = self._key(template.content_hash)
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                self._hits += 1
+                return plan
+
+        plan = self._load(key, template)
+        if plan is not None:
+            counter = '_disk_loads'
+        else:
+            plan = ResolutionPlan(template.file_name, template.content_hash, self.version,
+                                  self.index.resolve_all(template.placeholders))
+            self._save(key, plan)
+            counter = '_compiles'
+            logger.info("Built resolution plan for %s: %s placeholders", template.file_name, len(plan.resolutions))
+
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+            self._plans[key] = plan
+            while len(self._plans) > self.max_entries:
+                self._plans.popitem(last=False)
+        return plan
+
+    def _load(self, key: str, template: CompiledTemplate) -> Optional[ResolutionPlan]:
+        path = self._path(key)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding='utf-8') as f:
+                stored = json.load(f)
+            resolutions = tuple(Resolution(*entry) for entry in stored['resolutions'])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("Ignoring unreadable resolution plan %s: %s", path, e)
+            return None
+        if tuple(r.placeholder for r in resolutions) != template.placeholders:
+            return None
+        return ResolutionPlan(template.file_name, template.content_hash, self.version, resolutions)
+
+    def _save(self, key: str, plan: ResolutionPlan):
+        path = self._path(key)
+        if not path:
+            return
+        stored = {
+            'file_name': plan.file_name,
+            'content_hash': plan.content_hash,
+            'fields_version': plan.fields_version,
+            'resolutions': [list(resolution) for resolution in plan.resolutions],
+        }
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(stored, f)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning("Could not store resolution plan %s: %s", path, e)
+
+    def invalidate(self, file_name: Optional[str] = None) -> int:
+        """Drop the plans of one template file, or every plan. Returns plans removed."""
+        with self._lock:
+            doomed = {key for key, plan in self._plans.items() if file_name is None or plan.file_name == file_name}
+            for key in doomed:
+                del self._plans[key]
+        doomed.update(self._stored_keys(file_name))
+        for key in doomed:
+            try:
+                os.remove(self._path(key))
+            except (OSError, TypeError):
+                pass
+        with self._lock:
+            self._invalidations += len(doomed)
+        return len(doomed)
+
+    def _stored_keys(self, file_name: Optional[str]) -> Iterable[str]:
+        if not self.plans_dir or not os.path.isdir(self.plans_dir):
+            return
+        for name in os.listdir(self.plans_dir):
+            if not name.endswith('.json'):
+                continue
+            if file_name is not None:
+                try:
+                    with open(os.path.join(self.plans_dir, name), encoding='utf-8') as f:
+                        if json.load(f).get('file_name') != file_name:
+                            continue
+                except (OSError, ValueError):
+                    continue
+            yield name[:-len('.json')]
+
+    def lookups(self) -> Dict[str, int]:
+        """Hit and miss counters only: no directory listing, cheap enough for every metrics scrape"""
+        with self._lock:
+            return {"hits": self._hits, "disk_loads": self._disk_loads, "compiles": self._compiles}
+
+    def stats(self) -> Dict:
+        with self._lock:
+            on_disk = 0
+            if self.plans_dir and os.path.isdir(self.plans_dir):
+                on_disk = sum(1 for name in os.listdir(self.plans_dir) if name.endswith('.json'))
+            return {
+                "fields_version": self.version,
+                "entries": len(self._plans),
+                "max_entries": self.max_entries,
+                "on_disk": on_disk,
+                "plans_dir": self.plans_dir,
+                "hits": self._hits,
+                "disk_loads": self._disk_loads,
+                "compiles": self._compiles,
+                "invalidations": self._invalidations,
+            }
@@ -0,0 +1,500 @@
+"""
+Synthetic party and trade data for placeholders the database can't fill
+The catalog is built once at import into immutable tuples, and each placeholder
+name is routed to its generator once; after that a call is a cache lookup, a
+seed and one or two random draws. Values are deterministic per (vessel IMO,
+entity): every buyer_* placeholder of a vessel describes the same buyer.
+Each value is drawn from its own random.Random, never the shared random module,
+so generation is safe from any number of threads at once.
+"""
+
+import hashlib
+import logging
+import random
+from datetime import datetime, timedelta
+from functools import lru_cache, partial
+from typing import Callable, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class Party(NamedTuple):
+    name: str
+    email: str
+    phone: str
+    address: str
+
+
+class Bank(NamedTuple):
+    name: str
+    swift: str
+    address: str
+    phone: str
+
+
+class PartyProfile(NamedTuple):
+    """Everything a document says about one party of a vessel's deal"""
+    role: str                                   # 'buyer' or 'seller'
+    name: str
+    email: str
+    phone: str
+    address: str
+    city_country: str                           # last two comma-separated parts of address
+    bank_name: str
+    bank_address: str
+    bank_swift: str
+
+
+# Trading houses and majors used as buyers / sellers
+BUYERS = (
+    Party('Shell International Trading and Shipping Company Ltd', 'trading@shell.com', '+44 20 7934 1234', '1 Shell Centre, London SE1 7NA, UK'),
+    Party('BP International Ltd', 'operations@bp.com', '+44 20 7623 4567', "1 St James's Square, London SW1Y 4PD, UK"),
+    Party('TotalEnergies Trading SA', 'commercial@totalenergies.com', '+33 1 40 14 45 46', '2 Place Jean Millier, 92078 Paris La Défense, France'),
+    Party('Vitol Group', 'info@vitol.com', '+44 20 7283 7890', '10 Upper Bank Street, London E14 5JJ, UK'),
+    Party('Trafigura Group Pte Ltd', 'info@trafigura.com', '+65 6221 1234', '1 HarbourFront Avenue, #18-01 Keppel Bay Tower, Singapore 098632'),
+    Party('Glencore Energy UK Ltd', 'trading@glencore.com', '+44 20 7747 1000', '20 Fenchurch Street, London EC3M 3BY, UK'),
+    Party('Mercuria Energy Trading SA', 'contact@mercuria.com', '+41 22 319 90 00', 'Route de Florissant 13, 1206 Geneva, Switzerland'),
+    Party('ExxonMobil Global Trading Company', 'trading@exxonmobil.com', '+1 713 546 1234', '600 Travis Street, Suite 1900, Houston, TX 77002, USA'),
+    Party('Chevron Global Energy Inc', 'energy@chevron.com', '+1 713 546 5678', '1000 Main Street, Houston, TX 77002, USA'),
+    Party('Gunvor Group Ltd', 'trading@gunvor.com', '+41 22 319 90 00', 'Route de Florissant 13, 1206 Geneva, Switzerland'),
+    Party('Koch Supply & Trading LP', 'trading@kochind.com', '+1 713 546 9012', '1500 Louisiana Street, Houston, TX 77002, USA'),
+    Party('Castleton Commodities International LLC', 'info@castletoncommodities.com', '+1 212 270 6000', '383 Madison Avenue, New York, NY 10017, USA'),
+    Party('Freepoint Commodities LLC', 'trading@freepoint.com', '+1 212 270 6000', '383 Madison Avenue, New York, NY 10017, USA'),
+    Party('Hartree Partners LP', 'info@hartreepartners.com', '+1 212 270 6000', '383 Madison Avenue, New York, NY 10017, USA'),
+    Party('BB Energy Trading Ltd', 'trading@bbenergy.com', '+44 20 7000 7000', '1 Canada Square, Canary Wharf, London E14 5AB, UK'),
+    Party('ConocoPhillips Global Trading', 'trading@conocophillips.com', '+1 713 546 3456', '1100 Louisiana Street, Houston, TX 77002, USA'),
+    Party('Eni Trading & Shipping SpA', 'trading@eni.com', '+39 06 59821', 'Piazzale Enrico Mattei 1, 00144 Rome, Italy'),
+    Party('Repsol Trading SA', 'trading@repsol.com', '+34 91 348 81 00', 'Calle Méndez Álvaro 44, 28045 Madrid, Spain'),
+    Party('Equinor ASA Trading', 'trading@equinor.com', '+47 51 99 00 00', 'Forusbeen 50, 4035 Stavanger, Norway'),
+    Party('PetroChina International Company Ltd', 'trading@petrochina.com.cn', '+86 10 5998 6000', '9 Dongzhimen North Street, Dongcheng District, Beijing 100007, China'),
+)
+
+SELLERS = (
+    Party('Saudi Aramco Trading Company', 'marketing@aramco.com', '+966 11 402 9000', 'King Fahd Road, Riyadh 11564, Saudi Arabia'),
+    Party('ADNOC Global Trading', 'trading@adnoc.ae', '+971 2 707 0000', 'Sheikh Zayed Road, Abu Dhabi, UAE'),
+    Party('Qatar Energy Trading LLC', 'export@qatarenergy.qa', '+974 4407 0000', 'QNB Tower, West Bay, Doha, Qatar'),
+    Party('Kuwait Petroleum Corporation', 'export@kpc.com.kw', '+965 1 888 888', 'Abdullah Al-Mubarak Street, Kuwait City, Kuwait'),
+    Party('Sonatrach Trading Ltd', 'export@sonatrach.dz', '+213 21 54 11 11', '80 Avenue Ahmed Ghermoul, Algiers, Algeria'),
+    Party('Gazprom Marketing & Trading Ltd', 'trading@gazprom.com', '+7 495 719 30 00', 'Nametkina Street 16, 117420 Moscow, Russia'),
+    Party('Petrobras Global Trading BV', 'trading@petrobras.com', '+55 21 3224 1000', 'Avenida República do Chile 65, Rio de Janeiro, RJ 20031-170, Brazil'),
+    Party('Pemex Trading International Inc', 'trading@pemex.com', '+52 55 1944 2500', 'Marina Nacional 329, Col. Huasteca, Miguel Hidalgo, 11311 Mexico City, Mexico'),
+    Party('Nigerian National Petroleum Corporation', 'trading@nnpcgroup.com', '+234 9 234 0000', 'NNPC Towers, Herbert Macaulay Way, Central Business District, Abuja, Nigeria'),
+    Party('Petronas Trading Corporation Sdn Bhd', 'trading@petronas.com.my', '+60 3 2051 5000', 'Tower 1, Petronas Twin Towers, Kuala Lumpur City Centre, 50088 Kuala Lumpur, Malaysia'),
+    Party('Rosneft Trading SA', 'trading@rosneft.com', '+7 495 777 44 22', 'Sofiyskaya Embankment 26/1, 115035 Moscow, Russia'),
+    Party('Lukoil Trading & Supply', 'trading@lukoil.com', '+7 495 627 44 44', 'Sretensky Boulevard 11, 101000 Moscow, Russia'),
+    Party('Tatneft Trading', 'trading@tatneft.ru', '+7 8553 37 11 11', '75 Lenin Street, 423450 Almetyevsk, Tatarstan, Russia'),
+    Party('Surgutneftegas Trading', 'trading@surgutneftegas.ru', '+7 3462 42 00 00', 'Lenin Avenue 1, 628415 Surgut, Russia'),
+    Party('Bashneft Trading', 'trading@bashneft.ru', '+7 347 279 00 00', 'Karl Marx Street 30, 450077 Ufa, Russia'),
+    Party('NOVATEK Trading', 'trading@novatek.ru', '+7 495 730 60 00', '2 Udaltsova Street, 119415 Moscow, Russia'),
+    Party('Irkutsk Oil Company', 'trading@irkutskoil.com', '+7 3952 25 00 00', 'Lenin Street 1, 664003 Irkutsk, Russia'),
+    Party('Zarubezhneft Trading', 'trading@zarubezhneft.ru', '+7 495 232 00 00', 'Bolshaya Ordynka Street 24/26, 119017 Moscow, Russia'),
+    Party('Russneft Trading', 'trading@russneft.ru', '+7 495 232 00 00', 'Bolshaya Ordynka Street 24/26, 119017 Moscow, Russia'),
+    Party('TNK-BP Trading', 'trading@tnk-bp.com', '+7 495 363 11 11', 'Arbat Street 1, 119019 Moscow, Russia'),
+)
+
+# Banks: buyers bank internationally, sellers regionally; energy specialists serve both
+INTERNATIONAL_BANKS = (
+    Bank('JPMorgan Chase Bank NA', 'CHASUS33', '383 Madison Avenue, New York, NY 10017, USA', '+1 212 270 6000'),
+    Bank('HSBC Bank plc', 'HBUKGB4B', '1 Centenary Square, Birmingham B1 1HQ, UK', '+44 20 7991 8888'),
+    Bank('Standard Chartered Bank', 'SCBLUS33', '1095 Avenue of the Americas, New York, NY 10036, USA', '+1 212 667 7000'),
+    Bank('Deutsche Bank AG', 'DEUTDEFF', 'Taunusanlage 12, 60325 Frankfurt am Main, Germany', '+49 69 910 00'),
+    Bank('BNP Paribas SA', 'BNPAFRPP', '16 Boulevard des Italiens, 75009 Paris, France', '+33 1 40 14 45 46'),
+    Bank('Societe Generale SA', 'SOGEFRPP', '29 Boulevard Haussmann, 75009 Paris, France', '+33 1 42 14 20 00'),
+    Bank('Credit Suisse AG', 'CRESCHZZ', 'Paradeplatz 8, 8001 Zurich, Switzerland', '+41 44 333 11 11'),
+    Bank('UBS AG', 'UBSWCHZH', 'Bahnhofstrasse 45, 8001 Zurich, Switzerland', '+41 44 234 11 11'),
+    Bank('Barclays Bank plc', 'BARCGB22', '1 Churchill Place, London E14 5HP, UK', '+44 20 7116 1000'),
+    Bank('Citibank NA', 'CITIUS33', '388 Greenwich Street, New York, NY 10013, USA', '+1 212 559 1000'),
+)
+
+ENERGY_SPECIALIST_BANKS = (
+    Bank('ING Bank NV', 'INGBNL2A', 'Bijlmerplein 888, 1102 MG Amsterdam, Netherlands', '+31 20 563 9111'),
+    Bank('ABN AMRO Bank NV', 'ABNANL2A', 'Gustav Mahlerlaan 10, 1082 PP Amsterdam, Netherlands', '+31 20 343 3433'),
+    Bank('Natixis SA', 'NATXFRPP', '30 Avenue Pierre Mendes France, 75013 Paris, France', '+33 1 58 19 40 00'),
+    Bank('Credit Agricole CIB', 'AGRIFRPP', '12 Place des Etats-Unis, 92127 Montrouge, France', '+33 1 41 89 20 00'),
+    Bank('Mizuho Bank Ltd', 'MHCBJPJT', '1-5-5 Otemachi, Chiyoda-ku, Tokyo 100-8176, Japan', '+81 3 5224 1111'),
+    Bank('Sumitomo Mitsui Banking Corporation', 'SMBCJPJT', '1-1-2 Marunouchi, Chiyoda-ku, Tokyo 100-0005, Japan', '+81 3 3287 0111'),
+    Bank('Bank of China Ltd', 'BKCHCNBJ', '1 Fuxingmen Nei Dajie, Xicheng District, Beijing 100818, China', '+86 10 6659 6688'),
+    Bank('Industrial and Commercial Bank of China', 'ICBKCNBJ', '55 Fuxingmen Nei Street, Xicheng District, Beijing 100032, China', '+86 10 6610 6114'),
+    Bank('Wells Fargo Bank NA', 'WFBIUS6S', '420 Montgomery Street, San Francisco, CA 94104, USA', '+1 415 396 0123'),
+    Bank('Bank of America NA', 'BOFAUS3N', '100 North Tryon Street, Charlotte, NC 28255, USA', '+1 704 386 5681'),
+)
+
+REGIONAL_BANKS = (
+    Bank('First Abu Dhabi Bank PJSC', 'NBADAEAA', 'Sheikh Zayed Road, Abu Dhabi, UAE', '+971 2 681 0000'),
+    Bank('Emirates NBD Bank PJSC', 'EBILAEAD', 'Baniyas Road, Deira, Dubai, UAE', '+971 4 609 2222'),
+    Bank('National Bank of Kuwait SAK', 'NBOKKWKW', 'Abdullah Al-Mubarak Street, Kuwait City, Kuwait', '+965 1 888 888'),
+    Bank('Qatar National Bank SAQ', 'QNBAQAQA', 'QNB Tower, West Bay, Doha, Qatar', '+974 4407 0000'),
+    Bank('Saudi National Bank', 'NCBKSAJE', 'King Fahd Road, Riyadh 11564, Saudi Arabia', '+966 11 402 9000'),
+    Bank('Banco do Brasil SA', 'BRASBRRJ', 'Setor Bancario Sul, Quadra 1, Brasilia, DF 70073-900, Brazil', '+55 61 3214 2000'),
+    Bank('Banco Santander SA', 'BSCHESMM', 'Paseo de Pereda 9-12, 39004 Santander, Spain', '+34 942 20 61 00'),
+    Bank('UniCredit Bank AG', 'UNCRITMM', 'Piazza Gae Aulenti 3, 20154 Milan, Italy', '+39 02 8862 1'),
+    Bank('Intesa Sanpaolo SpA', 'BCITITMM', 'Piazza San Carlo 156, 10121 Turin, Italy', '+39 011 555 1'),
+    Bank('Nordea Bank Abp', 'NDEAFIHH', 'Satamaradankatu 5, 00020 Helsinki, Finland', '+358 9 1651'),
+)
+
+# Cargo, ports, vessels and contract terms
+CRUDE_OILS = (
+    'Brent Crude Oil (API 38.3°, Sulfur 0.37%)',
+    'WTI Crude Oil (API 39.6°, Sulfur 0.24%)',
+    'Arabian Light Crude (API 33.4°, Sulfur 1.77%)',
+    'Urals Crude Oil (API 31.8°, Sulfur 1.35%)',
+    'Bonny Light Crude (API 35.1°, Sulfur 0.14%)',
+    'Forties Crude Oil (API 40.3°, Sulfur 0.56%)',
+    'Oman Crude Oil (API 34.0°, Sulfur 0.94%)',
+    'Dubai Crude Oil (API 31.0°, Sulfur 2.04%)',
+    'Basrah Light Crude (API 33.7°, Sulfur 2.85%)',
+    'Maya Crude Oil (API 22.2°, Sulfur 3.30%)',
+)
+
+REFINED_PRODUCTS = (
+    'Gasoline 95 RON (Euro 5)',
+    'Diesel EN590 (Ultra Low Sulfur)',
+    'Jet Fuel A-1 (ASTM D1655)',
+    'Heavy Fuel Oil 380 CST',
+    'Marine Gas Oil (MGO)',
+    'Naphtha Light Straight Run',
+    'Kerosene JP-54',
+    'Bunker Fuel Oil 180 CST',
+    'LPG Propane/Butane Mix',
+    'Bitumen 60/70 Penetration',
+)
+
+LOADING_PORTS = (
+    'Rotterdam Europoort (Netherlands)',
+    'Singapore Jurong Island (Singapore)',
+    'Houston Ship Channel (USA)',
+    'Ras Tanura Terminal (Saudi Arabia)',
+    'Fujairah Port (UAE)',
+    'Antwerp Port (Belgium)',
+    'Hamburg Port (Germany)',
+    'Los Angeles Port (USA)',
+    'Shanghai Yangshan Port (China)',
+    'Yokohama Port (Japan)',
+)
+
+DISCHARGE_PORTS = (
+    'Rotterdam Europoort (Netherlands)',
+    'Singapore Jurong Island (Singapore)',
+    'New York Harbor (USA)',
+    'Genoa Port (Italy)',
+    'Barcelona Port (Spain)',
+    'Marseille Port (France)',
+    'Southampton Port (UK)',
+    'Hamburg Port (Germany)',
+    'Amsterdam Port (Netherlands)',
+    'Le Havre Port (France)',
+)
+
+VESSEL_NAMES = (
+    'MT Atlantic Pioneer',
+    'MT Pacific Navigator',
+    'MT Ocean Explorer',
+    'MT Maritime Star',
+    'MT Sea Voyager',
+    'MT Global Trader',
+    'MT Energy Carrier',
+    'MT Oil Express',
+    'MT Crude Master',
+    'MT Petroleum Queen',
+    'MT Liquid Gold',
+    'MT Black Diamond',
+    'MT Energy Phoenix',
+    'MT Ocean Breeze',
+    'MT Trade Wind',
+    'MT Commercial Spirit',
+    'MT Industrial Pride',
+    'MT Global Energy',
+    'MT Maritime Legend',
+    'MT Ocean Warrior',
+)
+
+VESSEL_TYPES = (
+    'VLCC (Very Large Crude Carrier)',
+    'Suezmax Tanker',
+    'Aframax Tanker',
+    'Panamax Tanker',
+    'Handymax Tanker',
+    'Product Tanker',
+    'Chemical Tanker',
+    'LNG Carrier',
+    'LPG Carrier',
+    'Bulk Carrier',
+)
+
+VESSEL_FLAGS = (
+    'Panama',
+    'Liberia',
+    'Marshall Islands',
+    'Singapore',
+    'Malta',
+    'Cyprus',
+    'Bahamas',
+    'Bermuda',
+    'Isle of Man',
+    'Gibraltar',
+)
+
+INCOTERMS = (
+    'FOB (Free On Board)',
+    'CIF (Cost, Insurance & Freight)',
+    'CFR (Cost & Freight)',
+    'EXW (Ex Works)',
+    'DDP (Delivered Duty Paid)',
+    'FAS (Free Alongside Ship)',
+    'CPT (Carriage Paid To)',
+    'CIP (Carriage & Insurance Paid To)',
+)
+
+PAYMENT_TERMS = (
+    'LC at Sight',
+    'LC 30 Days',
+    'LC 60 Days',
+    'LC 90 Days',
+    'TT in Advance',
+    'TT on Delivery',
+    'Open Account 30 Days',
+    'Open Account 60 Days',
+    'Cash Against Documents',
+    'Documentary Collection',
+)
+
+QUALITY_STANDARDS = (
+    'API 38.3°',
+    'Sulfur 0.37%',
+    'ASTM D4052',
+    'ASTM D4294',
+    'ISO 8217',
+    'EN 590',
+    'ASTM D1655',
+    'ASTM D975',
+)
+
+REFERENCE_PREFIXES = ('REF', 'PO', 'SO', 'INV', 'LC', 'BL', 'COA', 'SGS')
+
+# Pools some placeholders draw from as one list
+BUYER_BANKS = INTERNATIONAL_BANKS + ENERGY_SPECIALIST_BANKS
+SELLER_BANKS = REGIONAL_BANKS + ENERGY_SPECIALIST_BANKS
+ALL_PORTS = LOADING_PORTS + DISCHARGE_PORTS
+ALL_TERMS = INCOTERMS + PAYMENT_TERMS
+
+# A generator takes the random source and the placeholder as written and returns its value
+Generator = Callable[[random.Random, str], Optional[str]]
+
+
+def _choose(pool: Tuple, field: Optional[str], rng: random.Random, placeholder: str):
+    item = rng.choice(pool)
+    return getattr(item, field) if field else item
+
+
+def choose(pool: Tuple, field: Optional[str] = None) -> Generator:
+    """Random item of pool, or one field of it"""
+    return partial(_choose, pool, field)
+
+
+def _random_int(low: int, high: int, template: str, rng: random.Random, placeholder: str) -> str:
+    return template.format(rng.randint(low, high))
+
+
+def random_int(low: int, high: int, template: str) -> Generator:
+    """Random integer in [low, high] formatted with template, e.g. '{:,} MT'"""
+    return partial(_random_int, low, high, template)
+
+
+def _oil_price(rng: random.Random, placeholder: str) -> str:
+    return f"${rng.uniform(45.50, 95.75):.2f}/bbl"
+
+
+def _two_weeks_ago(rng: random.Random, placeholder: str) -> str:
+    # Every generated date is two weeks before today
+    value = (datetime.now() - timedelta(days=14)).strftime('%Y-%m-%d')
+    logger.debug("Date placeholder %s -> %s", placeholder, value)
+    return value
+
+
+def _reference(rng: random.Random, placeholder: str) -> str:
+    prefix = rng.choice(REFERENCE_PREFIXES)
+    return f"{prefix}-{rng.randint(100000, 999999)}"
+
+
+def _no_value(rng: random.Random, placeholder: str) -> None:
+    # vessel/ship/tanker placeholders other than name, type and flag have never had a value
+    return None
+
+
+def _sample(rng: random.Random, placeholder: str) -> str:
+    return f"Sample {placeholder.replace('_', ' ').title()}"
+
+
+def _has(key: str, *words: str) -> bool:
+    return any(word in key for word in words)
+
+
+def _bank_route(key: str) -> Generator:
+    pool = SELLER_BANKS if 'seller' in key and 'buyer' not in key else BUYER_BANKS
+    if 'swift' in key:
+        return choose(pool, 'swift')
+    if 'address' in key:
+        return choose(pool, 'address')
+    if _has(key, 'phone', 'tel'):
+        return choose(pool, 'phone')
+    return choose(pool, 'name')
+
+
+def _party_route(key: str) -> Generator:
+    if 'buyer' in key or 'seller' in key:
+        pool = BUYERS if 'buyer' in key else SELLERS
+        if 'email' in key:
+            return choose(pool, 'email')
+        if _has(key, 'phone', 'tel', 'mobile'):
+            return choose(pool, 'phone')
+        if 'address' in key:
+            return choose(pool, 'address')
+        return choose(pool, 'name')
+    # principal and bare company placeholders are buyer names
+    return choose(BUYERS, 'name')
+
+
+def _oil_route(key: str) -> Generator:
+    return choose(CRUDE_OILS if 'crude' in key else REFINED_PRODUCTS)
+
+
+def _port_route(key: str) -> Generator:
+    if 'loading' in key:
+        return choose(LOADING_PORTS)
+    if 'discharge' in key:
+        return choose(DISCHARGE_PORTS)
+    return choose(ALL_PORTS)
+
+
+def _vessel_route(key: str) -> Generator:
+    if 'name' in key:
+        return choose(VESSEL_NAMES)
+    if 'type' in key:
+        return choose(VESSEL_TYPES)
+    if 'flag' in key:
+        return choose(VESSEL_FLAGS)
+    return _no_value
+
+
+def _terms_route(key: str) -> Generator:
+    if 'payment' in key:
+        return choose(PAYMENT_TERMS)
+    if 'incoterm' in key:
+        return choose(INCOTERMS)
+    return choose(ALL_TERMS)
+
+
+def _money_route(key: str) -> Generator:
+    if 'price' in key and 'oil' in key:
+        return _oil_price
+    if _has(key, 'value', 'amount'):
+        return random_int(5000000, 50000000, '${:,}')
+    return random_int(100000, 5000000, '${:,}')
+
+
+def _quantity_route(key: str) -> Generator:
+    if 'quantity' in key:
+        return random_int(50000, 300000, '{:,} MT')
+    if 'capacity' in key:
+        return random_int(80000, 320000, '{:,} DWT')
+    return random_int(10000, 100000, '{:,}')
+
+
+def _fixed(generator: Generator) -> Callable[[str], Generator]:
+    return lambda key: generator
+
+
+# (trigger words, route) in priority order: the first entry with a word in the
+# placeholder decides. Bank must stay ahead of party so "buyer_bank_name" is a bank.
+ROUTES: Tuple[Tuple[Tuple[str, ...], Callable[[str], Generator]], ...] = (
+    (('bank', 'financial', 'credit'), _bank_route),
+    (('company', 'buyer', 'seller', 'principal'), _party_route),
+    (('oil', 'product', 'cargo', 'commodity'), _oil_route),
+    (('port', 'terminal', 'loading', 'discharge'), _port_route),
+    (('vessel', 'ship', 'tanker'), _vessel_route),
+    (('email', 'mail', 'e-mail', 'contact'), _fixed(choose(BUYERS, 'email'))),
+    (('address', 'location', 'street'), _fixed(choose(BUYERS, 'address'))),
+    (('phone', 'tel', 'mobile'), _fixed(choose(BUYERS, 'phone'))),
+    (('name', 'person', 'signatory', 'authorized'), _fixed(choose(BUYERS, 'name'))),
+    (('incoterm', 'payment', 'terms'), _terms_route),
+    (('quality', 'spec', 'standard', 'api', 'sulfur'), _fixed(choose(QUALITY_STANDARDS))),
+    (('price', 'value', 'amount', 'cost'), _money_route),
+    (('quantity', 'volume', 'capacity', 'tonnage'), _quantity_route),
+    (('date', 'time', 'eta', 'etd'), _fixed(_two_weeks_ago)),
+    (('ref', 'number', 'id', 'code'), _fixed(_reference)),
+)
+
+# Entities that share one seed per vessel, checked in order; anything else is seeded by its own key
+SEED_ENTITIES: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ('buyer', ('buyer',)),
+    ('seller', ('seller',)),
+    ('bank', ('bank', 'financial')),
+    ('principal', ('principal',)),
+    ('logistics', ('logistics',)),
+    ('signatory', ('authorized', 'signatory')),
+)
+
+
+def placeholder_key(placeholder: str) -> str:
+    """Normalized form used for routing and seeding: lower case, no underscores or spaces"""
+    return placeholder.lower().replace('_', '').replace(' ', '')
+
+
+@lru_cache(maxsize=4096)
+def route(key: str) -> Generator:
+    """Generator for a normalized placeholder key, resolved once per key"""
+    for words, resolve in ROUTES:
+        if _has(key, *words):
+            return resolve(key)
+    return _sample
+
+
+@lru_cache(maxsize=16384)
+def entity_seed(vessel_imo: str, key: str) -> int:
+    """Seed shared by every placeholder of the same entity on one vessel"""
+    entity = next((name for name, words in SEED_ENTITIES if _has(key, *words)), key)
+    return int(hashlib.md5(f"{vessel_imo}_{entity}".encode()).hexdigest()[:8], 16)
+
+
+# Source for placeholders without a vessel; those values aren't meant to be reproducible
+_unseeded = random.Random()
+
+
+def rng_for(vessel_imo: Optional[str], key: str) -> random.Random:
+    """A generator of its own for one placeholder value, seeded per (vessel, entity)"""
+    if vessel_imo:
+        return random.Random(entity_seed(vessel_imo, key))
+    return _unseeded
+
+
+# Party and bank pools per role; the same draws generate() makes for "<role>_name" / "<role>_bank_name"
+PARTY_POOLS = {'buyer': (BUYERS, BUYER_BANKS), 'seller': (SELLERS, SELLER_BANKS)}
+
+PROFILE_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=PROFILE_CACHE_SIZE)
+def party_profile(vessel_imo: str, role: str) -> PartyProfile:
+    """The buyer or seller of a vessel, resolved once and shared by every placeholder about it"""
+    parties, banks = PARTY_POOLS[role]
+    seed = entity_seed(vessel_imo, role)
+    party = random.Random(seed).choice(parties)
+    bank = random.Random(seed).choice(banks)
+    parts = party.address.split(',')
+    return PartyProfile(
+        role=role,
+        name=party.name,
+        email=party.email,
+        phone=party.phone,
+        address=party.address,
+        city_country=f"{parts[-2].strip()}, {parts[-1].strip()}",
+        bank_name=bank.name,
+        bank_address=bank.address,
+        bank_swift=bank.swift,
+    )
+
+
+def generate(placeholder: str, vessel_imo: Optional[str] = None) -> Optional[str]:
+    """Realistic value for a placeholder; stable for a given vessel IMO"""
+    key = placeholder_key(placeholder)
+    return route(key)(rng_for(vessel_imo, key), placeholder)
@@ -0,0 +1,205 @@
+"""
+Persistent template catalog
+One record per template file (stable id, content hash, size, mtime and
+placeholders) kept in memory and in a JSON file, so listing templates never
+opens a .docx and ids survive restarts. refresh() rescans the directory and
+only recompiles files whose size or mtime moved; update() is the upload hook.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from template_registry import TemplateRegistry
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FORMAT = 1
+
+# Template ids are uuid5(file name) in this namespace, so they're stable even if the catalog file is lost
+TEMPLATE_ID_NAMESPACE = uuid.UUID('6f1c2b7e-3d4a-5e8f-9a0b-1c2d3e4f5a6b')
+
+
+class CatalogEntry(NamedTuple):
+    id: str
+    file_name: str
+    content_hash: str
+    size: int
+    mtime_ns: int
+    placeholders: Tuple[str, ...]
+    created_at: str                 # first time this file name was seen
+    updated_at: str                 # last time its content changed
+
+
+class CatalogSnapshot(NamedTuple):
+    """Every entry, sorted by file name, and an ETag that changes whenever any of them does"""
+    entries: Tuple[CatalogEntry, ...]
+    etag: str
+
+
+def template_id(file_name: str) -> str:
+    return str(uuid.uuid5(TEMPLATE_ID_NAMESPACE, file_name))
+
+
+def _snapshot(entries: Dict[str, CatalogEntry]) -> CatalogSnapshot:
+    ordered = tuple(entries[name] for name in sorted(entries))
+    digest = hashlib.sha256(json.dumps([list(entry) for entry in ordered]).encode())
+    return CatalogSnapshot(ordered, digest.hexdigest()[:32])
+
+
+class TemplateCatalog:
+    """
+    Catalog of the .docx files in a registry's directory.
+
+    snapshot() is a lock-free read of the last published state. Scans and
+    uploads rebuild it, and write the JSON file (catalog_path; None keeps the
+    catalog in memory only) only when something actually changed.
+    """
+
+    def __init__(self, catalog_path: Optional[str], registry: TemplateRegistry):
+        self.catalog_path = catalog_path
+        self.registry = registry
+        self._entries: Dict[str, CatalogEntry] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.scans = 0
+        self.compiles = 0
+        self._load()
+        self._snapshot = _snapshot(self._entries)
+
+    def snapshot(self) -> CatalogSnapshot:
+        return self._snapshot
+
+    def get(self, file_name: str) -> Optional[CatalogEntry]:
+        return next((entry for entry in self._snapshot.entries if entry.file_name == file_name), None)
+
+    def refresh(self) -> int:
+        """Bring the catalog in line with the directory. Returns entries added, changed or removed."""
+        with self._lock:
+            try:
+                names = sorted(name for name in os.listdir(self.registry.templates_dir)
+                               if name.lower().endswith('.docx'))
+            except OSError as e:
+                logger.warning("Could not scan templates: %s", e)
+                return 0
+            changes = sum(self._update(name) for name in names)
+            for name in set(self._entries) - set(names):
+                del self._entries[name]
+                changes += 1
+            self.scans += 1
+            if changes:
+                self._publish()
+        return changes
+
+    def update(self, file_name: str) -> Optional[CatalogEntry]:
+        """Re-read one template, e.g. right after it was uploaded; forgets it if the file is gone"""
+        with self._lock:
+            if self._update(file_name):
+                self._publish()
+            return self._entries.get(file_name)
+
+    def _update(self, file_name: str) -> bool:
+        """Refresh one entry in place (lock held); True when it was added, changed or removed"""
+        entry = self._entries.get(file_name)
+        try:
+            stat = os.stat(os.path.join(self.registry.templates_dir, file_name))
+        except OSError:
+            return self._entries.pop(file_name, None) is not None
+        if entry and entry.size == stat.st_size and entry.mtime_ns == stat.st_mtime_ns:
+            return False
+
+        try:
+            model = self.registry.get(file_name)
+        except Exception as e:
+            logger.warning("Skipping template %s: %s", file_name, e)
+            return self._entries.pop(file_name, None) is not None
+        self.compiles += 1
+        now = datetime.now().isoformat()
+        if entry and entry.content_hash == model.content_hash:
+            # touched but not changed: remember the new stat only
+            self._entries[file_name] = entry._replace(size=model.size, mtime_ns=model.mtime_ns)
+        else:
+            self._entries[file_name] = CatalogEntry(
+                id=template_id(file_name),
+                file_name=file_name,
+                content_hash=model.content_hash,
+                size=model.size,
+                mtime_ns=model.mtime_ns,
+                placeholders=tuple(model.placeholders),
+                created_at=entry.created_at if entry else now,
+                updated_at=now,
+            )
+            logger.info("Catalogued template %s: %s placeholders", file_name, len(model.placeholders))
+        return True
+
+    def _publish(self):
+        self._snapshot = _snapshot(self._entries)
+        self._save()
+
+    def _load(self):
+        if not self.catalog_path or not os.path.exists(self.catalog_path):
+            return
+        try:
+            with open(self.catalog_path, encoding='utf-8') as f:
+                stored = json.load(f)
+            if stored.get('format') != CATALOG_FORMAT:
+                return
+            for record in stored['templates']:
+                entry = CatalogEntry(**{**record, 'placeholders': tuple(record['placeholders'])})
+                self._entries[entry.file_name] = entry
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("Ignoring unreadable template catalog %s: %s", self.catalog_path, e)
+            self._entries.clear()
+
+    def _save(self):
+        if not self.catalog_path:
+            return
+        stored = {
+            'format': CATALOG_FORMAT,
+            'templates': [entry._asdict() for entry in self._snapshot.entries],
+        }
+        temp_path = f"{self.catalog_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.catalog_path)), exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(stored, f, indent=1)
+            os.replace(temp_path, self.catalog_path)
+        except OSError as e:
+            logger.warning("Could not store template catalog %s: %s", self.catalog_path, e)
+
+    def start(self, interval: float):
+        """Rescan the directory every `interval` seconds on a background thread"""
+        if interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, args=(interval,), name='template-catalog', daemon=True)
+        self._thread.start()
+
+    def _watch(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Template catalog scan failed")
+
+    def stop(self):
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+
+    def stats(self) -> Dict:
+        snapshot = self._snapshot
+        return {
+            'templates': len(snapshot.entries),
+            'etag': snapshot.etag,
+            'scans': self.scans,
+            'compiles': self.compiles,
+            'path': self.catalog_path,
+        }
@@ -0,0 +1,164 @@
+"""
+Template registry
+Parses each .docx template once and keeps a compiled model of it: placeholder
+list, where every placeholder sits, and a content hash. Models are reused until
+the file's size/mtime changes and its content hash no longer matches.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from docx import Document
+
+from docx_text import iter_paragraphs, iter_story_parts, table_cell_position, W_TBL
+from placeholders import run_at, run_offsets, scan_placeholders
+
+logger = logging.getLogger(__name__)
+
+
+class PlaceholderLocation(NamedTuple):
+    """Where one placeholder occurrence sits in the template"""
+    part: str                                   # zip member, e.g. 'word/document.xml', 'word/header1.xml'
+    paragraph: int                              # index of the w:p within the part, document order
+    container: str                              # 'paragraph' or 'table_cell'
+    cell: Optional[Tuple[int, int, int]]        # (table, row, column) when container == 'table_cell'
+    runs: Tuple[int, int]                       # first and last text run (w:t) the placeholder spans
+    span: Tuple[int, int]                       # character span within the paragraph text
+    style: str                                  # delimiter style, see placeholders.PLACEHOLDER_STYLES
+
+
+class CompiledTemplate(NamedTuple):
+    """Everything request handling needs to know about a template without reopening it"""
+    file_name: str
+    path: str
+    size: int
+    mtime_ns: int
+    content_hash: str                           # sha256 of the .docx bytes
+    placeholders: Tuple[str, ...]               # unique names, order of first appearance
+    locations: Dict[str, Tuple[PlaceholderLocation, ...]]
+    paragraphs: Dict[str, Tuple[int, ...]]      # part -> indexes of paragraphs holding placeholders
+    text: str                                   # plain text, one line per paragraph
+
+
+def hash_bytes(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def compile_template(path: str, content: Optional[bytes] = None) -> CompiledTemplate:
+    """Parse a .docx once and index every placeholder occurrence"""
+    stat = os.stat(path)
+    if content is None:
+        with open(path, 'rb') as f:
+            content = f.read()
+
+    doc = Document(io.BytesIO(content))
+    lines: List[str] = []
+    locations: Dict[str, List[PlaceholderLocation]] = {}
+    paragraphs: Dict[str, List[int]] = {}
+
+    for part_name, root in iter_story_parts(doc):
+        table_index = {table: i for i, table in enumerate(root.iter(W_TBL))}
+        for paragraph in iter_paragraphs(root):
+            texts = paragraph.texts
+            text = ''.join(texts)
+            lines.append(text)
+            matches = list(scan_placeholders(text))
+            if not matches:
+                continue
+            paragraphs.setdefault(part_name, []).append(paragraph.index)
+            offsets = run_offsets(texts)
+            cell = table_cell_position(paragraph.element, table_index)
+            for match in matches:
+                locations.setdefault(match.name, []).append(PlaceholderLocation(
+                    part=part_name,
+                    paragraph=paragraph.index,
+                    container='table_cell' if cell else 'paragraph',
+                    cell=cell,
+                    runs=(run_at(offsets, match.start), run_at(offsets, match.end - 1)),
+                    span=(match.start, match.end),
+                    style=match.style,
+                ))
+
+    return CompiledTemplate(
+        file_name=os.path.basename(path),
+        path=path,
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        content_hash=hash_bytes(content),
+        placeholders=tuple(locations),
+        locations={name: tuple(locs) for name, locs in locations.items()},
+        paragraphs={part: tuple(indexes) for part, indexes in paragraphs.items()},
+        text='\n'.join(lines),
+    )
+
+
+class TemplateRegistry:
+    """
+    Compiled templates for one directory, keyed by file name.
+
+    get() costs one stat() when the file is unchanged. If size or mtime moved,
+    the file is rehashed and only recompiled when the content actually differs.
+    """
+
+    def __init__(self, templates_dir: str):
+        self.templates_dir = templates_dir
+        self._models: Dict[str, CompiledTemplate] = {}
+        self._lock = threading.Lock()
+        self.compiles = 0
+
+    def _path(self, file_name: str) -> str:
+        return os.path.join(self.templates_dir, file_name)
+
+    def get(self, file_name: str) -> CompiledTemplate:
+        """Compiled model for a template file in the directory (FileNotFoundError if missing)"""
+        path = self._path(file_name)
+        stat = os.stat(path)
+        with self._lock:
+            model = self._models.get(file_name)
+        if model and model.size == stat.st_size and model.mtime_ns == stat.st_mtime_ns:
+            return model
+
+        with open(path, 'rb') as f:
+            content = f.read()
+        if model and model.content_hash == hash_bytes(content):
+            # touched but not changed: keep the model, remember the new stat
+            model = model._replace(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        else:
+            model = compile_template(path, content)
+            self.compiles += 1
+            logger.info("Compiled template %s: %s placeholders", file_name, len(model.placeholders))
+
+        with self._lock:
+            self._models[file_name] = model
+        return model
+
+    def list(self) -> List[CompiledTemplate]:
+        """Compiled models for every .docx in the directory, sorted by file name"""
+        models = []
+        for file_name in sorted(os.listdir(self.templates_dir)):
+            if not file_name.lower().endswith('.docx'):
+                continue
+            try:
+                models.append(self.get(file_name))
+            except Exception as e:
+                logger.warning("Skipping template %s: %s", file_name, e)
+        self._forget_missing()
+        return models
+
+    def invalidate(self, file_name: Optional[str] = None):
+        """Drop one compiled model, or all of them"""
+        with self._lock:
+            if file_name is None:
+                self._models.clear()
+            else:
+                self._models.pop(file_name, None)
+
+    def _forget_missing(self):
+        with self._lock:
+            for file_name in list(self._models):
+                if not os.path.exists(self._path(file_name)):
+                    del self._models[file_name]
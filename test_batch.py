@@ -0,0 +1,126 @@
+"""
+Tests for batch generation (/process-batch) and the streamed zip
+"""
+import asyncio
+import io
+import json
+import os
+import sys
+import zipfile
+
+from fastapi.testclient import TestClient
+
+import main
+from libreoffice_pool import ConversionPool
+from output_cache import OutputCache
+from resolution_plans import PlanCache
+from vessel_fields import FIELD_INDEX
+from zip_stream import ZipStream
+
+FAKE_SOFFICE = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'fake_soffice.py')]
+
+
+def test_zip_stream_chunks_form_one_archive(tmp_path):
+    path = tmp_path / 'doc.pdf'
+    path.write_bytes(b'%PDF-1.4 body' * 100)
+    archive = ZipStream()
+    chunks = [archive.add_file(str(path), 'a/doc.pdf'), archive.add_bytes('manifest.json', b'{}'), archive.close()]
+    assert all(chunks)
+    with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as zf:
+        assert zf.namelist() == ['a/doc.pdf', 'manifest.json']
+        assert zf.read('a/doc.pdf') == path.read_bytes()
+
+
+def test_batch_generates_every_pair_and_reports_missing_vessels(tmp_path, monkeypatch):
+    fetched = []
+
+    def fake_vessels(imos):
+        fetched.append(list(imos))
+        return {imo: None if imo == '0000000' else {'imo': imo, 'name': f'MT {imo}'} for imo in imos}
+
+    monkeypatch.setattr(main, 'resolution_plans', PlanCache(str(tmp_path / 'plans'), FIELD_INDEX))
+    monkeypatch.setattr(main, 'output_cache', OutputCache(str(tmp_path / 'outputs'), max_bytes=10 ** 6))
+    monkeypatch.setattr(main, 'get_vessels_data', fake_vessels)
+    monkeypatch.setattr(main, 'convert_docx_to_pdf', lambda docx_path: docx_path)
+    client = TestClient(main.app)
+
+    response = client.post('/process-batch', json={
+        'vessel_imos': ['9123456', '9654321', '0000000', '9123456'],
+        'template_names': ['ICPO TEMPLATE.docx', 'ANALYSIS SGS'],
+        'fill_engine': 'stream',
+    })
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/zip'
+    assert fetched == [['9123456', '9654321', '0000000']]
+
+    with zipfile.ZipFile(io.BytesIO(response.content)) as zf:
+        manifest = json.loads(zf.read('manifest.json'))['documents']
+        names = set(zf.namelist())
+    assert len(manifest) == 6
+    produced = {entry['file'] for entry in manifest if entry['status_code'] == 200}
+    assert produced == {'9123456/ICPO TEMPLATE.docx', '9123456/ANALYSIS SGS.docx',
+                        '9654321/ICPO TEMPLATE.docx', '9654321/ANALYSIS SGS.docx'}
+    assert produced < names
+    assert {entry['status_code'] for entry in manifest if entry['vessel_imo'] == '0000000'} == {404}
+
+
+def test_batch_validation():
+    client = TestClient(main.app)
+    assert client.post('/process-batch', json={'vessel_imos': [], 'template_names': ['x']}).status_code == 422
+    too_many = {'vessel_imos': [str(i) for i in range(main.MAX_BATCH_DOCUMENTS + 1)], 'template_names': ['x']}
+    assert client.post('/process-batch', json=too_many).status_code == 413
+    unknown = {'vessel_imos': ['1'], 'template_names': ['missing']}
+    assert client.post('/process-batch', json=unknown).status_code == 404
+    escaping = {'vessel_imos': ['9123456', '../../x'], 'template_names': ['ICPO TEMPLATE']}
+    assert client.post('/process-batch', json=escaping).status_code == 422
+
+
+def test_batch_template_names_are_normalised_before_deduplicating():
+    _, template_names, _ = main.parse_batch_request({
+        'vessel_imos': ['9123456'], 'template_names': ['ICPO TEMPLATE', 'ICPO TEMPLATE.docx', 'ANALYSIS SGS']})
+    assert template_names == ['ICPO TEMPLATE.docx', 'ANALYSIS SGS.docx']
+
+
+def test_batch_conversions_share_soffice_runs(tmp_path, monkeypatch):
+    # slow soffice start-up: fills finishing during one conversion are converted together in the next
+    monkeypatch.setenv('FAKE_SOFFICE_STARTUP', '0.3')
+    pool = ConversionPool(FAKE_SOFFICE, workers=1, work_dir=str(tmp_path / 'pool'), use_uno=False,
+                          temp_root=str(tmp_path))
+    pool.start()
+    monkeypatch.setattr(main, 'conversion_pool', pool)
+    monkeypatch.setattr(main, 'SCRATCH_DIR', str(tmp_path))
+    monkeypatch.setattr(main, 'resolution_plans', PlanCache(str(tmp_path / 'plans'), FIELD_INDEX))
+    monkeypatch.setattr(main, 'output_cache', OutputCache(None, 0))
+    monkeypatch.setattr(main, 'get_vessels_data', lambda imos: {imo: {'imo': imo} for imo in imos})
+    try:
+        response = TestClient(main.app).post('/process-batch', json={
+            'vessel_imos': ['9000001', '9000002', '9000003'],
+            'template_names': ['ICPO TEMPLATE.docx', 'PERFORMA INVOICE.docx'],
+            'fill_engine': 'stream',
+        })
+        with zipfile.ZipFile(io.BytesIO(response.content)) as zf:
+            manifest = json.loads(zf.read('manifest.json'))['documents']
+        assert all(entry['file'].endswith('.pdf') for entry in manifest) and len(manifest) == 6
+        stats = pool.stats()
+        assert stats['completed'] == 6
+        assert stats['batched_documents'] > 0
+    finally:
+        pool.stop()
+
+
+def test_abandoned_batch_cancels_unfinished_generations(tmp_path):
+    finished = tmp_path / 'finished.pdf'
+    finished.write_bytes(b'%PDF-1.4')
+
+    async def scenario():
+        document = main.GeneratedDocument(str(finished), main.PDF_MEDIA_TYPE, 'doc.pdf')
+        done = asyncio.ensure_future(asyncio.sleep(0, result=main.BatchItem('9000001', 'a', document, 200, None)))
+        slow = asyncio.ensure_future(asyncio.sleep(10))
+        stream = main.stream_batch([done, slow], [])
+        assert await stream.__anext__()
+        await stream.aclose()
+        await asyncio.sleep(0)
+        return slow
+
+    assert asyncio.run(scenario()).cancelled()
+    assert not finished.exists()
@@ -0,0 +1,104 @@
+"""
+Tests for the io/cpu execution lanes
+"""
+import asyncio
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+from executors import ExecutionLane
+
+
+def test_run_respects_lane_limit():
+    lane = ExecutionLane('io', 2)
+    peak = 0
+    current = 0
+    lock = threading.Lock()
+
+    def work():
+        nonlocal peak, current
+        with lock:
+            current += 1
+            peak = max(peak, current)
+        time.sleep(0.02)
+        with lock:
+            current -= 1
+        return True
+
+    async def main():
+        return await asyncio.gather(*(lane.run(work) for _ in range(6)))
+
+    assert all(asyncio.run(main()))
+    assert peak <= 2
+    stats = lane.stats()
+    assert (stats['kind'], stats['completed'], stats['active'], stats['waiting']) == ('thread', 6, 0, 0)
+    lane.shutdown()
+
+
+def test_failures_are_counted_and_raised():
+    lane = ExecutionLane('io', 1)
+
+    def boom():
+        raise ValueError('bad')
+
+    with pytest.raises(ValueError):
+        asyncio.run(lane.run(boom))
+    with pytest.raises(ValueError):
+        lane.call(boom)
+    assert lane.stats()['failed'] == 2
+    lane.shutdown()
+
+
+def test_process_lane_runs_in_worker_process():
+    lane = ExecutionLane('cpu', 1, processes=True)
+    assert lane.call(os.getpid) != os.getpid()
+    assert lane.stats()['kind'] == 'process'
+    lane.shutdown()
+
+
+def test_process_lane_recovers_from_killed_worker():
+    lane = ExecutionLane('cpu', 1, processes=True)
+    worker = lane.call(os.getpid)
+    os.kill(worker, signal.SIGKILL)
+    time.sleep(0.2)
+
+    replacement = lane.call(os.getpid)
+    assert replacement != worker
+    os.kill(replacement, signal.SIGKILL)
+    time.sleep(0.2)
+    assert asyncio.run(lane.run(os.getpid)) not in (worker, replacement)
+    lane.shutdown()
+
+
+def test_document_generation_does_not_hold_io_lane(monkeypatch):
+    import httpx
+    import main
+
+    release = threading.Event()
+
+    def slow_generation(*args):
+        release.wait(5)
+        raise main.HTTPException(status_code=404, detail='done')
+
+    monkeypatch.setattr(main, 'io_lane', ExecutionLane('io', 1))
+    monkeypatch.setattr(main, 'render_lane', ExecutionLane('render', 2))
+    monkeypatch.setattr(main, 'generate_document', slow_generation)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            body = {'template_name': 'ICPO TEMPLATE.docx', 'vessel_imo': '9123456'}
+            generations = [asyncio.ensure_future(client.post('/process-document', json=body)) for _ in range(2)]
+            await asyncio.sleep(0.1)
+            quick = await asyncio.wait_for(client.get('/plans/stats'), 2)
+            release.set()
+            return quick, await asyncio.gather(*generations)
+
+    quick, generations = asyncio.run(scenario())
+    assert quick.status_code == 200
+    assert [response.status_code for response in generations] == [404, 404]
+    main.io_lane.shutdown()
+    main.render_lane.shutdown()
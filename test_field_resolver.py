@@ -0,0 +1,70 @@
+"""
+Tests for the indexed placeholder -> field resolver
+"""
+import time
+
+from field_resolver import EXACT, GENERATED, PARTIAL, FieldIndex, normalize_key
+
+KEYS = [
+    'vessel_name', 'name', 'imo', 'call_sign', 'callsign', 'owner_name', 'buyer', 'buyer_name',
+    'seller_name', 'cargo_type', 'loading_port', 'port_loading', 'deal_value', 'buyer_bank_name',
+    'buyer_bank_swift', 'seller_address', 'confirming_bank_name', 'date', 'issue_date', 'tel', 'email',
+]
+
+
+def scan_resolve(keys, placeholder):
+    """The previous front-to-back scan over every key"""
+    name = normalize_key(placeholder)
+    for key in keys:
+        if normalize_key(key) == name:
+            return key, EXACT
+    for key in keys:
+        key_name = normalize_key(key)
+        if (name in key_name and len(name) >= 4) or (key_name in name and len(key_name) >= 4):
+            if not any(word in name for word in ('bank', 'company', 'name', 'address')) or \
+               any(word in key_name for word in ('bank', 'company', 'name', 'address')):
+                return key, PARTIAL
+    return None, GENERATED
+
+
+def test_matches_the_linear_scan():
+    index = FieldIndex(KEYS)
+    placeholders = [
+        'Vessel Name', 'CALL-SIGN', 'imo_number', 'buyer_company_name', 'buyer_bank', 'bank_swift',
+        'seller_full_address', 'port', 'loading', 'deal_value_usd', 'issue_date_2', 'buyer_tel',
+        'sellers_email', 'xyz', 'vessel', 'confirming_bank', 'cargo', 'date_of_loading_port',
+    ]
+    for placeholder in placeholders:
+        resolution = index.resolve(placeholder)
+        assert (resolution.key, resolution.kind) == scan_resolve(KEYS, placeholder), placeholder
+
+
+def test_first_listed_key_wins():
+    index = FieldIndex(['callsign', 'call_sign'])
+    assert index.resolve('call sign').key == 'callsign'
+    assert FieldIndex(['port_loading', 'loading_port']).resolve('loading').key == 'port_loading'
+
+
+def test_large_template_resolves_quickly():
+    keys = [f'field_{i}_value' for i in range(250)] + KEYS
+    placeholders = [f'field_{i}_value_x' for i in range(200)]
+    index = FieldIndex(keys)
+    start = time.perf_counter()
+    resolutions = index.resolve_all(placeholders)
+    assert all(r.kind == PARTIAL for r in resolutions)
+    assert time.perf_counter() - start < 0.05
+    start = time.perf_counter()
+    index.resolve_all(placeholders)
+    assert time.perf_counter() - start < 0.005
+
+
+def test_vessel_fields_are_computed_on_demand():
+    from vessel_fields import FIELD_INDEX, VesselFields
+
+    fields = VesselFields({'imo': '9123456', 'gross_tonnage': 1000, 'name': 'MT Test'}, '9123456')
+    resolutions = FIELD_INDEX.resolve_all(['vessel_name', 'net_tonnage', 'Buyer Email'])
+    values = [fields.get(r.key) for r in resolutions]
+    assert values[:2] == ['MT Test', '700']
+    assert '@' in values[2]
+    assert fields.evaluated == 3
+    assert fields.get(None) is None
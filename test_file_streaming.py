@@ -0,0 +1,80 @@
+"""
+Tests for chunked file responses and byte ranges
+"""
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from file_streaming import ByteRange, RangeNotSatisfiable, iter_file, parse_range
+from output_cache import OutputCache
+from resolution_plans import PlanCache
+from vessel_fields import FIELD_INDEX
+
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range('bytes=0-9', 100) == ByteRange(0, 9)
+    assert parse_range('bytes=90-', 100) == ByteRange(90, 99)
+    assert parse_range('bytes=90-500', 100) == ByteRange(90, 99)
+    assert parse_range('bytes=-10', 100) == ByteRange(90, 99)
+    assert parse_range('bytes=-500', 100) == ByteRange(0, 99)
+    for whole_file in ('bytes=0-1,5-6', 'items=0-1', 'bytes=a-b', 'bytes=9-3'):
+        assert parse_range(whole_file, 100) is None
+    for unsatisfiable in ('bytes=100-', 'bytes=-0'):
+        with pytest.raises(RangeNotSatisfiable):
+            parse_range(unsatisfiable, 100)
+
+
+def test_iter_file_reads_in_chunks(tmp_path):
+    path = tmp_path / 'doc.pdf'
+    path.write_bytes(bytes(range(256)) * 4)
+    chunks = list(iter_file(str(path), 10, 300, chunk_size=128))
+    assert [len(chunk) for chunk in chunks] == [128, 128, 44]
+    assert b''.join(chunks) == path.read_bytes()[10:310]
+
+
+def test_process_document_streams_ranges_and_removes_the_file(tmp_path, monkeypatch):
+    body = b'%PDF-1.4 ' + b'x' * 200_000
+    generated = []
+
+    def fake_generate(template_name, vessel_imo, fill_engine):
+        path = tmp_path / f'out{len(generated)}.pdf'
+        path.write_bytes(body)
+        generated.append(str(path))
+        return main.GeneratedDocument(str(path), main.PDF_MEDIA_TYPE, 'processed.pdf', 'abc123')
+
+    monkeypatch.setattr(main, 'generate_document', fake_generate)
+    client = TestClient(main.app)
+    request = {'template_name': 'ICPO TEMPLATE.docx', 'vessel_imo': '9123456'}
+
+    full = client.post('/process-document', json=request)
+    assert (full.status_code, full.content) == (200, body)
+    assert (full.headers['accept-ranges'], full.headers['content-length']) == ('bytes', str(len(body)))
+
+    tail = client.post('/process-document', json=request, headers={'Range': 'bytes=100000-'})
+    assert (tail.status_code, tail.content) == (206, body[100000:])
+    assert tail.headers['content-range'] == f'bytes 100000-{len(body) - 1}/{len(body)}'
+
+    stale = client.post('/process-document', json=request, headers={'Range': 'bytes=0-9', 'If-Range': '"old"'})
+    assert (stale.status_code, len(stale.content)) == (200, len(body))
+    assert client.post('/process-document', json=request, headers={'Range': 'bytes=999999-'}).status_code == 416
+    assert not any(os.path.exists(path) for path in generated)
+
+
+def test_docx_fallback_is_served_from_memory(tmp_path, monkeypatch):
+    scratch = tmp_path / 'scratch'
+    scratch.mkdir()
+    monkeypatch.setattr(main, 'SCRATCH_DIR', str(scratch))
+    monkeypatch.setattr(main, 'resolution_plans', PlanCache(str(tmp_path / 'plans'), FIELD_INDEX))
+    monkeypatch.setattr(main, 'output_cache', OutputCache(str(tmp_path / 'outputs'), max_bytes=10 ** 6))
+    monkeypatch.setattr(main, 'convert_docx_to_pdf', lambda docx_path: docx_path)
+    monkeypatch.setattr(main, 'get_vessel_data', lambda imo: {'imo': imo, 'name': 'MT MEMORY'})
+    client = TestClient(main.app)
+
+    response = client.post('/process-document', json={'template_name': 'ICPO TEMPLATE.docx', 'vessel_imo': '9123456'})
+    assert response.status_code == 200
+    assert response.headers['content-type'] == main.DOCX_MEDIA_TYPE
+    assert response.content.startswith(b'PK')
+    assert os.listdir(scratch) == []        # the conversion hand-off file is gone too
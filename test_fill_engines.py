@@ -0,0 +1,132 @@
+"""
+Tests for the placeholder fill engine(s)
+"""
+import glob
+import io
+import os
+import zipfile
+
+import pytest
+from docx import Document
+
+from docx_text import fill_document, iter_paragraphs, iter_story_parts
+import ooxml_stream
+from ooxml_stream import fill_docx_stream
+from placeholders import substitute_runs
+from template_registry import compile_template
+
+TEMPLATES = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', '*.docx')))
+
+
+def fill_with_docx(path, values):
+    doc = Document(path)
+    replacements = fill_document(doc, values)
+    output = io.BytesIO()
+    doc.save(output)
+    return output, replacements
+
+
+def fill_with_stream(path, values):
+    output = io.BytesIO()
+    replacements = fill_docx_stream(path, output, values)
+    return output, replacements
+
+
+def story_texts(source):
+    doc = Document(source)
+    return {part: [p.text for p in iter_paragraphs(root)] for part, root in iter_story_parts(doc)}
+
+
+def test_substitute_runs_handles_split_placeholders():
+    texts = ['Buyer: {buy', 'er_na', 'me} / [seller]', '']
+    new_texts, count = substitute_runs(texts, {'buyer_name': 'Shell', 'seller': 'Aramco'})
+    assert count == 2
+    assert new_texts == ['Buyer: Shell', '', ' / Aramco', '']
+
+
+def test_substitute_runs_leaves_unknown_placeholders():
+    texts = ['{known} {unknown}']
+    assert substitute_runs(texts, {'known': 'x'}) == (['x {unknown}'], 1)
+    assert substitute_runs(texts, {}) == (None, 0)
+
+
+def test_fill_document_keeps_run_formatting():
+    doc = Document()
+    paragraph = doc.add_paragraph('Vessel: ')
+    bold = paragraph.add_run('{vessel')
+    bold.bold = True
+    paragraph.add_run('_name} (IMO {imo})')
+    table = doc.add_table(rows=1, cols=1)
+    table.cell(0, 0).text = '[[Buyer Name]]'
+
+    replacements = fill_document(doc, {'vessel_name': 'MT Star', 'imo': '9123456', 'Buyer_Name': 'BP'})
+
+    assert replacements == 3
+    assert paragraph.text == 'Vessel: MT Star (IMO 9123456)'
+    assert [run.bold for run in paragraph.runs] == [None, True, None]
+    assert paragraph.runs[1].text == 'MT Star'
+    assert table.cell(0, 0).text == 'BP'
+
+
+@pytest.mark.parametrize('fill', [fill_with_docx, fill_with_stream])
+def test_engines_fill_split_and_escaped_text(fill, tmp_path):
+    doc = Document()
+    paragraph = doc.add_paragraph('Seller: {sel')
+    paragraph.add_run('ler} & <Co> ')
+    paragraph.add_run('[[Buyer Name]]').bold = True
+    doc.sections[0].header.paragraphs[0].text = 'Ref ##ref##'
+    path = str(tmp_path / 'template.docx')
+    doc.save(path)
+
+    output, replacements = fill(path, {'seller': 'A & B <Ltd>', 'Buyer_Name': ' BP ', 'ref': 'R-1'})
+
+    assert replacements == 3
+    result = Document(output)
+    assert result.paragraphs[0].text == 'Seller: A & B <Ltd> & <Co>  BP '
+    assert result.paragraphs[0].runs[-1].bold
+    assert result.sections[0].header.paragraphs[0].text == 'Ref R-1'
+
+
+@pytest.mark.parametrize('path', TEMPLATES, ids=os.path.basename)
+def test_engines_are_equivalent_on_bundled_templates(path):
+    model = compile_template(path)
+    values = {name: f'<{i}> & value {i}' for i, name in enumerate(model.placeholders)}
+
+    docx_output, docx_replacements = fill_with_docx(path, values)
+    stream_output, stream_replacements = fill_with_stream(path, values)
+
+    expected = story_texts(docx_output)
+    assert stream_replacements == docx_replacements > 0
+    assert story_texts(stream_output) == expected
+
+    # Everything but the rewritten parts is copied through untouched, still compressed
+    with zipfile.ZipFile(path) as original, zipfile.ZipFile(stream_output) as streamed:
+        assert streamed.testzip() is None
+        assert streamed.namelist() == original.namelist()
+        for info in original.infolist():
+            if info.filename in expected:
+                continue
+            copied = streamed.getinfo(info.filename)
+            assert (copied.CRC, copied.compress_size, copied.compress_type) == \
+                   (info.CRC, info.compress_size, info.compress_type)
+
+
+def test_stream_engine_is_independent_of_chunk_size(monkeypatch):
+    path = TEMPLATES[0]
+    values = {name: 'X' for name in compile_template(path).placeholders}
+    expected = story_texts(fill_with_stream(path, values)[0])
+
+    monkeypatch.setattr(ooxml_stream, 'CHUNK_SIZE', 97)   # cuts through tags and multi-byte characters
+    assert story_texts(fill_with_stream(path, values)[0]) == expected
+
+
+@pytest.mark.parametrize('engine', ['docx', 'stream'])
+def test_fill_docx_bytes_matches_file_output(engine, tmp_path):
+    from docx_text import fill_docx_bytes, fill_docx_file
+
+    path = TEMPLATES[0]
+    values = {name: f'VALUE {i}' for i, name in enumerate(compile_template(path).placeholders)}
+    content, replacements = fill_docx_bytes(path, values, engine)
+    on_disk = tmp_path / 'filled.docx'
+    assert fill_docx_file(path, str(on_disk), values, engine) == replacements
+    assert story_texts(io.BytesIO(content)) == story_texts(str(on_disk))
@@ -0,0 +1,92 @@
+"""
+Tests for the background job queue and the /jobs endpoints
+"""
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import main
+from jobs import FAILED, SUCCEEDED, JobManager, QueueFull
+
+
+def wait_for(job, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not job.done and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+def test_job_records_result_and_stage_timings():
+    manager = JobManager(workers=2)
+
+    def work(value, timings):
+        with timings.stage('load'):
+            time.sleep(0.02)
+        with timings.stage('render'):
+            return value * 2
+
+    job = wait_for(manager.submit(work, 21, params={'value': 21}))
+    assert (job.status, job.result) == (SUCCEEDED, 42)
+    assert job.timings['load'] >= 0.02 and 'render' in job.timings
+    stats = manager.stats()
+    assert (stats['succeeded'], stats['stages']['load']['count']) == (1, 1)
+    manager.shutdown()
+
+
+def test_job_failures_keep_http_status():
+    manager = JobManager(error_status=main.job_error_status)
+
+    def missing(timings):
+        raise HTTPException(status_code=404, detail='Vessel with IMO 1 not found')
+
+    job = wait_for(manager.submit(missing))
+    assert (job.status, job.status_code, job.error) == (FAILED, 404, 'Vessel with IMO 1 not found')
+    manager.shutdown()
+
+
+def test_submit_rejects_beyond_max_pending_and_expires_old_jobs():
+    release = threading.Event()
+    expired = []
+    manager = JobManager(workers=1, max_pending=2, retention_seconds=0, on_expire=expired.append)
+
+    def blocked(timings):
+        release.wait(5)
+
+    first, second = manager.submit(blocked), manager.submit(blocked)
+    assert manager.stats()['queue_depth'] + manager.stats()['running'] == 2
+    with pytest.raises(QueueFull):
+        manager.submit(blocked)
+
+    release.set()
+    wait_for(first), wait_for(second)
+    assert manager.get(first.id) is None
+    assert {job.id for job in expired} == {first.id, second.id}
+    manager.shutdown()
+
+
+def test_jobs_endpoints_poll_and_stream_result(tmp_path, monkeypatch):
+    def fake_generate(template_name, vessel_imo, fill_engine, timings):
+        path = tmp_path / 'out.pdf'
+        path.write_bytes(b'%PDF-1.4 ' + vessel_imo.encode())
+        timings['fill'] = 0.01
+        return main.GeneratedDocument(str(path), main.PDF_MEDIA_TYPE, 'processed.pdf')
+
+    monkeypatch.setattr(main, 'generate_document', fake_generate)
+    client = TestClient(main.app)
+
+    response = client.post('/jobs', json={'template_name': 'ICPO TEMPLATE.docx', 'vessel_imo': '9123456'})
+    assert response.status_code == 202
+    job_id = response.json()['job_id']
+
+    wait_for(main.job_manager.get(job_id))
+    status = client.get(f'/jobs/{job_id}').json()
+    assert (status['status'], status['stages']) == ('succeeded', {'fill': 0.01})
+    result = client.get(f'/jobs/{job_id}/result')
+    assert (result.status_code, result.content) == (200, b'%PDF-1.4 9123456')
+    assert client.get('/jobs/stats').json()['succeeded'] >= 1
+
+    assert client.post('/jobs', json={'template_name': 'missing', 'vessel_imo': '1'}).status_code == 404
+    assert client.get('/jobs/unknown').status_code == 404
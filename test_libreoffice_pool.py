@@ -0,0 +1,137 @@
+"""
+Tests for the LibreOffice conversion worker pool, run against benchmarks/fake_soffice.py
+"""
+import os
+import sys
+import time
+from concurrent.futures import wait
+
+import pytest
+
+from libreoffice_pool import ConversionError, ConversionPool, ConversionTimeout, PoolSaturated, find_libreoffice
+
+FAKE_SOFFICE = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'fake_soffice.py')]
+
+
+def make_docs(tmp_path, *names):
+    paths = []
+    for name in names:
+        path = tmp_path / f'{name}.docx'
+        path.write_bytes(b'docx bytes')
+        paths.append(str(path))
+    return paths
+
+
+def make_pool(tmp_path, **kwargs):
+    pool = ConversionPool(FAKE_SOFFICE, work_dir=str(tmp_path / 'pool'), use_uno=False, **kwargs)
+    pool.start()
+    return pool
+
+
+def test_find_libreoffice_checks_configured_path_first(tmp_path):
+    binary = tmp_path / 'soffice'
+    binary.write_text('#!/bin/sh\n')
+    binary.chmod(0o755)
+    assert find_libreoffice(str(binary), candidates=()) == str(binary)
+    assert find_libreoffice(str(tmp_path / 'missing'), candidates=()) is None
+
+
+def test_pool_converts_in_parallel(tmp_path, monkeypatch):
+    monkeypatch.setenv('FAKE_SOFFICE_STARTUP', '0.5')
+    pool = make_pool(tmp_path, workers=4)
+    try:
+        docs = make_docs(tmp_path, 'a', 'b', 'c', 'd')
+        start = time.perf_counter()
+        futures = [pool.submit(doc, doc[:-5] + '.pdf') for doc in docs]
+        wait(futures)
+        elapsed = time.perf_counter() - start
+        for doc, future in zip(docs, futures):
+            assert future.result() == doc[:-5] + '.pdf'
+            assert open(future.result(), 'rb').read().startswith(b'%PDF')
+        assert elapsed < 1.5    # four 0.5s jobs side by side, not back to back
+        assert pool.stats()['completed'] == 4
+    finally:
+        pool.stop()
+
+
+def test_pool_times_out_and_keeps_serving(tmp_path):
+    pool = make_pool(tmp_path, workers=1, job_timeout=0.5)
+    try:
+        hang, ok = make_docs(tmp_path, 'hang', 'ok')
+        with pytest.raises(ConversionTimeout):
+            pool.convert(hang, str(tmp_path / 'hang.pdf'))
+        assert pool.convert(ok, str(tmp_path / 'ok.pdf')) == str(tmp_path / 'ok.pdf')
+        stats = pool.stats()
+        assert (stats['timeouts'], stats['completed']) == (1, 1)
+    finally:
+        pool.stop()
+
+
+def test_pool_reports_failures_and_rejects_when_full(tmp_path, monkeypatch):
+    monkeypatch.setenv('FAKE_SOFFICE_STARTUP', '0.3')
+    pool = make_pool(tmp_path, workers=1, queue_size=1)
+    try:
+        crash, first, second, third = make_docs(tmp_path, 'crash', 'first', 'second', 'third')
+        with pytest.raises(ConversionError):
+            pool.convert(crash, str(tmp_path / 'crash.pdf'))
+
+        running = pool.submit(first, str(tmp_path / 'first.pdf'))
+        time.sleep(0.1)     # let the worker pick it up
+        queued = pool.submit(second, str(tmp_path / 'second.pdf'))
+        with pytest.raises(PoolSaturated):
+            pool.submit(third, str(tmp_path / 'third.pdf'))
+        wait([running, queued])
+        assert pool.stats()['rejected'] == 1
+    finally:
+        pool.stop()
+
+
+def test_queued_documents_share_one_soffice_run(tmp_path, monkeypatch):
+    monkeypatch.setenv('FAKE_SOFFICE_STARTUP', '0.5')
+    pool = make_pool(tmp_path, workers=1, max_batch_size=8)
+    try:
+        docs = make_docs(tmp_path, *'abcdef')
+        start = time.perf_counter()
+        futures = pool.submit_many([(doc, doc[:-5] + '.pdf') for doc in docs])
+        assert [future.result() for future in futures] == [doc[:-5] + '.pdf' for doc in docs]
+        assert time.perf_counter() - start < 1.5    # one startup for six documents
+        stats = pool.stats()
+        assert (stats['batches'], stats['batched_documents'], stats['completed']) == (1, 6, 6)
+    finally:
+        pool.stop()
+
+
+def test_batch_maps_results_back_when_file_names_repeat(tmp_path):
+    pool = make_pool(tmp_path, workers=1)
+    try:
+        paths = []
+        for folder, body in (('one', b'short'), ('two', b'a longer body')):
+            (tmp_path / folder).mkdir()
+            doc = tmp_path / folder / 'contract.docx'
+            doc.write_bytes(body)
+            paths.append((str(doc), str(tmp_path / f'{folder}.pdf')))
+        for future, (_, pdf_path), size in zip(pool.submit_many(paths), paths, (5, 13)):
+            assert future.result() == pdf_path
+            assert f'({size} bytes)'.encode() in open(pdf_path, 'rb').read()
+    finally:
+        pool.stop()
+
+
+def test_batch_failures_stay_with_their_document(tmp_path):
+    pool = make_pool(tmp_path, workers=1, job_timeout=1.0)
+    try:
+        docs = make_docs(tmp_path, 'good1', 'broken', 'good2', 'crash', 'hang', 'good3')
+        futures = pool.submit_many([(doc, doc[:-5] + '.pdf') for doc in docs])
+        outcomes = {}
+        for doc, future in zip(docs, futures):
+            try:
+                outcomes[os.path.basename(doc)[:-5]] = future.result()
+            except ConversionError as e:
+                outcomes[os.path.basename(doc)[:-5]] = type(e)
+        assert outcomes['good1'].endswith('good1.pdf') and outcomes['good3'].endswith('good3.pdf')
+        assert outcomes['good2'].endswith('good2.pdf')
+        assert outcomes['broken'] is ConversionError and outcomes['crash'] is ConversionError
+        assert outcomes['hang'] is ConversionTimeout
+        assert pool.stats()['retried'] == 6     # the crash took the whole shared run down
+    finally:
+        pool.stop()
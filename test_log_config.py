@@ -0,0 +1,69 @@
+"""
+Tests for the queued, leveled logging setup
+"""
+import io
+import json
+import logging
+
+import pytest
+
+from log_config import JsonFormatter, SamplingFilter, configure_logging
+
+
+class Expensive:
+    """Counts how often it is rendered into a message"""
+    renders = 0
+
+    def __str__(self):
+        Expensive.renders += 1
+        return 'expensive'
+
+
+@pytest.fixture
+def restore_root():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def test_records_are_formatted_off_thread_and_only_when_enabled(restore_root):
+    stream = io.StringIO()
+    listener = configure_logging('INFO', 'json', handler=logging.StreamHandler(stream))
+    log = logging.getLogger('test.pipeline')
+    Expensive.renders = 0
+
+    log.debug('skipped %s', Expensive())
+    log.info('kept %s', Expensive(), extra={'vessel_imo': '9123456'})
+    listener.stop()
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [(line['level'], line['message'], line['vessel_imo']) for line in lines] == \
+        [('INFO', 'kept expensive', '9123456')]
+    assert Expensive.renders == 1
+
+
+def test_sampling_keeps_one_in_n_and_every_warning():
+    sampler = SamplingFilter(every=3)
+
+    def record(level):
+        return logging.LogRecord('pipeline', level, __file__, 1, 'message', None, None)
+
+    kept = [sampler.filter(record(logging.INFO)) for _ in range(9)]
+    assert kept.count(True) == 3
+    assert all(sampler.filter(record(logging.WARNING)) for _ in range(5))
+
+
+def test_json_formatter_includes_exceptions():
+    try:
+        raise ValueError('boom')
+    except ValueError:
+        import sys
+        record = logging.LogRecord('main', logging.ERROR, __file__, 1, 'failed %s', ('x',), sys.exc_info())
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry['message'] == 'failed x'
+    assert 'ValueError: boom' in entry['exc_info']
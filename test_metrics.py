@@ -0,0 +1,70 @@
+"""
+Tests for the Prometheus metrics registry and /metrics
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from metrics import MetricsRegistry
+from output_cache import OutputCache
+from resolution_plans import PlanCache
+from vessel_fields import FIELD_INDEX
+
+
+def test_counter_and_histogram_exposition():
+    registry = MetricsRegistry()
+    documents = registry.counter('documents_total', 'Documents', ('format',))
+    latency = registry.histogram('stage_seconds', 'Stage time', ('stage',), buckets=(0.1, 1.0))
+    registry.callback('queue_depth', 'Waiting', 'gauge', lambda: {(): 3})
+
+    documents.inc(format='pdf')
+    documents.inc(2, format='docx')
+    for seconds in (0.05, 0.1, 0.5, 4.0):
+        latency.observe(seconds, stage='fill')
+
+    lines = registry.render().splitlines()
+    assert '# TYPE documents_total counter' in lines
+    assert 'documents_total{format="docx"} 2' in lines
+    assert 'documents_total{format="pdf"} 1' in lines
+    assert 'stage_seconds_bucket{stage="fill",le="0.1"} 2' in lines
+    assert 'stage_seconds_bucket{stage="fill",le="1.0"} 3' in lines
+    assert 'stage_seconds_bucket{stage="fill",le="+Inf"} 4' in lines
+    assert 'stage_seconds_sum{stage="fill"} 4.65' in lines
+    assert 'stage_seconds_count{stage="fill"} 4' in lines
+    assert 'queue_depth 3' in lines
+
+    with pytest.raises(ValueError):
+        documents.inc(template='x')
+    with pytest.raises(ValueError):
+        registry.counter('documents_total', 'again')
+
+
+def test_failing_callback_does_not_break_the_scrape():
+    registry = MetricsRegistry()
+    registry.callback('broken', 'Raises', 'gauge', lambda: 1 / 0)
+    registry.counter('fine_total', 'Still rendered').inc()
+    assert 'fine_total 1' in registry.render()
+
+
+def test_metrics_endpoint_reports_stages_formats_and_fallbacks(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, 'resolution_plans', PlanCache(str(tmp_path / 'plans'), FIELD_INDEX))
+    monkeypatch.setattr(main, 'output_cache', OutputCache(str(tmp_path / 'outputs'), max_bytes=10 ** 6))
+    monkeypatch.setattr(main, 'convert_docx_to_pdf', lambda docx_path: docx_path)
+    monkeypatch.setattr(main, 'get_vessel_data', lambda imo: {'imo': imo, 'name': 'MT METRICS'})
+    template = 'ICPO TEMPLATE.docx'
+    before = main.documents_generated.value(template=template, format='docx', source='rendered')
+    stages_before = main.stage_seconds.count(template=template, stage='fill')
+
+    client = TestClient(main.app)
+    assert client.post('/process-document', json={'template_name': template, 'vessel_imo': '9123456'}).status_code == 200
+    assert client.post('/process-document', json={'template_name': 'missing', 'vessel_imo': '1'}).status_code == 404
+
+    assert main.documents_generated.value(template=template, format='docx', source='rendered') == before + 1
+    assert main.stage_seconds.count(template=template, stage='fill') == stages_before + 1
+    response = client.get('/metrics')
+    assert response.headers['content-type'].startswith('text/plain; version=0.0.4')
+    body = response.text
+    for stage in ('vessel', 'template', 'mapping', 'cache', 'fill', 'convert'):
+        assert f'document_stage_seconds_count{{template="{template}",stage="{stage}"}}' in body
+    assert 'document_generation_failures_total{status="404"}' in body
+    assert 'cache_lookups_total{cache="output",result="miss"}' in body
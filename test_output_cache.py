@@ -0,0 +1,83 @@
+"""
+Tests for the content-addressed output cache and the ETag handling on /process-document
+"""
+import os
+
+from fastapi.testclient import TestClient
+
+import main
+from output_cache import OutputCache, output_key
+from resolution_plans import PlanCache
+from vessel_fields import FIELD_INDEX
+
+
+def write(path, size):
+    path.write_bytes(b'x' * size)
+    return str(path)
+
+
+def test_key_covers_template_values_and_format():
+    key = output_key('abc', {'buyer': 'ACME', 'imo': '1'}, 'pdf/docx')
+    assert key == output_key('abc', {'imo': '1', 'buyer': 'ACME'}, 'pdf/docx')
+    assert key != output_key('abd', {'buyer': 'ACME', 'imo': '1'}, 'pdf/docx')
+    assert key != output_key('abc', {'buyer': 'ACME', 'imo': '2'}, 'pdf/docx')
+    assert key != output_key('abc', {'buyer': 'ACME', 'imo': '1'}, 'pdf/stream')
+
+
+def test_fetch_store_and_hit_ratio(tmp_path):
+    cache = OutputCache(str(tmp_path / 'cache'), max_bytes=1000)
+    destination = str(tmp_path / 'out.pdf')
+    assert not cache.fetch('k1', destination)
+    cache.store('k1', write(tmp_path / 'generated.pdf', 100))
+    os.remove(tmp_path / 'generated.pdf')
+    assert cache.fetch('k1', destination)
+    assert os.path.getsize(destination) == 100
+    os.remove(destination)      # the caller owns its copy
+    assert cache.fetch('k1', destination)
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_ratio'], stats['entries']) == (2, 1, 0.6667, 1)
+
+
+def test_evicts_least_recently_used_and_survives_restart(tmp_path):
+    cache = OutputCache(str(tmp_path / 'cache'), max_bytes=250)
+    for key in ('a', 'b'):
+        cache.store(key, write(tmp_path / f'{key}.pdf', 100))
+    assert cache.fetch('a', str(tmp_path / 'a-copy.pdf'))
+    cache.store('c', write(tmp_path / 'c.pdf', 100))
+    assert cache.stats()['evictions'] == 1
+    assert not cache.fetch('b', str(tmp_path / 'b-copy.pdf'))
+
+    restarted = OutputCache(str(tmp_path / 'cache'), max_bytes=250)
+    assert (restarted.stats()['entries'], restarted.stats()['bytes']) == (2, 200)
+    assert restarted.fetch('c', str(tmp_path / 'c-copy.pdf'))
+    assert OutputCache(str(tmp_path / 'off'), max_bytes=0).stats()['enabled'] is False
+
+
+def test_repeated_request_is_served_from_cache_with_etag(tmp_path, monkeypatch):
+    conversions = []
+
+    def fake_convert(docx_path):
+        conversions.append(docx_path)
+        pdf_path = docx_path[:-5] + '.pdf'
+        with open(pdf_path, 'wb') as f:
+            f.write(b'%PDF-1.4 converted')
+        return pdf_path
+
+    monkeypatch.setattr(main, 'resolution_plans', PlanCache(str(tmp_path / 'plans'), FIELD_INDEX))
+    monkeypatch.setattr(main, 'output_cache', OutputCache(str(tmp_path / 'outputs'), max_bytes=10 ** 6))
+    monkeypatch.setattr(main, 'convert_docx_to_pdf', fake_convert)
+    monkeypatch.setattr(main, 'get_vessel_data', lambda imo: {'imo': imo, 'name': 'MT CACHE'})
+    client = TestClient(main.app)
+    body = {'template_name': 'ICPO TEMPLATE.docx', 'vessel_imo': '9123456'}
+
+    first = client.post('/process-document', json=body)
+    assert first.status_code == 200 and first.headers['etag']
+    second = client.post('/process-document', json=body)
+    assert (second.content, second.headers['etag']) == (first.content, first.headers['etag'])
+    assert len(conversions) == 1
+
+    unchanged = client.post('/process-document', json=body, headers={'If-None-Match': first.headers['etag']})
+    assert (unchanged.status_code, unchanged.content) == (304, b'')
+    other = client.post('/process-document', json={**body, 'vessel_imo': '9654321'})
+    assert other.headers['etag'] != first.headers['etag']
+    assert client.get('/outputs/stats').json()['outputs']['hit_ratio'] == 0.5
@@ -0,0 +1,34 @@
+"""
+Tests for the single-pass placeholder scanner
+"""
+from placeholders import find_placeholders, scan_placeholders
+
+
+def test_every_delimiter_style_in_one_pass():
+    text = "{{a}} {b} [[c]] [d] %e% <f> __g__ ##h##"
+    matches = list(scan_placeholders(text))
+    assert [m.name for m in matches] == list('abcdefgh')
+    assert [m.style for m in matches] == [
+        'double_brace', 'brace', 'double_bracket', 'bracket',
+        'percent', 'angle', 'double_underscore', 'double_hash',
+    ]
+    assert text[matches[2].start:matches[2].end] == '[[c]]'
+
+
+def test_names_are_cleaned_and_deduplicated_in_order():
+    text = "{Buyer Name} and {seller} then {Buyer Name} again\n{ seller }"
+    assert find_placeholders(text) == ['Buyer_Name', 'seller']
+
+
+def test_delimiters_do_not_swallow_each_other():
+    text = "Signature: ____ {buyer_signature} ____\nDensity 5% {density}\n{a\nb}"
+    assert find_placeholders(text) == ['buyer_signature', 'density']
+
+
+def test_large_template_scans_quickly():
+    import time
+    text = "\n".join(f"Field {i}: {{field_{i}}} [[other_{i}]]" for i in range(20000))
+    start = time.perf_counter()
+    names = find_placeholders(text)
+    assert len(names) == 40000
+    assert time.perf_counter() - start < 2.0
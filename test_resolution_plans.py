@@ -0,0 +1,45 @@
+"""
+Tests for the per-template resolution plan cache
+"""
+import os
+
+from field_resolver import FieldIndex
+from resolution_plans import PlanCache
+from template_registry import compile_template
+from vessel_fields import FIELD_INDEX
+
+ICPO = os.path.join(os.path.dirname(__file__), 'templates', 'ICPO TEMPLATE.docx')
+
+
+def test_plan_is_built_once_and_survives_restart(tmp_path):
+    model = compile_template(ICPO)
+    plans = PlanCache(str(tmp_path), FIELD_INDEX)
+    plan = plans.get(model)
+    assert plan.resolutions == FIELD_INDEX.resolve_all(model.placeholders)
+    assert plans.get(model) is plan
+    assert (plans.stats()['compiles'], plans.stats()['hits'], plans.stats()['on_disk']) == (1, 1, 1)
+
+    restarted = PlanCache(str(tmp_path), FIELD_INDEX)
+    assert restarted.get(model).resolutions == plan.resolutions
+    assert (restarted.stats()['disk_loads'], restarted.stats()['compiles']) == (1, 0)
+
+
+def test_invalidate_drops_memory_and_disk(tmp_path):
+    model = compile_template(ICPO)
+    plans = PlanCache(str(tmp_path), FIELD_INDEX)
+    plans.get(model)
+    assert plans.invalidate('other.docx') == 0
+    assert plans.invalidate(model.file_name) == 1
+    assert plans.stats()['entries'] == plans.stats()['on_disk'] == 0
+    plans.get(model)
+    assert plans.stats()['compiles'] == 2
+
+
+def test_changed_fields_get_a_new_plan(tmp_path):
+    model = compile_template(ICPO)
+    plans = PlanCache(str(tmp_path), FIELD_INDEX)
+    plans.get(model)
+    other = PlanCache(str(tmp_path), FieldIndex(FIELD_INDEX.keys + ('extra_field',)))
+    assert other.version != plans.version
+    other.get(model)
+    assert other.stats()['compiles'] == 1
@@ -0,0 +1,74 @@
+"""
+Tests for the synthetic placeholder data catalog and routing
+"""
+import re
+
+import synthetic_data
+from synthetic_data import BUYER_BANKS, BUYERS, SELLER_BANKS, SELLERS, generate, route
+
+
+def test_same_vessel_gives_same_values():
+    for placeholder in ('buyer_name', 'seller_bank_swift', 'loading_port', 'total_value', 'reference_number'):
+        assert generate(placeholder, '9123456') == generate(placeholder, '9123456')
+
+
+def test_entity_fields_describe_one_party():
+    name = generate('buyer_name', '9123456')
+    buyer = next(party for party in BUYERS if party.name == name)
+    assert generate('buyer_email', '9123456') == buyer.email
+    assert generate('buyer_phone', '9123456') == buyer.phone
+    assert generate('Buyer Address', '9123456') == buyer.address
+    assert generate('seller_name', '9123456') in {party.name for party in SELLERS}
+
+
+def test_routing_priority():
+    assert generate('buyer_bank_name', '1') in {bank.name for bank in BUYER_BANKS}
+    assert generate('seller_bank_swift', '1') in {bank.swift for bank in SELLER_BANKS}
+    assert generate('crude_oil', '1') in synthetic_data.CRUDE_OILS
+    assert generate('discharge_port', '1') in synthetic_data.DISCHARGE_PORTS
+    assert re.fullmatch(r'[\d,]+ MT', generate('quantity', '1'))
+    assert re.fullmatch(r'[A-Z]+-\d{6}', generate('reference_number', '1'))
+    assert generate('vessel_owner', '1') is None
+    assert generate('remarks', '1') == 'Sample Remarks'
+
+
+def test_routes_are_resolved_once_per_key():
+    route.cache_clear()
+    for _ in range(3):
+        generate('buyer_email', '1')
+        generate('buyer email', '2')
+    assert route.cache_info().currsize == 1
+
+
+def test_generation_leaves_global_random_alone_and_is_thread_safe():
+    import random
+    from concurrent.futures import ThreadPoolExecutor
+
+    placeholders = ['buyer_name', 'seller_email', 'buyer_bank_swift', 'loading_port', 'quantity'] * 40
+    imos = [str(9000000 + i % 7) for i in range(len(placeholders))]
+    serial = [generate(p, imo) for p, imo in zip(placeholders, imos)]
+
+    random.seed(1234)
+    expected_next = random.random()
+    random.seed(1234)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        parallel = list(pool.map(generate, placeholders, imos))
+    assert parallel == serial
+    assert random.random() == expected_next
+
+
+def test_party_profile_matches_per_placeholder_values():
+    from synthetic_data import party_profile
+
+    for imo in ('9123456', '1234567', '9000003'):
+        for role in ('buyer', 'seller'):
+            profile = party_profile(imo, role)
+            assert profile.name == generate(f'{role}_name', imo) == generate(f'{role}_company', imo)
+            assert profile.email == generate(f'{role}_email', imo)
+            assert profile.phone == generate(f'{role}_phone', imo)
+            assert profile.address == generate(f'{role}_address', imo)
+            assert profile.bank_name == generate(f'{role}_bank_name', imo)
+            assert profile.bank_address == generate(f'{role}_bank_address', imo)
+            assert profile.bank_swift == generate(f'{role}_bank_swift', imo)
+            assert profile.address.endswith(profile.city_country.split(', ')[-1])
+    assert party_profile('9123456', 'buyer') is party_profile('9123456', 'buyer')
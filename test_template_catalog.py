@@ -0,0 +1,90 @@
+"""
+Tests for the persistent template catalog and the /templates listing
+"""
+import os
+import shutil
+
+from docx import Document
+from fastapi.testclient import TestClient
+
+import main
+from template_catalog import TemplateCatalog, template_id
+from template_registry import TemplateRegistry
+
+ICPO = os.path.join(os.path.dirname(__file__), 'templates', 'ICPO TEMPLATE.docx')
+
+
+def make_catalog(tmp_path, catalog_path=None):
+    templates_dir = tmp_path / 'templates'
+    templates_dir.mkdir(exist_ok=True)
+    return TemplateCatalog(catalog_path, TemplateRegistry(str(templates_dir))), templates_dir
+
+
+def test_refresh_only_recompiles_changed_files(tmp_path):
+    catalog, templates_dir = make_catalog(tmp_path)
+    shutil.copy(ICPO, templates_dir / 'a.docx')
+    shutil.copy(ICPO, templates_dir / 'b.docx')
+    assert catalog.refresh() == 2
+    first = catalog.snapshot()
+    assert [entry.file_name for entry in first.entries] == ['a.docx', 'b.docx']
+    assert 'imo_number' in first.entries[0].placeholders
+    assert first.entries[0].id == template_id('a.docx')
+
+    assert catalog.refresh() == 0
+    assert catalog.compiles == 2
+    assert catalog.snapshot() is first
+
+    doc = Document(str(templates_dir / 'b.docx'))
+    doc.add_paragraph('{brand_new_field}')
+    doc.save(str(templates_dir / 'b.docx'))
+    os.remove(templates_dir / 'a.docx')
+    assert catalog.refresh() == 2
+    second = catalog.snapshot()
+    assert [entry.file_name for entry in second.entries] == ['b.docx']
+    assert 'brand_new_field' in second.entries[0].placeholders
+    assert second.entries[0].created_at == first.entries[1].created_at
+    assert second.etag != first.etag
+
+
+def test_catalog_survives_restart_without_reparsing(tmp_path):
+    catalog_path = str(tmp_path / 'catalog.json')
+    catalog, templates_dir = make_catalog(tmp_path, catalog_path)
+    shutil.copy(ICPO, templates_dir / 'icpo.docx')
+    catalog.refresh()
+
+    restarted, _ = make_catalog(tmp_path, catalog_path)
+    assert restarted.snapshot() == catalog.snapshot()
+    assert restarted.refresh() == 0
+    assert restarted.compiles == 0 and restarted.registry.compiles == 0
+
+
+def test_upload_hook_catalogues_one_file(tmp_path):
+    catalog, templates_dir = make_catalog(tmp_path)
+    shutil.copy(ICPO, templates_dir / 'new.docx')
+    entry = catalog.update('new.docx')
+    assert entry.file_name == 'new.docx' and catalog.get('new.docx') == entry
+    os.remove(templates_dir / 'new.docx')
+    assert catalog.update('new.docx') is None
+    assert catalog.snapshot().entries == ()
+
+
+def test_templates_endpoint_serves_catalog_with_etag(tmp_path, monkeypatch):
+    catalog, templates_dir = make_catalog(tmp_path)
+    shutil.copy(ICPO, templates_dir / 'icpo.docx')
+    monkeypatch.setattr(main, 'template_catalog', catalog)
+    client = TestClient(main.app)
+
+    first = client.get('/templates')
+    assert first.status_code == 200
+    listing = first.json()
+    assert listing['count'] == 1
+    assert listing['templates'][0]['id'] == template_id('icpo.docx')
+    assert client.get('/templates').json() == listing
+
+    unchanged = client.get('/templates', headers={'If-None-Match': first.headers['etag']})
+    assert (unchanged.status_code, unchanged.content) == (304, b'')
+
+    shutil.copy(ICPO, templates_dir / 'second.docx')
+    assert client.post('/templates/refresh').json()['changes'] == 1
+    changed = client.get('/templates', headers={'If-None-Match': first.headers['etag']})
+    assert changed.status_code == 200 and changed.json()['count'] == 2
@@ -0,0 +1,45 @@
+"""
+Tests for compiled template models
+"""
+import os
+import shutil
+
+from docx import Document
+
+from template_registry import TemplateRegistry
+
+ICPO = os.path.join(os.path.dirname(__file__), 'templates', 'ICPO TEMPLATE.docx')
+
+
+def test_compiled_model_indexes_placeholders(tmp_path):
+    shutil.copy(ICPO, tmp_path / 'icpo.docx')
+    model = TemplateRegistry(str(tmp_path)).get('icpo.docx')
+    assert 'imo_number' in model.placeholders
+    assert len(model.placeholders) == len(set(model.placeholders))
+    location = model.locations['imo_number'][0]
+    assert location.part == 'word/document.xml'
+    assert location.container == 'table_cell'
+    assert location.paragraph in model.paragraphs['word/document.xml']
+    assert len(model.content_hash) == 64
+
+
+def test_model_reused_until_content_changes(tmp_path):
+    path = tmp_path / 'icpo.docx'
+    shutil.copy(ICPO, path)
+    registry = TemplateRegistry(str(tmp_path))
+    first = registry.get('icpo.docx')
+    assert registry.get('icpo.docx') is first
+    assert registry.compiles == 1
+
+    # touched, same bytes: rehashed but not recompiled
+    os.utime(path, ns=(first.mtime_ns + 10**9, first.mtime_ns + 10**9))
+    assert registry.get('icpo.docx').content_hash == first.content_hash
+    assert registry.compiles == 1
+
+    doc = Document(str(path))
+    doc.add_paragraph('{brand_new_field}')
+    doc.save(str(path))
+    changed = registry.get('icpo.docx')
+    assert registry.compiles == 2
+    assert 'brand_new_field' in changed.placeholders
+    assert changed.content_hash != first.content_hash
@@ -0,0 +1,101 @@
+"""
+Tests for the vessel context loader against the local Supabase stand-in
+"""
+import vessel_context
+from reference_cache import ReferenceCache
+from benchmarks.fake_supabase import FakeSupabase, sample_tables
+
+
+def _load(client, imo):
+    vessel_context.reset_embedding_probe()
+    return vessel_context.load_vessel_context(client, imo)
+
+
+def _load_cached(client, cache, imo):
+    vessel_context.reset_embedding_probe()
+    return vessel_context.load_vessel_context(client, imo, cache=cache)
+
+
+def test_embedded_load_is_one_round_trip():
+    client = FakeSupabase(sample_tables(3))
+    vessel = _load(client, '9100001')
+    assert client.round_trips == 1
+    assert vessel['name'] == 'MT Bench 1'
+    assert vessel['loading_port_name'] == 'Port 2'
+    assert vessel['destination_port_name'] == 'Port 5'
+    assert vessel['owner_name'] == 'Company 2'
+    assert vessel['operator_name'] == 'Company 3'
+    assert vessel['refinery_name'] == 'Refinery 2'
+    assert not any(key.startswith(vessel_context.EMBED_ALIAS_PREFIX) for key in vessel)
+
+
+def test_fallback_matches_embedded_result():
+    tables = sample_tables(3)
+    embedded = _load(FakeSupabase(tables), '9100002')
+    client = FakeSupabase(tables, embedding=False)
+    fanout = _load(client, '9100002')
+    assert fanout == embedded
+    # failed embed probe + vessel + ports/companies/refineries
+    assert client.round_trips == 5
+    client.reset_counters()
+    vessel_context.load_vessel_context(client, '9100002')
+    assert client.round_trips == 4
+
+
+def test_unknown_imo_returns_none():
+    assert _load(FakeSupabase(sample_tables(1)), '0000000') is None
+
+
+def test_reference_cache_skips_round_trips():
+    client = FakeSupabase(sample_tables(12))
+    cache = ReferenceCache()
+    first = _load_cached(client, cache, '9100000')
+    assert client.round_trips == 1
+    # same vessel again: everything cached
+    assert vessel_context.load_vessel_context(client, '9100000', cache=cache) == first
+    assert client.round_trips == 1
+    # another vessel sharing ports/companies/refinery: still one query for the vessel itself
+    cache.invalidate('vessels')
+    vessel_context.load_vessel_context(client, '9100010', cache=cache)
+    assert client.round_trips == 2
+
+
+def test_reference_cache_ttl_and_lru():
+    now = [0.0]
+    cache = ReferenceCache(max_entries=2, ttls={'ports': 10}, clock=lambda: now[0])
+    cache.set('ports', 1, {'id': 1})
+    cache.set('ports', 2, {'id': 2})
+    assert cache.get('ports', '1') == {'id': 1}
+    cache.set('ports', 3, {'id': 3})  # evicts 2, the least recently used
+    assert cache.get('ports', 2) is None
+    now[0] = 11
+    assert cache.get('ports', 1) is None
+    stats = cache.stats()
+    assert stats['evictions'] == 1
+    assert stats['tables']['ports']['hits'] == 1
+    assert stats['tables']['ports']['misses'] == 2
+
+
+def test_bulk_load_matches_single_loads():
+    tables = sample_tables(5)
+    imos = ['9100001', '9100003', '9999999', '9100005']
+    for embedding in (True, False):
+        client = FakeSupabase(tables, embedding=embedding)
+        vessel_context.reset_embedding_probe()
+        vessels = vessel_context.load_vessel_contexts(client, imos)
+        assert list(vessels) == imos and vessels['9999999'] is None
+        # embedded: one query; fallback: failed probe + vessels + ports/companies/refineries
+        assert client.round_trips == (1 if embedding else 5)
+        for imo in ('9100001', '9100003', '9100005'):
+            assert vessels[imo] == _load(FakeSupabase(tables), imo)
+
+
+def test_bulk_load_uses_the_cache():
+    client = FakeSupabase(sample_tables(3))
+    cache = ReferenceCache()
+    vessel_context.reset_embedding_probe()
+    first = vessel_context.load_vessel_contexts(client, ['9100001', '9100002'], cache=cache)
+    client.reset_counters()
+    again = vessel_context.load_vessel_contexts(client, ['9100002', '9100001'], cache=cache)
+    assert client.round_trips == 0
+    assert again['9100001'] == first['9100001']
@@ -0,0 +1,249 @@
+"""
+Vessel context loader
+Fetches a vessel together with its ports, companies and refinery from Supabase
+in as few round trips as possible
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (key prefix, foreign key column on vessels, referenced table)
+# Order matters: it is the order the prefixed keys are merged into the vessel dict.
+VESSEL_RELATIONS: Tuple[Tuple[str, str, str], ...] = (
+    ('loading_port', 'loading_port_id', 'ports'),
+    ('destination_port', 'destination_port_id', 'ports'),
+    ('owner', 'owner_id', 'companies'),
+    ('operator', 'operator_id', 'companies'),
+    ('refinery', 'refinery_id', 'refineries'),
+)
+
+# Embedded relations are aliased so they can never clash with real vessel columns
+EMBED_ALIAS_PREFIX = 'rel_'
+
+EMBEDDED_SELECT = '*, ' + ', '.join(
+    f'{EMBED_ALIAS_PREFIX}{prefix}:{table}!{fk_column}(*)'
+    for prefix, fk_column, table in VESSEL_RELATIONS
+)
+
+# PostgREST error codes for "no usable foreign key between these tables"
+_RELATIONSHIP_ERROR_CODES = {'PGRST200', 'PGRST201'}
+
+# None = not tried yet, False = the database has no FKs we can embed through
+_embedding_supported: Optional[bool] = None
+
+_fetch_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='vessel-context')
+
+
+def _is_relationship_error(error: Exception) -> bool:
+    code = getattr(error, 'code', None)
+    return code in _RELATIONSHIP_ERROR_CODES or 'relationship' in str(error).lower()
+
+
+def _merge_related(vessel: Dict, related: Dict[str, Dict]) -> Dict:
+    """Flatten related rows into the vessel dict using the <prefix>_<column> keys"""
+    for prefix, _, _ in VESSEL_RELATIONS:
+        row = related.get(prefix)
+        if row:
+            for key, value in row.items():
+                vessel[f'{prefix}_{key}'] = value
+    return vessel
+
+
+def _split_embedded_row(row: Dict) -> Tuple[Dict, Dict[str, Dict[str, Optional[Dict]]]]:
+    """Separate an embedded select row into the plain vessel row and {table: {str(id): row}}"""
+    vessel = {key: value for key, value in row.items() if not key.startswith(EMBED_ALIAS_PREFIX)}
+    rows_by_table: Dict[str, Dict[str, Optional[Dict]]] = {}
+    for prefix, fk_column, table in VESSEL_RELATIONS:
+        ref_id = vessel.get(fk_column)
+        if not ref_id:
+            continue
+        related = row.get(f'{EMBED_ALIAS_PREFIX}{prefix}')
+        # to-one embeds come back as an object; be lenient with single-item lists
+        if isinstance(related, list):
+            related = related[0] if related else None
+        rows_by_table.setdefault(table, {})[str(ref_id)] = related
+    return vessel, rows_by_table
+
+
+def _fetch_rows_by_id(client, table: str, ids: List) -> Dict[str, Dict]:
+    """Fetch several rows of one table in a single query, keyed by str(id)"""
+    response = client.table(table).select('*').in_('id', ids).execute()
+    return {str(row.get('id')): row for row in (response.data or [])}
+
+
+def fetch_related(client, vessels: List[Dict], known: Optional[Dict[str, Dict[str, Optional[Dict]]]] = None,
+                  cache=None) -> Dict[str, Dict[str, Optional[Dict]]]:
+    """
+    Resolve every row referenced by the given vessels.
+
+    Rows already in `known` or in the reference cache are reused; the rest are
+    fetched with one query per table, the per-table queries running in parallel.
+    Returns {table: {str(id): row or None}}. A failing table is logged and left unresolved.
+    """
+    rows_by_table: Dict[str, Dict[str, Optional[Dict]]] = {
+        table: dict(rows) for table, rows in (known or {}).items()
+    }
+    ids_by_table: Dict[str, List] = {}
+    for vessel in vessels:
+        for _, fk_column, table in VESSEL_RELATIONS:
+            ref_id = vessel.get(fk_column)
+            if not ref_id or str(ref_id) in rows_by_table.get(table, {}):
+                continue
+            cached = cache.get(table, ref_id) if cache is not None else None
+            if cached is not None:
+                rows_by_table.setdefault(table, {})[str(ref_id)] = cached
+            elif ref_id not in ids_by_table.setdefault(table, []):
+                ids_by_table[table].append(ref_id)
+
+    futures = {
+        table: _fetch_pool.submit(_fetch_rows_by_id, client, table, ids)
+        for table, ids in ids_by_table.items() if ids
+    }
+
+    for table, future in futures.items():
+        try:
+            fetched = future.result()
+        except Exception as e:
+            logger.warning("Error fetching %s rows for vessel context: %s", table, e)
+            continue
+        table_rows = rows_by_table.setdefault(table, {})
+        for ref_id in ids_by_table[table]:
+            row = fetched.get(str(ref_id))
+            table_rows[str(ref_id)] = row
+            if row is not None and cache is not None:
+                cache.set(table, ref_id, row)
+    return rows_by_table
+
+
+def attach_related(vessel: Dict, rows_by_table: Dict[str, Dict[str, Optional[Dict]]]) -> Dict:
+    """Merge already-fetched related rows into a copy of the vessel row"""
+    related = {}
+    for prefix, fk_column, table in VESSEL_RELATIONS:
+        ref_id = vessel.get(fk_column)
+        if ref_id:
+            related[prefix] = rows_by_table.get(table, {}).get(str(ref_id))
+    return _merge_related(dict(vessel), related)
+
+
+def _fetch_vessel(client, imo: str) -> Tuple[Optional[Dict], Dict[str, Dict[str, Optional[Dict]]]]:
+    """
+    Fetch the vessel row, with its related rows embedded when the database
+    has the foreign keys for it. Returns (vessel or None, {table: {str(id): row}}).
+    """
+    global _embedding_supported
+
+    if _embedding_supported is not False:
+        try:
+            response = client.table('vessels').select(EMBEDDED_SELECT).eq('imo', imo).execute()
+            _embedding_supported = True
+            if not response.data:
+                return None, {}
+            return _split_embedded_row(response.data[0])
+        except Exception as e:
+            if not _is_relationship_error(e):
+                raise
+            logger.warning("Embedded vessel relations unavailable, using parallel lookups: %s", e)
+            _embedding_supported = False
+
+    response = client.table('vessels').select('*').eq('imo', imo).execute()
+    if not response.data:
+        return None, {}
+    return response.data[0], {}
+
+
+def _fetch_vessels(client, imos: List[str]) -> Tuple[Dict[str, Dict], Dict[str, Dict[str, Optional[Dict]]]]:
+    """
+    Bulk form of _fetch_vessel: every vessel with one of the IMOs in a single query.
+    Returns ({imo: vessel}, {table: {str(id): row}}); IMOs without a vessel are absent.
+    """
+    global _embedding_supported
+
+    if _embedding_supported is not False:
+        try:
+            response = client.table('vessels').select(EMBEDDED_SELECT).in_('imo', imos).execute()
+            _embedding_supported = True
+            vessels: Dict[str, Dict] = {}
+            known: Dict[str, Dict[str, Optional[Dict]]] = {}
+            for row in response.data or []:
+                vessel, rows_by_table = _split_embedded_row(row)
+                vessels.setdefault(str(vessel.get('imo')), vessel)
+                for table, rows in rows_by_table.items():
+                    known.setdefault(table, {}).update(rows)
+            return vessels, known
+        except Exception as e:
+            if not _is_relationship_error(e):
+                raise
+            logger.warning("Embedded vessel relations unavailable, using parallel lookups: %s", e)
+            _embedding_supported = False
+
+    response = client.table('vessels').select('*').in_('imo', imos).execute()
+    vessels = {}
+    for row in response.data or []:
+        vessels.setdefault(str(row.get('imo')), row)
+    return vessels, {}
+
+
+def load_vessel_contexts(client, imos: List[str], cache=None) -> Dict[str, Optional[Dict]]:
+    """
+    load_vessel_context for many vessels at once: one query for the vessels
+    (with embedded relations when possible) and one per related table for
+    whatever the embed and the cache didn't cover. Returns {imo: vessel or None}
+    in the order the IMOs were given.
+    """
+    imos = list(dict.fromkeys(str(imo) for imo in imos))
+    vessels: Dict[str, Dict] = {}
+    for imo in imos:
+        cached = cache.get('vessels', imo) if cache is not None else None
+        if cached is not None:
+            vessels[imo] = cached
+
+    missing = [imo for imo in imos if imo not in vessels]
+    known: Dict[str, Dict[str, Optional[Dict]]] = {}
+    if missing:
+        fetched, known = _fetch_vessels(client, missing)
+        vessels.update(fetched)
+        if cache is not None:
+            for imo, vessel in fetched.items():
+                cache.set('vessels', imo, vessel)
+            for table, rows in known.items():
+                for ref_id, row in rows.items():
+                    if row is not None:
+                        cache.set(table, ref_id, row)
+
+    rows_by_table = fetch_related(client, [vessels[imo] for imo in imos if imo in vessels], known, cache)
+    return {imo: attach_related(vessels[imo], rows_by_table) if imo in vessels else None for imo in imos}
+
+
+def load_vessel_context(client, imo: str, cache=None) -> Optional[Dict]:
+    """
+    Load a vessel and all of its related rows.
+
+    Uses a single PostgREST query with embedded relations when the database
+    has the foreign keys for it; otherwise falls back to one vessel query
+    followed by one parallel query per related table. With a ReferenceCache,
+    cached vessel and reference rows skip their round trips entirely.
+    Returns None when no vessel has this IMO.
+    """
+    vessel = cache.get('vessels', imo) if cache is not None else None
+    known: Dict[str, Dict[str, Optional[Dict]]] = {}
+    if vessel is None:
+        vessel, known = _fetch_vessel(client, imo)
+        if vessel is None:
+            return None
+        if cache is not None:
+            cache.set('vessels', imo, vessel)
+            for table, rows in known.items():
+                for ref_id, row in rows.items():
+                    if row is not None:
+                        cache.set(table, ref_id, row)
+
+    return attach_related(vessel, fetch_related(client, [vessel], known, cache))
+
+
+def reset_embedding_probe():
+    """Forget whether embedding works, e.g. after a schema migration"""
+    global _embedding_supported
+    _embedding_supported = None
@@ -0,0 +1,418 @@
+"""
+Document field registry
+Every field a template placeholder can resolve to, as a named resolver over the
+vessel row. Nothing is computed up front: VesselFields evaluates a field the
+first time a placeholder asks for it, so a request pays for the fields its
+template uses rather than for the whole catalog.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, NamedTuple, Optional, Union
+
+from field_resolver import FieldIndex
+from synthetic_data import party_profile
+
+
+class FieldContext(NamedTuple):
+    """What resolvers read from"""
+    vessel: Dict[str, Any]
+    vessel_imo: str
+
+
+# A field is either a constant or a function of the context
+Field = Union[str, Callable[[FieldContext], str]]
+
+
+def column(name: str) -> Field:
+    """Vessel column as stored"""
+    return lambda context: context.vessel.get(name, '')
+
+
+def text(name: str) -> Field:
+    """Vessel column as a string"""
+    return lambda context: str(context.vessel.get(name, ''))
+
+
+def scaled(name: str, factor: float) -> Field:
+    """Whole-number share of a numeric vessel column, '' when the column is empty"""
+    def resolve(context: FieldContext) -> str:
+        value = context.vessel.get(name)
+        return str(int(value * factor)) if value else ''
+    return resolve
+
+
+def party(role: str, attribute: str) -> Field:
+    """One attribute of the vessel's buyer or seller profile"""
+    return lambda context: getattr(party_profile(context.vessel_imo, role), attribute)
+
+
+def document_reference(prefix: str) -> Field:
+    """e.g. INV-<imo>-<yyyymmdd>"""
+    return lambda context: f"{prefix}-{context.vessel.get('imo', '') or 'UNKNOWN'}-{datetime.now().strftime('%Y%m%d')}"
+
+
+def two_weeks_ago(context: FieldContext) -> str:
+    return (datetime.now() - timedelta(days=14)).strftime('%Y-%m-%d')
+
+
+def valid_until(context: FieldContext) -> str:
+    now = datetime.now()
+    valid = now.replace(day=now.day + 30) if now.day <= 1 else now.replace(month=now.month + 1, day=1)
+    return valid.strftime('%Y-%m-%d')
+
+
+def product_description(context: FieldContext) -> str:
+    vessel = context.vessel
+    return (vessel.get('cargo_type', '') or 'Crude Oil') + ' - ' + (vessel.get('oil_type', '') or 'Brent Quality')
+
+
+# Field name -> resolver. Order matters: when a placeholder partially matches
+# several names, the one listed first wins (see field_resolver).
+FIELDS: Dict[str, Field] = {
+    # === VESSEL BASIC INFO ===
+    'vessel_name': column('name'),
+    'name': column('name'),
+    'imo': column('imo'),
+    'imo_number': column('imo'),
+    'vessel_type': column('vessel_type'),
+    'type': column('vessel_type'),
+    'flag': column('flag'),
+    'flag_state': column('flag'),
+    'mmsi': column('mmsi'),
+    'callsign': column('callsign'),
+    'call_sign': column('callsign'),
+    'built': text('built'),
+    'year_built': text('built'),
+    'deadweight': text('deadweight'),
+    'cargo_capacity': text('cargo_capacity'),
+    'length': text('length'),
+    'length_overall': text('length'),
+    'width': text('width'),
+    'beam': text('beam'),
+    'draught': text('draught'),
+    'draft': text('draught'),
+    'gross_tonnage': text('gross_tonnage'),
+    'net_tonnage': scaled('gross_tonnage', 0.7),
+    'engine_power': text('engine_power'),
+    'engine_type': 'Diesel Engine',
+    'crew_size': text('crew_size'),
+    'speed': text('speed'),
+    'course': text('course'),
+    'status': column('status'),
+    'current_region': column('current_region'),
+    'region': column('current_region'),
+
+    # === COMMERCIAL PARTIES ===
+    'owner_name': column('owner_name'),
+    'owner': column('owner_name'),
+    'vessel_owner': column('owner_name'),
+    'operator_name': column('operator_name'),
+    'operator': column('operator_name'),
+    'vessel_operator': column('operator_name'),
+    'buyer_name': party('buyer', 'name'),
+    'buyer': party('buyer', 'name'),
+    'seller_name': party('seller', 'name'),
+    'seller': party('seller', 'name'),
+    'company_name': column('owner_name'),
+
+    # === CARGO INFORMATION ===
+    'cargo_type': column('cargo_type'),
+    'cargo': column('cargo_type'),
+    'cargo_quantity': text('cargo_quantity'),
+    'quantity': text('cargo_quantity'),
+    'oil_type': column('oil_type'),
+    'oil_source': column('oil_source'),
+    'commodity': column('cargo_type'),
+    'product_name': column('cargo_type'),
+    'product_description': product_description,
+
+    # === PORTS AND NAVIGATION ===
+    'departure_port': column('departure_port_name'),
+    'departure_port_name': column('departure_port_name'),
+    'destination_port': column('destination_port_name'),
+    'destination_port_name': column('destination_port_name'),
+    'loading_port': column('loading_port_name'),
+    'loading_port_name': column('loading_port_name'),
+    'port_loading': column('loading_port_name'),
+    'port_discharge': column('destination_port_name'),
+    'departure_date': column('departure_date'),
+    'arrival_date': column('arrival_date'),
+    'eta': column('eta'),
+    'registry_port': column('flag'),
+
+    # === FINANCIAL ===
+    'deal_value': text('deal_value'),
+    'price': text('price'),
+    'market_price': text('market_price'),
+    'total_quantity': text('cargo_quantity'),
+    'contract_quantity': text('cargo_quantity'),
+    'contract_value': text('deal_value'),
+    'total_amount': text('deal_value'),
+    'total_amount_due': text('deal_value'),
+    'unit_price': text('price'),
+    'unit_price2': text('price'),
+    'unit_price3': text('price'),
+    'amount2': scaled('deal_value', 0.3),
+    'amount3': scaled('deal_value', 0.2),
+    'amount_in_words': 'As per contract',
+
+    # === TECHNICAL SPECIFICATIONS ===
+    'cargo_tanks': '12',
+    'pumping_capacity': '5000',
+    'class_society': 'Lloyd\'s Register',
+    'ism_manager': column('operator_name'),
+
+    # === DATES AND REFERENCES ===
+    'date': two_weeks_ago,
+    'issued_date': two_weeks_ago,
+    'issue_date': two_weeks_ago,
+    'date_of_issue': two_weeks_ago,
+    'validity': '30 days',
+    'valid_until': valid_until,
+    'contract_duration': '12 months',
+    'pop_reference': document_reference('POP'),
+    'document_number': document_reference('DOC'),
+    'commercial_invoice_no': document_reference('INV'),
+    'proforma_invoice_no': document_reference('PRO'),
+    'invoice_no': document_reference('INV'),
+
+    # === BUYER INFORMATION ===
+    'principal_buyer_name': party('buyer', 'name'),
+    'buyer_logistics_name': party('buyer', 'name'),
+    'principal_buyer_designation': 'Procurement Manager',
+    'buyer_logistics_designation': 'Logistics Coordinator',
+    'principal_buyer_company': party('buyer', 'name'),
+    'buyer_logistics_company': party('buyer', 'name'),
+    'buyer_company_name': party('buyer', 'name'),
+    'buyer_company_name2': party('buyer', 'name'),
+    'authorized_person_name': party('buyer', 'name'),
+    'buyer_company': party('buyer', 'name'),
+    'buyer_address': party('buyer', 'address'),
+    'buyer_city_country': party('buyer', 'city_country'),
+    'buyer_email': party('buyer', 'email'),
+    'buyer_emails': party('buyer', 'email'),
+    'buyer_contact_email': party('buyer', 'email'),
+    'buyer_representative_email': party('buyer', 'email'),
+    'buyer_fax': party('buyer', 'phone'),
+    'buyer_mobile': party('buyer', 'phone'),
+    'buyer_office_tel': party('buyer', 'phone'),
+    'buyer_position': 'Procurement Manager',
+    'buyer_registration': 'NL123456789',
+    'buyer_representative': party('buyer', 'name'),
+    'buyer_signatory_name': party('buyer', 'name'),
+    'buyer_signatory_position': 'Authorized Signatory',
+    'buyer_signatory_date': two_weeks_ago,
+    'buyer_signature': 'Digital Signature',
+    'buyer_attention': 'Procurement Department',
+    'buyer_attention2': 'Logistics Department',
+    'buyer_bin': 'BIN123456789',
+    'buyer_bank_address': party('buyer', 'bank_address'),
+    'buyer_bank_name': party('buyer', 'bank_name'),
+    'buyer_bank_website': 'www.bank.com',
+    'buyer_swift': party('buyer', 'bank_swift'),
+    'buyer_telfax': party('buyer', 'phone'),
+    'buyer_account_name': party('buyer', 'name'),
+    'buyer_account_no': 'NL91ABNA0417164300',
+    'buyer_passport_no': 'P123456789',
+
+    # === SELLER INFORMATION ===
+    'seller_designation': 'Sales Director',
+    'seller_company': party('seller', 'name'),
+    'seller_signature': 'Authorized Signature',
+    'seller_signatory': party('seller', 'name'),
+    'seller_title': 'Sales Director',
+    'seller_address': party('seller', 'address'),
+    'seller_address2': party('seller', 'address'),
+    'seller_company_no': 'REG123456789',
+    'seller_company_reg': 'Registered in Oil Country',
+    'seller_emails': party('seller', 'email'),
+    'seller_passport_no': 'P987654321',
+    'seller_refinery': 'Oil Refinery Complex',
+    'seller_representative': party('seller', 'name'),
+    'seller_swift': party('seller', 'bank_swift'),
+    'seller_bank_address': party('seller', 'bank_address'),
+    'seller_bank_iban': 'NL91OILN0417164300',
+    'seller_bank_name': party('seller', 'bank_name'),
+    'seller_beneficiary_address': party('seller', 'address'),
+    'seller_bank_account_name': party('seller', 'name'),
+    'seller_bank_account_no': 'NL91OILN0417164300',
+    'seller_bank_officer_mobile': party('seller', 'phone'),
+    'seller_bank_officer_name': 'Bank Officer',
+    'seller_bank_swift': party('seller', 'bank_swift'),
+    'seller_tel': party('seller', 'phone'),
+    'seller_email': party('seller', 'email'),
+    'seller_contact_email': party('seller', 'email'),
+    'seller_representative_email': party('seller', 'email'),
+    'seller_company_email': party('seller', 'email'),
+    'seller_registration': 'OIL123456789',
+
+    # === PRODUCT SPECIFICATIONS ===
+    'country_of_origin': 'Saudi Arabia',
+    'origin': 'Saudi Arabia',
+    'delivery_port': column('destination_port_name'),
+    'final_delivery_place': column('destination_port_name'),
+    'place_of_destination': column('destination_port_name'),
+    'port_of_loading': column('loading_port_name'),
+    'port_of_discharge': column('destination_port_name'),
+    'specification': 'As per contract specifications',
+    'quality': 'Premium Grade',
+    'inspection': 'SGS Inspection',
+    'insurance': 'All Risks Coverage',
+    'shipping_terms': 'FOB',
+    'terms_of_delivery': 'FOB Loading Port',
+    'payment_terms': 'LC at Sight',
+    'shipping_documents': 'Bill of Lading, Certificate of Origin',
+    'performance_bond': '2% of contract value',
+    'partial_shipment': 'Allowed',
+    'transshipment': 'Not Allowed',
+    'monthly_delivery': 'As per schedule',
+    'total_containers': '1',
+    'total_gross': text('cargo_quantity'),
+    'total_weight': text('cargo_quantity'),
+    'transaction_currency': 'USD',
+    'shipping_charges': 'As per contract',
+    'discount': '0%',
+    'other_expenditures': 'As per contract',
+    'via_name': 'Direct',
+    'through_name': 'Direct',
+    'consignment2': 'As per contract',
+    'consignment33': 'As per contract',
+    'item2': 'Additional Item',
+    'item3': 'Additional Item',
+    'quantity2': scaled('cargo_quantity', 0.3),
+    'quantity3': scaled('cargo_quantity', 0.2),
+    'shipment_date2': two_weeks_ago,
+    'shipment_date3': two_weeks_ago,
+    'goods_details': 'As per specification',
+    'position_title': 'Authorized Signatory',
+    'signatory_name': column('seller_name'),
+
+    # === BANKING INFORMATION ===
+    'confirming_bank_account_name': 'Confirming Bank Account',
+    'confirming_bank_account_number': 'NL91CONF0417164300',
+    'confirming_bank_address': 'Bank Street, Financial District',
+    'confirming_bank_name': 'Confirming Bank International',
+    'confirming_bank_officer': 'Bank Officer',
+    'confirming_bank_officer_contact': '+31-20-111-2222',
+    'confirming_bank_swift': 'CONFNL2A',
+    'confirming_bank_tel': '+31-20-111-2222',
+    'issuing_bank_account_name': 'Issuing Bank Account',
+    'issuing_bank_account_number': 'NL91ISSU0417164300',
+    'issuing_bank_address': 'Issuing Bank Street',
+    'issuing_bank_name': 'Issuing Bank International',
+    'issuing_bank_officer': 'Issuing Officer',
+    'issuing_bank_officer_contact': '+31-20-333-4444',
+    'issuing_bank_swift': 'ISSUENL2A',
+    'issuing_bank_tel': '+31-20-333-4444',
+    'notary_number': 'NOT123456789',
+
+    # === TECHNICAL SPECIFICATIONS (OIL/PRODUCT) ===
+    'api_gravity': '35.5',
+    'density': '0.845',
+    'specific_gravity': '0.845',
+    'sulfur': '0.5%',
+    'water_content': '0.1%',
+    'ash_content': '0.01%',
+    'carbon_residue': '0.1%',
+    'flash_point': '65°C',
+    'pour_point': '-15°C',
+    'cloud_point': '-10°C',
+    'cfpp': '-12°C',
+    'cetane_number': '52',
+    'octane_number': '95',
+    'viscosity_40': '2.5',
+    'viscosity_100': '1.2',
+    'viscosity_index': '95',
+    'lubricity': '460',
+    'calorific_value': '42.5',
+    'dist_ibp': '35°C',
+    'dist_10': '65°C',
+    'dist_50': '180°C',
+    'dist_90': '350°C',
+    'dist_fbp': '380°C',
+    'dist_residue': '2%',
+    'aromatics': '25%',
+    'olefins': '5%',
+    'oxygenates': '0%',
+    'nickel': '5 ppm',
+    'vanadium': '10 ppm',
+    'sodium': '2 ppm',
+    'nitrogen': '0.1%',
+    'sediment': '0.01%',
+    'smoke_point': '25mm',
+    'free_fatty_acid': '0.1%',
+    'iodine_value': '85',
+    'slip_melting_point': '35°C',
+    'moisture_impurities': '0.1%',
+    'colour': 'Light Yellow',
+
+    # === TEST RESULTS ===
+    'result_ash': '0.01%',
+    'result_aspect': 'Clear',
+    'result_cfpp_summer': '-8°C',
+    'result_cfpp_winter': '-15°C',
+    'result_cetaneindex': '52',
+    'result_cetanenumber': '52',
+    'result_color': 'Light Yellow',
+    'result_density': '0.845',
+    'result_distillation': 'As per spec',
+    'result_lubricity': '460',
+    'result_oxidation': 'Pass',
+    'result_pah': '0.1%',
+    'result_sulfur': '0.5%',
+    'result_viscosity': '2.5',
+
+    # === MAX/MIN SPECIFICATIONS ===
+    'max_acidity': '0.1%',
+    'max_aspect': 'Clear',
+    'max_cfpp_summer': '-5°C',
+    'max_cloud_winter': '-8°C',
+    'max_color': 'Light Yellow',
+    'max_density': '0.850',
+    'max_distillation': 'As per spec',
+    'max_pah': '0.2%',
+    'max_viscosity': '3.0',
+    'min_acidity': '0.05%',
+    'min_ash': '0.005%',
+    'min_cfpp_summer': '-10°C',
+    'min_cloud_winter': '-12°C',
+    'min_viscosity': '2.0',
+
+    # === ADDITIONAL FIELDS ===
+    'optional': 'N/A',
+    'to': 'To:',
+    'via': 'Via:',
+    'tel': '+31-20-123-4567',
+    'email': 'info@company.com',
+    'address': '123 Business Street',
+    'bin': 'BIN123456789',
+    'okpo': 'OKPO123456789',
+    'designations': 'Authorized Signatory',
+    'position': 'Manager',
+}
+
+FIELD_INDEX = FieldIndex(FIELDS)
+
+
+class VesselFields:
+    """Field values for one vessel, each computed on first access"""
+
+    def __init__(self, vessel: Dict[str, Any], vessel_imo: str):
+        self.context = FieldContext(vessel, vessel_imo)
+        self._values: Dict[str, Any] = {}
+
+    def __getitem__(self, name: str) -> Any:
+        try:
+            return self._values[name]
+        except KeyError:
+            field = FIELDS[name]
+            value = self._values[name] = field(self.context) if callable(field) else field
+            return value
+
+    def get(self, name: Optional[str], default: Any = None) -> Any:
+        return self[name] if name in FIELDS else default
+
+    @property
+    def evaluated(self) -> int:
+        """How many fields have been computed so far"""
+        return len(self._values)
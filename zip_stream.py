@@ -0,0 +1,60 @@
+"""
+Zip archives written as a stream
+ZipStream adds one member at a time and hands back the bytes produced so far,
+so a response can send each document as soon as it is ready instead of
+building the whole archive first.
+"""
+
+import zipfile
+from typing import Optional
+
+
+class _Sink:
+    """Write-only, non-seekable file object that collects what zipfile writes"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def take(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ZipStream:
+    """
+    Incrementally written zip archive.
+
+    Every add_* call returns the archive bytes written by that call; close()
+    returns the central directory. Concatenated, they are a valid zip file.
+    """
+
+    def __init__(self, compression: int = zipfile.ZIP_DEFLATED):
+        self._sink = _Sink()
+        self._archive: Optional[zipfile.ZipFile] = zipfile.ZipFile(self._sink, 'w', compression)
+
+    def add_file(self, path: str, name: str) -> bytes:
+        self._archive.write(path, name)
+        return self._sink.take()
+
+    def add_bytes(self, name: str, data: bytes) -> bytes:
+        self._archive.writestr(name, data)
+        return self._sink.take()
+
+    def close(self) -> bytes:
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+        return self._sink.take()